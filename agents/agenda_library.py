@@ -0,0 +1,171 @@
+"""Local library of past agendas, so recurring meetings skip the LLM.
+
+Agendas are stored as templates: the meeting's own title and date are
+replaced by ``$title`` and ``$date``, which are filled in again for the
+meeting asking. A candidate is scored by title similarity, from the same
+hashing embedder and LSH index that task deduplication uses. When both
+meetings list participants, their overlap is blended into the score.
+Scores below ``min_confidence`` are misses, and the caller falls back to the
+LLM and adds its answer back with ``add``.
+"""
+import json
+import os
+import re
+import string
+import threading
+import time
+from loguru import logger
+from agents.instrumentation import record_cache
+from agents.lazy_import import lazy_import
+from agents.task_dedup import ANNIndex, HashingEmbedder
+
+np = lazy_import('numpy')
+
+TITLE_WEIGHT = 0.8
+
+
+def _participants(meeting):
+    people = meeting.get('participants_emails') or meeting.get('participants') or []
+    return frozenset(str(person).strip().lower() for person in people)
+
+
+def _date(meeting):
+    start = meeting.get('start_time')
+    return str(start)[:10] if start else None
+
+
+def make_template(agenda, meeting):
+    """Turn an agenda written for ``meeting`` into a template with ``$title``/``$date`` slots."""
+    template = agenda.replace('$', '$$')
+    title = meeting.get('title')
+    if title:
+        template = re.sub(re.escape(title), '$title', template, flags=re.IGNORECASE)
+    date = _date(meeting)
+    if date:
+        template = template.replace(date, '$date')
+    return template
+
+
+class AgendaLibrary:
+    """Past agendas indexed by title, persisted as NDJSON and loaded on first use."""
+
+    def __init__(self, path='data/agendas/library.ndjson', embed=None, min_confidence=0.8):
+        try:
+            self.path = path
+            self.embed = embed or HashingEmbedder()
+            self.min_confidence = min_confidence
+            self.entries = []
+            self._positions = {}
+            self._index = None
+            self._loaded = False
+            self._lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            logger.info(f"AgendaLibrary initialized at '{path}'.")
+        except Exception as e:
+            logger.exception("Failed to initialize AgendaLibrary.")
+            raise e
+
+    @staticmethod
+    def _key(title, participants):
+        return f"{title.strip().lower()}\n{','.join(sorted(participants))}"
+
+    def _load(self):
+        if self._loaded:
+            return
+        entries = []
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        self._insert(entries)
+        self._loaded = True
+        logger.info(f"Loaded {len(self.entries)} agendas from '{self.path}'.")
+
+    def _insert(self, entries):
+        # A later agenda for the same title and participants replaces the earlier one
+        new = []
+        for entry in entries:
+            key = self._key(entry['title'], entry['participants'])
+            if key in self._positions:
+                self.entries[self._positions[key]] = entry
+                continue
+            self._positions[key] = len(self.entries)
+            self.entries.append(entry)
+            new.append(entry)
+        if not new:
+            return
+        vectors = np.asarray(self.embed([entry['title'] for entry in new]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        if self._index is None:
+            self._index = ANNIndex(vectors.shape[1])
+        self._index.add_many([self._positions[self._key(e['title'], e['participants'])] for e in new], vectors)
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self.entries)
+
+    def match(self, meeting):
+        """Return ``(entry, confidence)`` for the best past agenda, or None if the library is empty."""
+        with self._lock:
+            self._load()
+            if not self.entries or not meeting.get('title'):
+                return None
+            vector = np.asarray(self.embed([meeting['title']]), dtype=np.float32)[0]
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                return None
+            participants = _participants(meeting)
+            best = None
+            for position, title_score in self._index.query(vector / norm, k=10):
+                entry = self.entries[position]
+                confidence = title_score
+                known = frozenset(entry['participants'])
+                if participants and known:
+                    overlap = len(participants & known) / len(participants | known)
+                    confidence = TITLE_WEIGHT * title_score + (1 - TITLE_WEIGHT) * overlap
+                if best is None or confidence > best[1]:
+                    best = (entry, confidence)
+            return best
+
+    def lookup(self, meeting):
+        """The filled-in agenda of a confident match, or None; counts hits and misses."""
+        match = self.match(meeting)
+        hit = match is not None and match[1] >= self.min_confidence
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache('agenda', hit)
+        if not hit:
+            return None
+        entry, confidence = match
+        logger.info(f"Agenda for '{meeting['title']}' reused from '{entry['title']}' (confidence {confidence:.2f}).")
+        return string.Template(entry['template']).safe_substitute(
+            title=meeting['title'],
+            date=_date(meeting) or entry.get('date') or '',
+        )
+
+    def add(self, meeting, agenda, source='llm'):
+        entry = {
+            'title': meeting['title'],
+            'participants': sorted(_participants(meeting)),
+            'date': _date(meeting),
+            'template': make_template(agenda, meeting),
+            'source': source,
+            'created': time.time(),
+        }
+        with self._lock:
+            self._load()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+            self._insert([entry])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hits / lookups if lookups else None}
@@ -0,0 +1,333 @@
+"""Long-lived agent process serving the agent operations over a local HTTP API.
+
+Clients, LLM handles, the Letta agent and the outbox stay warm between
+requests instead of being rebuilt by every ``main.py`` run. Requests are
+``POST /v1/<operation>`` with a JSON object of keyword arguments; the reply is
+``{"result": ...}`` or ``{"error": ...}``. ``GET /health`` and ``GET /metrics``
+(Prometheus text) are also served.
+
+Usage:
+    python -m agents.daemon [--host 127.0.0.1] [--port 8765] [--socket /tmp/agents.sock]
+"""
+import argparse
+import inspect
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from loguru import logger
+from agents import instrumentation
+from agents.goal_analytics import summary_records
+from agents.instrumentation import instrument
+from agents.notifications import dispatcher_from_env
+from agents.outbox import Outbox
+from agents.sharding import shard_pool_from_env
+from agents.state_store import state_from_env
+
+DEFAULT_PORT = 8765
+
+
+class AgentDaemon:
+    """Owns the agents for the life of the process and dispatches operations to them.
+
+    Agents not passed in are built on first use. Each agent is guarded by its
+    own lock since none of them is thread-safe, so requests for different
+    agents still run concurrently.
+    """
+
+    def __init__(self, scheduler=None, reminder=None, knowledge=None, goals=None, outbox=None, dispatcher=None,
+                 state=None, shard_pool=None):
+        try:
+            self.outbox = outbox or Outbox()
+            self.dispatcher = dispatcher
+            self.state = state
+            self.shard_pool = shard_pool
+            self._agents = {'scheduler': scheduler, 'reminder': reminder, 'knowledge': knowledge, 'goals': goals}
+            self._locks = {name: threading.Lock() for name in self._agents}
+            # The outbox worker delivers through the same agents ('scheduler.*', 'reminder.*' targets)
+            for name, lock in self._locks.items():
+                self.outbox.guard(name, lock)
+            self._build_lock = threading.Lock()
+            self.started_at = time.time()
+            self.operations = {
+                'add_task': ('reminder', lambda agent, task: agent.add_task(task)),
+                'adjust_reminder': ('reminder', lambda agent: agent.adjust_reminder()),
+                'cluster_tasks': ('reminder', lambda agent: agent.cluster_tasks()),
+                'send_reminders': ('reminder', lambda agent, task_titles=None: agent.send_contextual_reminders(task_titles)),
+                'find_slot': ('scheduler', lambda agent, meeting: agent.identify_optimal_slots(meeting)),
+                'add_event': ('scheduler', lambda agent, event: agent.add_event_to_google_calendar(event)),
+                'adjust_schedule': ('scheduler', lambda agent, **options: agent.adjust_schedule(**options)),
+                'generate_agenda': ('scheduler', lambda agent, meeting: agent.generate_agenda(meeting)),
+                'store_document': ('knowledge', lambda agent, title, content: agent.store_document(title, content)),
+                'summarize': ('knowledge', lambda agent, title: agent.generate_summary(title)),
+                'input_goal': ('goals', lambda agent, goal: agent.input_goal(goal)),
+                'log_milestone': ('goals', lambda agent, goal_title, milestone: agent.log_milestone(goal_title, milestone)),
+                'goal_summary': ('goals', lambda agent, **options: summary_records(agent.goal_summary(**options))),
+            }
+            logger.info("AgentDaemon initialized successfully.")
+        except Exception as e:
+            logger.exception("Failed to initialize AgentDaemon.")
+            raise e
+
+    def agent(self, name):
+        if self._agents[name] is None:
+            with self._build_lock:
+                if self._agents[name] is None:
+                    self._agents[name] = self._build(name)
+        return self._agents[name]
+
+    def _build(self, name):
+        if name == 'scheduler':
+            from agents.agenda_library import AgendaLibrary
+            from agents.scheduler_agent import SchedulerAgent
+            return SchedulerAgent(
+                outbox=self.outbox, dispatcher=self.dispatcher, state=self.state, agenda_library=AgendaLibrary(),
+                shard_pool=self.shard_pool,
+            )
+        if name == 'reminder':
+            from agents.reminder_agent import ReminderAgent
+            from agents.task_dedup import TaskDeduplicator
+            return ReminderAgent(
+                outbox=self.outbox, deduplicator=TaskDeduplicator(), dispatcher=self.dispatcher, state=self.state
+            )
+        if name == 'knowledge':
+            from agents.knowledge_retrieval_agent import KnowledgeRetrievalAgent
+            return KnowledgeRetrievalAgent()
+        from agents.goal_tracker_agent import GoalTrackerAgent
+        return GoalTrackerAgent(state=self.state)
+
+    def warm_up(self):
+        """Build every agent up front so the first request does not pay for it."""
+        for name in self._agents:
+            self.agent(name)
+
+    def register_delivery_targets(self):
+        """Build the agents that own pending outbox entries, which registers their delivery handlers.
+
+        A lazy daemon would otherwise leave writes queued by a previous run undelivered.
+        """
+        owners = {target.split('.', 1)[0] for target in self.outbox.pending_targets()}
+        for name in self._agents:
+            if name in owners:
+                try:
+                    self.agent(name)
+                except Exception:
+                    logger.exception(f"Failed to build the {name} agent for outbox delivery.")
+
+    @instrument('daemon.call')
+    def call(self, operation, params=None):
+        if operation not in self.operations:
+            raise ValueError(f"Unknown operation '{operation}'.")
+        name, fn = self.operations[operation]
+        params = params or {}
+        try:
+            inspect.signature(fn).bind(None, **params)
+        except TypeError as e:
+            raise ValueError(f"Bad arguments for '{operation}': {e}")
+        agent = self.agent(name)
+        with self._locks[name]:
+            return fn(agent, **params)
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'uptime_s': time.time() - self.started_at,
+            'agents': {name: agent is not None for name, agent in self._agents.items()},
+            'outbox_pending': self.outbox.pending_count(),
+            'state_sequence': self.state.sequence if self.state else None,
+        }
+
+    def close(self):
+        # Everything accepted over the API is in the outbox, so flushing it
+        # delivers every write the daemon acknowledged
+        self.register_delivery_targets()
+        flushed = self.outbox.stop(flush=True)
+        # Entries for targets nobody could register are not delivered either
+        flushed = flushed and not self.outbox.pending_count()
+        if self.dispatcher:
+            self.dispatcher.close()
+        if self.shard_pool:
+            self.shard_pool.close()
+        if self.state:
+            # The next start maps this snapshot instead of replaying the log
+            self.state.close(snapshot=True)
+        if not flushed:
+            logger.error("AgentDaemon stopped with undelivered writes; pending entries are retried on the next start.")
+        logger.info("AgentDaemon stopped.")
+        return flushed
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per reply
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        daemon = self.server.daemon_state
+        if self.path == '/health':
+            self._reply(200, daemon.health())
+        elif self.path == '/metrics':
+            self._reply(200, instrumentation.registry.render_prometheus(), content_type='text/plain; version=0.0.4')
+        else:
+            self._reply(404, {'error': f"Unknown path '{self.path}'."})
+
+    def do_POST(self):
+        daemon = self.server.daemon_state
+        # Always consume the body so the keep-alive connection stays in sync
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        operation = self.path[len('/v1/'):] if self.path.startswith('/v1/') else None
+        if operation not in daemon.operations:
+            self._reply(404, {'error': f"Unknown path '{self.path}'."})
+            return
+        try:
+            params = json.loads(body or b'{}')
+            if not isinstance(params, dict):
+                raise ValueError("Request body must be a JSON object.")
+        except ValueError as e:
+            self._reply(400, {'error': str(e)})
+            return
+        try:
+            result = daemon.call(operation, params)
+        except ValueError as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._reply(500, {'error': str(e)})
+            return
+        self._reply(200, {'result': result})
+
+    def _reply(self, status, body, content_type='application/json'):
+        if isinstance(body, str):
+            data = body.encode('utf-8')
+        else:
+            data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix-socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class UnixRequestHandler(RequestHandler):
+    # TCP_NODELAY does not apply to Unix sockets
+    disable_nagle_algorithm = False
+
+
+class TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, daemon_state):
+        self.daemon_state = daemon_state
+        super().__init__(address, RequestHandler)
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, daemon_state):
+        self.daemon_state = daemon_state
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, UnixRequestHandler)
+        os.chmod(path, 0o600)
+
+
+def serve(daemon, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None):
+    """Serve until SIGINT/SIGTERM, then stop accepting requests and flush pending writes."""
+    if socket_path:
+        server = UnixServer(socket_path, daemon)
+        where = socket_path
+    else:
+        server = TCPServer((host, port), daemon)
+        where = f"http://{host}:{server.server_address[1]}"
+
+    def shutdown(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down.")
+        # shutdown() blocks until serve_forever returns, so it cannot run on the serving thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+    daemon.register_delivery_targets()
+    daemon.outbox.start()
+    logger.info(f"AgentDaemon listening on {where}.")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        daemon.close()
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path, timeout=30.0):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class DaemonClient:
+    """Minimal client keeping one persistent connection to the daemon."""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None, timeout=30.0):
+        if socket_path:
+            self._connection = UnixHTTPConnection(socket_path, timeout=timeout)
+        else:
+            self._connection = HTTPConnection(host, port, timeout=timeout)
+
+    def call(self, operation, **params):
+        status, body = self._request('POST', f'/v1/{operation}', json.dumps(params, default=str).encode('utf-8'))
+        if status != 200:
+            raise RuntimeError(f"{operation} failed ({status}): {body.get('error')}")
+        return body['result']
+
+    def health(self):
+        return self._request('GET', '/health')[1]
+
+    def _request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self._connection.request(method, path, body=body, headers=headers)
+        response = self._connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def close(self):
+        self._connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.getenv('AGENT_DAEMON_PORT', DEFAULT_PORT)))
+    parser.add_argument('--socket', default=os.getenv('AGENT_DAEMON_SOCKET'), help="serve on a Unix socket instead")
+    parser.add_argument('--lazy', action='store_true', help="build agents on first request instead of at start")
+    args = parser.parse_args(argv)
+
+    daemon = AgentDaemon(dispatcher=dispatcher_from_env(), state=state_from_env(), shard_pool=shard_pool_from_env())
+    if not args.lazy:
+        daemon.warm_up()
+    serve(daemon, host=args.host, port=args.port, socket_path=args.socket)
+    metrics_file = os.getenv('AGENT_METRICS_FILE')
+    if instrumentation.is_enabled() and metrics_file:
+        instrumentation.registry.write_prometheus(metrics_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import datetime
+import time
+from zoneinfo import ZoneInfo
+
+UTC_NAMES = frozenset(('UTC', 'Etc/UTC', 'GMT', 'Z'))
+# No zone is further than this from UTC, so it bounds local/UTC window slack
+MAX_UTC_OFFSET = 14 * 3600
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=datetime.timezone.utc)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
+
+def _days_from_civil(year, month, day):
+    # Days since 1970-01-01 in the proleptic Gregorian calendar (H. Hinnant)
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def local_to_utc(local_seconds, tz):
+    """Convert wall-clock seconds (as if UTC) in zone ``tz`` to epoch seconds."""
+    if tz in UTC_NAMES:
+        return local_seconds
+    wall_clock = _EPOCH + datetime.timedelta(seconds=local_seconds)
+    return int(wall_clock.replace(tzinfo=ZoneInfo(tz)).timestamp())
+
+
+def utc_to_local(epoch, tz):
+    """Convert epoch seconds to wall-clock seconds (as if UTC) in zone ``tz``."""
+    if tz in UTC_NAMES:
+        return epoch
+    offset = datetime.datetime.fromtimestamp(epoch, ZoneInfo(tz)).utcoffset()
+    return epoch + int(offset.total_seconds())
+
+
+def parse_timestamp(value, tz='UTC'):
+    """Parse an ISO-8601 timestamp into int epoch seconds (UTC).
+
+    Accepts dates, ``T`` or space separators, optional seconds and fractions
+    (truncated), and ``Z`` or ``+HH:MM``/``+HHMM``/``+HH`` offsets. Timestamps
+    without an offset are wall-clock times in ``tz``.
+    """
+    # The C parser handles the common forms; anything it rejects goes through _parse_iso8601
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return _parse_iso8601(value, tz)
+    if parsed.tzinfo is not None:
+        return (parsed - _EPOCH_UTC) // _ONE_SECOND
+    return local_to_utc((parsed - _EPOCH) // _ONE_SECOND, tz or 'UTC')
+
+
+def _parse_iso8601(value, tz):
+    try:
+        length = len(value)
+        year = int(value[0:4])
+        month = int(value[5:7])
+        day = int(value[8:10])
+        hour = minute = second = 0
+        i = 10
+        if length > 10 and value[10] in 'T ':
+            hour = int(value[11:13])
+            minute = int(value[14:16])
+            i = 16
+            if length > 16 and value[16] == ':':
+                second = int(value[17:19])
+                i = 19
+            if length > i and value[i] in '.,':
+                i += 1
+                while i < length and value[i].isdigit():
+                    i += 1
+        if value[4] != '-' or value[7] != '-' or not (1 <= month <= 12 and 1 <= day <= 31
+                                                       and hour <= 24 and minute <= 59 and second <= 60):
+            raise ValueError
+        local = _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+
+        suffix = value[i:]
+        if not suffix:
+            return local_to_utc(local, tz or 'UTC')
+        if suffix in ('Z', 'z'):
+            return local
+        if suffix[0] not in '+-':
+            raise ValueError
+        digits = suffix[1:].replace(':', '')
+        if len(digits) not in (2, 4) or not digits.isdigit():
+            raise ValueError
+        offset = int(digits[:2]) * 3600 + int(digits[2:] or 0) * 60
+        return local + offset if suffix[0] == '-' else local - offset
+    except (ValueError, IndexError, TypeError):
+        raise ValueError(f"Invalid ISO-8601 timestamp: {value!r}") from None
+
+
+def format_timestamp(epoch):
+    """Format epoch seconds the way the scheduler stores them: ``%Y-%m-%dT%H:%M:%SZ``."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
+
+
+class EventRecord:
+    """A schedule entry parsed once at ingest: UTC epoch seconds plus its zone id.
+
+    ``source`` keeps the stored event dict so moved events can be written back.
+    """
+
+    __slots__ = ('start', 'end', 'tz', 'priority', 'fixed', 'source')
+
+    def __init__(self, start, end, tz='UTC', priority=1, fixed=False, source=None):
+        self.start = start
+        self.end = end
+        self.tz = tz
+        self.priority = priority
+        self.fixed = fixed
+        self.source = source
+
+    @classmethod
+    def from_event(cls, event):
+        tz = event.get('time_zone') or 'UTC'
+        return cls(
+            parse_timestamp(event['start_time'], tz),
+            parse_timestamp(event['end_time'], tz),
+            tz,
+            event.get('priority', 1),
+            bool(event.get('fixed', False)),
+            event,
+        )
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def overlaps(self, other):
+        return self.start < other.end and other.start < self.end
+
+    def __repr__(self):
+        title = self.source.get('title') if self.source else None
+        return f"EventRecord({title!r}, {format_timestamp(self.start)}, {format_timestamp(self.end)}, {self.tz})"
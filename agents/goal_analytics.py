@@ -0,0 +1,128 @@
+import os
+import time
+from agents.lazy_import import lazy_import
+
+# NumPy is only needed once analytics actually run
+np = lazy_import('numpy')
+
+SECONDS_PER_DAY = 86400.0
+
+
+def sanitize_field(value):
+    # Ledger rows are tab-separated, one per line
+    return str(value).replace('\t', ' ').replace('\n', ' ')
+
+
+def load_ledgers(goals_dir='data/goals', only=None):
+    """Read the goal and milestone ledgers into columnar arrays in one pass each.
+
+    Returns ``(goals, milestones)`` where ``goals`` has ``title``, ``created``,
+    ``target_milestones`` and ``target_date`` (NaN when unset) columns and
+    ``milestones`` has ``goal_index`` and ``timestamp`` columns. With
+    ``only``, a set of titles, just those goals and their milestones are kept.
+    """
+    titles, created, targets, target_dates = [], [], [], []
+    index = {}
+    goals_path = os.path.join(goals_dir, 'goals.tsv')
+    if os.path.exists(goals_path):
+        with open(goals_path, 'r') as f:
+            for line in f:
+                # Rows carry a trailing description column since bulk import/export
+                created_at, title, target, target_date = line.rstrip('\n').split('\t')[:4]
+                if only is not None and title not in only:
+                    continue
+                if title in index:
+                    # A re-entered goal replaces its earlier definition
+                    position = index[title]
+                    created[position] = float(created_at)
+                    targets[position] = int(target)
+                    target_dates[position] = float(target_date) if target_date else np.nan
+                    continue
+                index[title] = len(titles)
+                titles.append(title)
+                created.append(float(created_at))
+                targets.append(int(target))
+                target_dates.append(float(target_date) if target_date else np.nan)
+
+    goal_index, timestamps = [], []
+    milestones_path = os.path.join(goals_dir, 'milestones.tsv')
+    if os.path.exists(milestones_path):
+        with open(milestones_path, 'r') as f:
+            for line in f:
+                logged_at, title, _ = line.split('\t', 2)
+                if title in index:
+                    goal_index.append(index[title])
+                    timestamps.append(float(logged_at))
+
+    goals = {
+        'title': np.array(titles, dtype=object),
+        'created': np.array(created, dtype=np.float64),
+        'target_milestones': np.array(targets, dtype=np.int64),
+        'target_date': np.array(target_dates, dtype=np.float64),
+    }
+    milestones = {
+        'goal_index': np.array(goal_index, dtype=np.int64),
+        'timestamp': np.array(timestamps, dtype=np.float64),
+    }
+    return goals, milestones
+
+
+def milestone_counters(goals, milestones):
+    """Per-goal milestone count and latest milestone time (NaN when there is none)."""
+    n = len(goals['title'])
+    goal_index = milestones['goal_index']
+    count = np.bincount(goal_index, minlength=n)
+    last = np.full(n, -np.inf)
+    np.maximum.at(last, goal_index, milestones['timestamp'])
+    return count, np.where(count > 0, last, np.nan)
+
+
+def summarize_goals(goals, milestones=None, now=None, stale_days=14):
+    """Compute progress, velocity, projected completion and risk for every goal at once.
+
+    Velocity is milestones per day since the goal was created. A goal is at
+    risk when its projected completion falls after its target date or, for
+    goals without one, when no milestone has been logged for ``stale_days``.
+    Without ``milestones``, ``goals`` must carry precomputed
+    ``milestone_count`` and ``last_milestone`` columns.
+    """
+    now = time.time() if now is None else now
+    if milestones is None:
+        count, last = goals['milestone_count'], goals['last_milestone']
+    else:
+        count, last = milestone_counters(goals, milestones)
+
+    target = goals['target_milestones']
+    progress = np.minimum(count / np.maximum(target, 1), 1.0) * 100
+
+    elapsed_days = np.maximum((now - goals['created']) / SECONDS_PER_DAY, 1.0)
+    velocity = count / elapsed_days
+    remaining = np.maximum(target - count, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        projected = np.where(
+            remaining == 0,
+            np.where(count > 0, last, goals['created']),
+            np.where(velocity > 0, now + remaining / velocity * SECONDS_PER_DAY, np.inf),
+        )
+
+    has_target_date = ~np.isnan(goals['target_date'])
+    last_activity = np.where(count > 0, last, goals['created'])
+    stale = (now - last_activity) > stale_days * SECONDS_PER_DAY
+    at_risk = (remaining > 0) & np.where(has_target_date, projected > goals['target_date'], stale)
+
+    return {
+        'title': goals['title'],
+        'milestones': count,
+        'progress': progress,
+        'velocity_per_day': velocity,
+        'projected_completion': projected,
+        'at_risk': at_risk,
+    }
+
+
+def summary_records(summary):
+    """Row-wise view of a summary, for logging and reporting."""
+    return [
+        {key: summary[key][i].item() if hasattr(summary[key][i], 'item') else summary[key][i] for key in summary}
+        for i in range(len(summary['title']))
+    ]
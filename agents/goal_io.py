@@ -0,0 +1,228 @@
+"""Bulk import and export of goals and milestones.
+
+Records are flat so the same schema works row-wise (NDJSON) and columnar
+(Parquet, Arrow IPC):
+
+    {"type": "goal", "title", "description", "created", "target_milestones", "target_date"}
+    {"type": "milestone", "title", "milestone", "timestamp"}
+
+Times are epoch seconds; ISO-8601 strings are accepted on import. Exports
+stream from the goal and milestone ledgers, imports append to them in
+batches, so neither touches one file per record. Parquet and Arrow need
+``pyarrow``.
+"""
+import json
+import os
+import time
+from agents.event_record import parse_timestamp
+from agents.goal_analytics import sanitize_field
+from agents.lazy_import import lazy_import
+
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+COLUMNS = ('type', 'title', 'description', 'created', 'target_milestones', 'target_date', 'milestone', 'timestamp')
+FORMATS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+
+def detect_format(path, format=None):
+    if format:
+        if format not in set(FORMATS.values()):
+            raise ValueError(f"Unsupported format '{format}'.")
+        return format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot infer the format of '{path}'; pass format='ndjson', 'parquet' or 'arrow'.")
+    return FORMATS[extension]
+
+
+def _epoch(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return float(parse_timestamp(value))
+    return float(value)
+
+
+def _arrow_schema():
+    return pa.schema([
+        ('type', pa.string()),
+        ('title', pa.string()),
+        ('description', pa.string()),
+        ('created', pa.float64()),
+        ('target_milestones', pa.int64()),
+        ('target_date', pa.float64()),
+        ('milestone', pa.string()),
+        ('timestamp', pa.float64()),
+    ])
+
+
+def iter_ledger_records(goals_dir='data/goals'):
+    """Yield every goal, then every milestone, straight from the ledgers."""
+    goals_path = os.path.join(goals_dir, 'goals.tsv')
+    if os.path.exists(goals_path):
+        with open(goals_path, 'r') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                created, title, target, target_date = fields[:4]
+                yield {
+                    'type': 'goal',
+                    'title': title,
+                    'description': fields[4] if len(fields) > 4 else '',
+                    'created': float(created),
+                    'target_milestones': int(target),
+                    'target_date': float(target_date) if target_date else None,
+                }
+    milestones_path = os.path.join(goals_dir, 'milestones.tsv')
+    if os.path.exists(milestones_path):
+        with open(milestones_path, 'r') as f:
+            for line in f:
+                timestamp, title, milestone = line.rstrip('\n').split('\t', 2)
+                yield {'type': 'milestone', 'title': title, 'milestone': milestone, 'timestamp': float(timestamp)}
+
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_records(records, path, format=None, batch_size=10_000):
+    """Stream records to ``path``; returns the number written."""
+    format = detect_format(path, format)
+    written = 0
+    if format == 'ndjson':
+        with open(path, 'w') as f:
+            for batch in _batches(records, batch_size):
+                f.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch))
+                written += len(batch)
+        return written
+
+    schema = _arrow_schema()
+    with open(path, 'wb') as sink:
+        writer = pq.ParquetWriter(sink, schema) if format == 'parquet' else pa.ipc.new_file(sink, schema)
+        try:
+            for batch in _batches(records, batch_size):
+                columns = {name: [record.get(name) for record in batch] for name in COLUMNS}
+                table = pa.Table.from_pydict(columns, schema=schema)
+                # One row group / record batch per input batch
+                if format == 'parquet':
+                    writer.write_table(table)
+                else:
+                    writer.write_table(table, max_chunksize=batch_size)
+                written += len(batch)
+        finally:
+            writer.close()
+    return written
+
+
+def read_records(path, format=None, batch_size=10_000):
+    """Yield lists of records from ``path``, ``batch_size`` at a time."""
+    format = detect_format(path, format)
+    if format == 'ndjson':
+        with open(path, 'r') as f:
+            batch = []
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON ({e}).")
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        return
+
+    if format == 'parquet':
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+        return
+
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).to_pylist()
+
+
+def _record_key(record):
+    if record['type'] == 'goal':
+        return ('goal', record['title'], record['created'], record['target_milestones'], record['target_date'],
+                record['description'])
+    return ('milestone', record['title'], record['timestamp'], record['milestone'])
+
+
+def import_records(batches, goals_dir='data/goals', write_goal_files=True, now=None):
+    """Append goal and milestone records to the ledgers, one write per ledger per batch.
+
+    Records already in the ledgers are skipped, so importing an export again
+    changes nothing. With ``write_goal_files``, the per-goal text files read
+    by ``generate_progress_chart`` are kept in step as well, opened once per
+    goal per batch; existing ones are only appended to.
+    """
+    os.makedirs(goals_dir, exist_ok=True)
+    now = time.time() if now is None else now
+    counts = {'goals': 0, 'milestones': 0}
+    known = {_record_key(record) for record in iter_ledger_records(goals_dir)}
+    with open(os.path.join(goals_dir, 'goals.tsv'), 'a') as goals_ledger, \
+            open(os.path.join(goals_dir, 'milestones.tsv'), 'a') as milestones_ledger:
+        for batch in batches:
+            goal_rows, milestone_rows = [], []
+            goal_files, milestone_lines = {}, {}
+            for record in batch:
+                kind = record.get('type')
+                title = record.get('title')
+                if not title:
+                    raise ValueError(f"Record without a title: {record!r}")
+                if kind == 'goal':
+                    created = _epoch(record.get('created'))
+                    created = now if created is None else created
+                    target_date = _epoch(record.get('target_date'))
+                    description = record.get('description') or ''
+                    target = record.get('target_milestones')
+                    target = 10 if target is None else int(target)
+                    key = ('goal', sanitize_field(title), created, target, target_date, sanitize_field(description))
+                    if key in known:
+                        continue
+                    known.add(key)
+                    goal_rows.append(
+                        f"{created}\t{sanitize_field(title)}\t{target}\t"
+                        f"{target_date if target_date is not None else ''}\t{sanitize_field(description)}\n"
+                    )
+                    goal_files[title] = str({'title': title, 'description': description, 'milestones': []})
+                elif kind == 'milestone':
+                    milestone = record.get('milestone') or ''
+                    timestamp = _epoch(record.get('timestamp'))
+                    timestamp = now if timestamp is None else timestamp
+                    key = ('milestone', sanitize_field(title), timestamp, sanitize_field(milestone))
+                    if key in known:
+                        continue
+                    known.add(key)
+                    milestone_rows.append(f"{timestamp}\t{sanitize_field(title)}\t{sanitize_field(milestone)}\n")
+                    milestone_lines.setdefault(title, []).append(f"\nMilestone: {milestone}")
+                else:
+                    raise ValueError(f"Unknown record type {kind!r} for '{title}'.")
+
+            goals_ledger.write(''.join(goal_rows))
+            milestones_ledger.write(''.join(milestone_rows))
+            if write_goal_files:
+                for title, content in goal_files.items():
+                    # 'x' keeps the milestones of a goal file that already exists
+                    try:
+                        with open(os.path.join(goals_dir, f"{title}.txt"), 'x') as f:
+                            f.write(content)
+                    except FileExistsError:
+                        pass
+                for title, lines in milestone_lines.items():
+                    with open(os.path.join(goals_dir, f"{title}.txt"), 'a') as f:
+                        f.write(''.join(lines))
+            counts['goals'] += len(goal_rows)
+            counts['milestones'] += len(milestone_rows)
+    return counts
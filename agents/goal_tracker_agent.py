@@ -1,48 +1,145 @@
-from letta import create_client, EmbeddingConfig, LLMConfig
 from loguru import logger
 import os
-import matplotlib.pyplot as plt
+import time
+from agents.event_record import parse_timestamp
+from agents.instrumentation import instrument
+from agents.goal_analytics import load_ledgers, milestone_counters, sanitize_field, summarize_goals, summary_records
+from agents.goal_io import import_records, iter_ledger_records, read_records, write_records
+from agents.lazy_import import lazy_import
+from agents.state_store import DEFAULT_TARGET_MILESTONES
+
+# Heavy dependencies load on first use so importing and constructing the agent stays cheap
+letta = lazy_import('letta')
+plt = lazy_import('matplotlib.pyplot')
 
 class GoalTrackerAgent:
-    def __init__(self):
+    AGENT_NAME = "GoalTrackerAgent"
+
+    def __init__(self, client=None, state=None):
         try:
-            self.client = create_client()
-            self.client.set_default_embedding_config(
-                EmbeddingConfig.default_config(model_name="text-embedding-ada-002")
-            )
-            self.client.set_default_llm_config(
-                LLMConfig.default_config(model_name="gpt-4")
-            )
-            self.agent_state = self.client.create_agent(
-                name="GoalTrackerAgent",
-                include_base_tools=True
-            )
+            self._client = client
+            self._client_configured = False
+            self._agent_state = None
+            # Snapshot-backed goal counters (agents.state_store); without one summaries rescan the ledgers
+            self.state = state
             os.makedirs('data/goals/', exist_ok=True)
             logger.info("GoalTrackerAgent initialized successfully.")
         except Exception as e:
             logger.exception("Failed to initialize GoalTrackerAgent.")
             raise e
 
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = letta.create_client()
+        if not self._client_configured:
+            self._client.set_default_embedding_config(
+                letta.EmbeddingConfig.default_config(model_name="text-embedding-ada-002")
+            )
+            self._client.set_default_llm_config(
+                letta.LLMConfig.default_config(model_name="gpt-4")
+            )
+            self._client_configured = True
+        return self._client
+
+    @property
+    def agent_state(self):
+        # Reuse the agent from earlier runs instead of creating a new one each time
+        if self._agent_state is None:
+            agent_id = self.client.get_agent_id(self.AGENT_NAME)
+            if agent_id:
+                self._agent_state = self.client.get_agent(agent_id)
+            else:
+                self._agent_state = self.client.create_agent(
+                    name=self.AGENT_NAME,
+                    include_base_tools=True
+                )
+        return self._agent_state
+
+    def _goal_state(self):
+        # Seeded from a ledger scan, and rescanned once stale to pick up other writers
+        if self.state.stale('goals'):
+            self._reseed_goal_state()
+        return self.state
+
+    def _reseed_goal_state(self):
+        goals, milestones = load_ledgers('data/goals')
+        count, last = milestone_counters(goals, milestones)
+        self.state.replace_goals(dict(goals, milestone_count=count, last_milestone=last))
+
+    @instrument('goals.input_goal')
     def input_goal(self, goal_details):
         try:
+            # Seed before the ledger write so the new row is not counted twice
+            state = self._goal_state() if self.state else None
             goal_file = f"data/goals/{goal_details['title']}.txt"
             with open(goal_file, 'w') as f:
                 f.write(str(goal_details))
+
+            # Ledger rows feed the columnar analytics in goal_summary
+            created = time.time()
+            target = goal_details.get('target_milestones', 10)
+            target_date = goal_details.get('target_date')
+            target_date = parse_timestamp(target_date) if target_date else None
+            with open('data/goals/goals.tsv', 'a') as f:
+                f.write(
+                    f"{created}\t{sanitize_field(goal_details['title'])}\t{target}\t"
+                    f"{target_date if target_date is not None else ''}\t"
+                    f"{sanitize_field(goal_details.get('description', ''))}\n"
+                )
+            if state:
+                state.put_goal(sanitize_field(goal_details['title']), created, target, target_date)
             logger.info(f"Goal '{goal_details['title']}' saved.")
         except Exception as e:
             logger.exception("Error in input_goal.")
             raise e
 
+    @instrument('goals.log_milestone')
     def log_milestone(self, goal_title, milestone):
         try:
+            state = self._goal_state() if self.state else None
             goal_file = f"data/goals/{goal_title}.txt"
             with open(goal_file, 'a') as f:
                 f.write(f"\nMilestone: {milestone}")
+            timestamp = time.time()
+            with open('data/goals/milestones.tsv', 'a') as f:
+                f.write(f"{timestamp}\t{sanitize_field(goal_title)}\t{sanitize_field(milestone)}\n")
+            if state:
+                state.add_milestone(sanitize_field(goal_title), timestamp)
             logger.info(f"Milestone '{milestone}' added to goal '{goal_title}'.")
         except Exception as e:
             logger.exception("Error in log_milestone.")
             raise e
 
+    @instrument('goals.import_goals')
+    def import_goals(self, path, format=None, batch_size=10_000, write_goal_files=True):
+        """Bulk-load goals and milestones from NDJSON, Parquet or Arrow (format from the extension)."""
+        try:
+            counts = import_records(
+                read_records(path, format=format, batch_size=batch_size),
+                goals_dir='data/goals', write_goal_files=write_goal_files,
+            )
+            if self.state:
+                # One bulk reseed instead of a log record per imported row
+                self._reseed_goal_state()
+            logger.info(f"Imported {counts['goals']} goals and {counts['milestones']} milestones from '{path}'.")
+            return counts
+        except Exception as e:
+            logger.exception("Error in import_goals.")
+            raise e
+
+    @instrument('goals.export_goals')
+    def export_goals(self, path, format=None, batch_size=10_000):
+        """Stream every goal and milestone to NDJSON, Parquet or Arrow; returns the record count."""
+        try:
+            written = write_records(iter_ledger_records('data/goals'), path, format=format, batch_size=batch_size)
+            logger.info(f"Exported {written} goal and milestone records to '{path}'.")
+            return written
+        except Exception as e:
+            logger.exception("Error in export_goals.")
+            raise e
+
+    @instrument('goals.generate_progress_chart')
     def generate_progress_chart(self, goal_title):
         try:
             goal_file = f"data/goals/{goal_title}.txt"
@@ -64,17 +161,63 @@ class GoalTrackerAgent:
             logger.exception("Error in generate_progress_chart.")
             raise e
 
-    def send_motivational_reminder(self, goal_title):
+    @instrument('goals.goal_summary')
+    def goal_summary(self, now=None, stale_days=14):
         try:
-            goal_file = f"data/goals/{goal_title}.txt"
-            with open(goal_file, 'r') as f:
-                lines = f.readlines()
+            if self.state:
+                goals = self._goal_state().goal_columns()
+                summary = summarize_goals(goals, now=now, stale_days=stale_days)
+            else:
+                goals, milestones = load_ledgers('data/goals')
+                summary = summarize_goals(goals, milestones, now=now, stale_days=stale_days)
+            logger.info(f"Goal summary computed for {len(goals['title'])} goals.")
+            return summary
+        except Exception as e:
+            logger.exception("Error in goal_summary.")
+            raise e
 
-            total_milestones = len([line for line in lines if line.startswith('Milestone')])
-            progress = (total_milestones / 10) * 100
+    @instrument('goals.send_motivational_reminder')
+    def send_motivational_reminder(self, goal_title):
+        try:
+            # One goal's counters, without summarizing every goal
+            title = sanitize_field(goal_title)
+            if self.state:
+                summary = summarize_goals(self._goal_state().goal_columns([title]))
+            else:
+                summary = summarize_goals(*load_ledgers('data/goals', only={title}))
+            if len(summary['title']):
+                progress = summary['progress'][0]
+            else:
+                progress = self._goal_file_progress(goal_title)
 
             message = f"You're {progress}% closer to achieving '{goal_title}'!"
             logger.info(f"Motivational reminder sent: {message}")
         except Exception as e:
             logger.exception("Error in send_motivational_reminder.")
-            raise e
\ No newline at end of file
+            raise e
+
+    def _goal_file_progress(self, goal_title):
+        # Goals saved before the ledgers existed, or milestones logged without input_goal, only have the goal file
+        goal_file = f"data/goals/{goal_title}.txt"
+        if not os.path.exists(goal_file):
+            raise ValueError(f"Goal '{goal_title}' not found.")
+        with open(goal_file, 'r') as f:
+            total_milestones = len([line for line in f if line.startswith('Milestone')])
+        return min(total_milestones / DEFAULT_TARGET_MILESTONES, 1.0) * 100
+
+    @instrument('goals.send_due_reminders')
+    def send_due_reminders(self, now=None, stale_days=14):
+        """Nudge only the goals that are at risk of missing their target."""
+        try:
+            summary = self.goal_summary(now=now, stale_days=stale_days)
+            at_risk = [record for record in summary_records(summary) if record['at_risk']]
+            for record in at_risk:
+                message = (
+                    f"'{record['title']}' needs attention: {record['progress']:.0f}% done at "
+                    f"{record['velocity_per_day']:.2f} milestones/day."
+                )
+                logger.info(f"Motivational reminder sent: {message}")
+            return [record['title'] for record in at_risk]
+        except Exception as e:
+            logger.exception("Error in send_due_reminders.")
+            raise e
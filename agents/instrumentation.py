@@ -0,0 +1,243 @@
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds, Prometheus-style upper bounds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = os.getenv('AGENT_METRICS', '').lower() in ('1', 'true', 'yes')
+_tracer = None
+_current_operation = contextvars.ContextVar('agent_operation', default=None)
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    """Per-operation latency histograms plus labelled counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, labels, seconds):
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """Plain-dict view with call counts and p50/p99 per histogram."""
+        with self._lock:
+            return {
+                'latency': {
+                    _series(name, labels): {
+                        'count': histogram.count,
+                        'sum_s': histogram.total,
+                        'p50_s': histogram.quantile(0.5),
+                        'p99_s': histogram.quantile(0.99),
+                    }
+                    for (name, labels), histogram in self.histograms.items()
+                },
+                'counters': {_series(name, labels): value for (name, labels), value in self.counters.items()},
+            }
+
+    def render_prometheus(self):
+        """Render everything in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histogram_names = sorted({name for name, _ in self.histograms})
+            for name in histogram_names:
+                lines.append(f"# TYPE {name} histogram")
+                for (series_name, labels), histogram in sorted(self.histograms.items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.total}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+            counter_names = sorted({name for name, _ in self.counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {name} counter")
+                for (series_name, labels), value in sorted(self.counters.items()):
+                    if series_name == name:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the exposition atomically, e.g. for node_exporter's textfile collector."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name, labels):
+    return name + _labels(labels)
+
+
+registry = MetricsRegistry()
+
+
+def enable(opentelemetry=False):
+    """Start recording; with ``opentelemetry=True`` also emit OpenTelemetry spans."""
+    global _enabled, _tracer
+    _enabled = True
+    if opentelemetry:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer('agents')
+
+
+def disable():
+    global _enabled, _tracer
+    _enabled = False
+    _tracer = None
+
+
+def is_enabled():
+    return _enabled
+
+
+@contextlib.contextmanager
+def _operation_span(operation):
+    token = _current_operation.set(operation)
+    otel_span = _tracer.start_as_current_span(operation) if _tracer else _NULL_CONTEXT
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        with otel_span:
+            yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        registry.observe('agent_operation_seconds', (('operation', operation),), time.perf_counter() - start)
+        registry.increment('agent_operations_total', (('operation', operation), ('status', status)))
+        _current_operation.reset(token)
+
+
+def span(operation):
+    """Time a block as ``operation``; a shared no-op context when disabled."""
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _operation_span(operation)
+
+
+def instrument(operation):
+    """Decorator form of ``span``; costs one flag check per call when disabled."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _operation_span(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def _external_span(system):
+    operation = _current_operation.get() or 'none'
+    labels = (('operation', operation), ('system', system))
+    otel_span = _tracer.start_as_current_span(f"{system} call") if _tracer else _NULL_CONTEXT
+    start = time.perf_counter()
+    try:
+        with otel_span:
+            yield
+    finally:
+        registry.observe('agent_external_call_seconds', labels, time.perf_counter() - start)
+        registry.increment('agent_external_calls_total', labels)
+
+
+def external_call(system):
+    """Count and time a call to ``system`` (chroma, llm, google, langmem, ...),
+    attributed to the enclosing operation."""
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _external_span(system)
+
+
+def record_llm_usage(response):
+    """Count tokens reported on a LangChain chat response, if any."""
+    if not _enabled:
+        return
+    usage = getattr(response, 'usage_metadata', None) or {}
+    if not usage:
+        metadata = getattr(response, 'response_metadata', None) or {}
+        usage = metadata.get('token_usage') or {}
+    tokens = usage.get('total_tokens')
+    if isinstance(tokens, int):
+        operation = _current_operation.get() or 'none'
+        registry.increment('agent_llm_tokens_total', (('operation', operation),), tokens)
+
+
+def record_cache(cache, hit):
+    if not _enabled:
+        return
+    registry.increment('agent_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+def record_notifications(channel, delivered, failed):
+    if not _enabled:
+        return
+    if delivered:
+        registry.increment('agent_notifications_total', (('channel', channel), ('status', 'delivered')), delivered)
+    if failed:
+        registry.increment('agent_notifications_total', (('channel', channel), ('status', 'failed')), failed)
@@ -1,13 +1,17 @@
 import os
 import sqlite3
-from chromadb import PersistentClient
-from langchain_openai import ChatOpenAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from loguru import logger
+from agents.instrumentation import external_call, instrument, record_llm_usage
+from agents.lazy_import import lazy_import
+
+# Heavy clients load on first use so importing and constructing the agent stays cheap
+chromadb = lazy_import('chromadb')
+langchain_openai = lazy_import('langchain_openai')
+langchain_text_splitter = lazy_import('langchain.text_splitter')
 
 
 class KnowledgeRetrievalAgent:
-    def __init__(self, db_path="data/documents"):
+    def __init__(self, db_path="data/documents", chroma_client=None, llm=None):
         try:
             
             self.db_path = db_path
@@ -18,24 +22,40 @@ class KnowledgeRetrievalAgent:
                 raise PermissionError(f"Database directory '{self.db_path}' is not writable.")
 
             
-            self.chroma_client = PersistentClient(path=self.db_path)
+            self._chroma_client = chroma_client
 
             
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if not openai_api_key:
+            self._llm = llm
+            if not llm and not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OPENAI_API_KEY environment variable is not set.")
 
             
-            self.llm = ChatOpenAI(model_name="gpt-4", temperature=0.7)
-
-            
-            self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=500)
+            self._text_splitter = None
 
             logger.info("KnowledgeRetrievalAgent initialized successfully.")
         except Exception as e:
             logger.exception("Failed to initialize KnowledgeRetrievalAgent.")
             raise e
 
+    @property
+    def chroma_client(self):
+        if self._chroma_client is None:
+            self._chroma_client = chromadb.PersistentClient(path=self.db_path)
+        return self._chroma_client
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = langchain_openai.ChatOpenAI(model_name="gpt-4", temperature=0.7)
+        return self._llm
+
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            self._text_splitter = langchain_text_splitter.RecursiveCharacterTextSplitter(chunk_size=500)
+        return self._text_splitter
+
+    @instrument('knowledge.store_document')
     def store_document(self, doc_title, content):
         try:
             
@@ -45,11 +65,12 @@ class KnowledgeRetrievalAgent:
             collection = self.chroma_client.get_or_create_collection(name="documents")
 
             
-            collection.add(
-                documents=chunks,
-                metadatas=[{"title": doc_title} for _ in chunks],
-                ids=[f"{doc_title}_{i}" for i in range(len(chunks))],
-            )
+            with external_call('chroma'):
+                collection.add(
+                    documents=chunks,
+                    metadatas=[{"title": doc_title} for _ in chunks],
+                    ids=[f"{doc_title}_{i}" for i in range(len(chunks))],
+                )
             logger.info(f"Document '{doc_title}' stored with {len(chunks)} chunks.")
         except sqlite3.OperationalError as e:
             logger.error("SQLite database error: Ensure the database is writable.")
@@ -60,10 +81,12 @@ class KnowledgeRetrievalAgent:
             logger.exception("Error in store_document.")
             raise e
 
+    @instrument('knowledge.retrieve_relevant_sections')
     def retrieve_relevant_sections(self, query):
         try:
             collection = self.chroma_client.get_collection(name="documents")
-            results = collection.query(query_texts=[query], n_results=3)
+            with external_call('chroma'):
+                results = collection.query(query_texts=[query], n_results=3)
             relevant_texts = results.get("documents", [])
             logger.info(f"Retrieved {len(relevant_texts)} relevant sections for query '{query}'.")
             return relevant_texts
@@ -71,10 +94,12 @@ class KnowledgeRetrievalAgent:
             logger.exception("Error in retrieve_relevant_sections.")
             raise e
 
+    @instrument('knowledge.generate_summary')
     def generate_summary(self, doc_title):
         try:
             collection = self.chroma_client.get_collection(name="documents")
-            results = collection.query(query_texts=[doc_title], n_results=10)
+            with external_call('chroma'):
+                results = collection.query(query_texts=[doc_title], n_results=10)
 
         
             content_chunks = results.get("documents", [])
@@ -84,9 +109,11 @@ class KnowledgeRetrievalAgent:
             content = " ".join(flattened_chunks)
 
         
-            response = self.llm.invoke(f"Summarize the following: {content}")
+            with external_call('llm'):
+                response = self.llm.invoke(f"Summarize the following: {content}")
 
         
+            record_llm_usage(response)
             summary = response.content if hasattr(response, 'content') else str(response)
         
             logger.info(f"Summary generated for document '{doc_title}'.")
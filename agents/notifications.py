@@ -0,0 +1,302 @@
+"""Concurrent notification fan-out to pluggable channels.
+
+``NotificationDispatcher.dispatch`` splits a batch of notifications into
+chunks and sends every chunk to every channel on a bounded thread pool. SMTP
+and webhook channels keep a small pool of persistent connections; the pool
+size also caps how many chunks a channel works on at once.
+"""
+import abc
+import contextlib
+import json
+import os
+import queue
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.message import EmailMessage
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlsplit
+from loguru import logger
+from agents.instrumentation import record_notifications
+
+
+class Notification:
+    __slots__ = ('recipient', 'subject', 'body', 'metadata')
+
+    def __init__(self, subject, body, recipient=None, metadata=None):
+        self.subject = subject
+        self.body = body
+        self.recipient = recipient
+        self.metadata = metadata or {}
+
+    def to_dict(self):
+        return {'subject': self.subject, 'body': self.body, 'recipient': self.recipient, 'metadata': self.metadata}
+
+    def __repr__(self):
+        return f"Notification({self.subject!r}, recipient={self.recipient!r})"
+
+
+class ConnectionPool:
+    """At most ``size`` connections, reused LIFO; a connection that raises is closed, not returned."""
+
+    def __init__(self, factory, size=4, close=None):
+        self._factory = factory
+        self._close = close or (lambda connection: connection.close())
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.size = size
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._factory()
+            try:
+                yield connection
+            except BaseException:
+                self._discard(connection)
+                raise
+            self._idle.put(connection)
+
+    def _discard(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class Channel(abc.ABC):
+    """A destination for notifications.
+
+    ``send_many`` delivers a chunk and returns ``[(notification, error)]``
+    for the ones that failed.
+    """
+
+    name = 'channel'
+
+    @abc.abstractmethod
+    def send_many(self, notifications):
+        """Deliver ``notifications``; returns ``[(notification, error)]`` for the failures."""
+
+    def close(self):
+        pass
+
+
+class LogChannel(Channel):
+    name = 'log'
+
+    def send_many(self, notifications):
+        for notification in notifications:
+            logger.info(f"Notification sent: {notification.body}")
+        return []
+
+
+class PooledChannel(Channel):
+    """Sends chunks over pooled connections.
+
+    Errors in ``connection_errors`` drop the connection and the rest of the
+    chunk is retried once on a fresh one (a server may close idle keep-alive
+    connections); any other error fails just that notification.
+    """
+
+    connection_errors = (ConnectionError, socket.timeout, HTTPException)
+
+    def __init__(self, pool_size=4):
+        self.pool = ConnectionPool(self._connect, pool_size, self._disconnect)
+
+    @abc.abstractmethod
+    def _connect(self):
+        """Open a new connection for the pool."""
+
+    def _disconnect(self, connection):
+        connection.close()
+
+    @abc.abstractmethod
+    def _send(self, connection, notification):
+        """Deliver one notification over ``connection``, raising on failure."""
+
+    def send_many(self, notifications):
+        failures = []
+        position = 0
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as connection:
+                    while position < len(notifications):
+                        notification = notifications[position]
+                        try:
+                            self._send(connection, notification)
+                        except self.connection_errors:
+                            raise
+                        except Exception as e:
+                            failures.append((notification, e))
+                        position += 1
+                return failures
+            except self.connection_errors as e:
+                if attempt:
+                    failures.extend((notification, e) for notification in notifications[position:])
+                else:
+                    logger.warning(f"{self.name} connection failed, retrying on a new one: {e!r}")
+        return failures
+
+    def close(self):
+        self.pool.close()
+
+
+class SMTPChannel(PooledChannel):
+    name = 'email'
+    connection_errors = PooledChannel.connection_errors + (smtplib.SMTPServerDisconnected,)
+
+    def __init__(self, host='localhost', port=25, sender='agents@localhost', default_recipient=None,
+                 pool_size=4, timeout=10.0, username=None, password=None, starttls=False):
+        super().__init__(pool_size)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.default_recipient = default_recipient
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def _disconnect(self, smtp):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def _send(self, smtp, notification):
+        recipient = notification.recipient or self.default_recipient
+        if not recipient:
+            raise ValueError(f"No recipient for {notification!r}.")
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = recipient
+        message['Subject'] = notification.subject
+        message.set_content(notification.body)
+        smtp.send_message(message)
+
+
+class WebhookError(RuntimeError):
+    pass
+
+
+class WebhookChannel(PooledChannel):
+    """POSTs each notification as JSON to ``url`` over keep-alive connections."""
+
+    name = 'webhook'
+
+    def __init__(self, url, pool_size=8, timeout=10.0, headers=None):
+        super().__init__(pool_size)
+        parts = urlsplit(url)
+        self.url = url
+        self.secure = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        self.timeout = timeout
+        self.headers = dict({'Content-Type': 'application/json'}, **(headers or {}))
+
+    def _connect(self):
+        connection_class = HTTPSConnection if self.secure else HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _send(self, connection, notification):
+        body = json.dumps(notification.to_dict(), default=str).encode('utf-8')
+        connection.request('POST', self.path, body=body, headers=self.headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 300:
+            raise WebhookError(f"{self.url} answered {response.status} {response.reason}")
+
+
+class NotificationDispatcher:
+    """Fans notifications out to every channel concurrently, ``chunk_size`` per task."""
+
+    def __init__(self, channels, max_workers=32, chunk_size=50):
+        self.channels = list(channels)
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='notify')
+
+    def dispatch(self, notifications):
+        """Deliver and return ``{'notifications', 'delivered', 'failed', 'seconds', 'delivered_per_second'}``.
+
+        ``delivered`` and ``failed`` count channel deliveries, so one
+        notification sent to two channels counts twice.
+        """
+        notifications = list(notifications)
+        start = time.perf_counter()
+        futures = {}
+        for channel in self.channels:
+            for offset in range(0, len(notifications), self.chunk_size):
+                chunk = notifications[offset:offset + self.chunk_size]
+                futures[self._executor.submit(channel.send_many, chunk)] = (channel, chunk)
+
+        delivered = failed = 0
+        for future in as_completed(futures):
+            channel, chunk = futures[future]
+            try:
+                failures = future.result()
+            except Exception as e:
+                failures = [(notification, e) for notification in chunk]
+            for notification, error in failures:
+                logger.warning(f"Notification {notification!r} via {channel.name} failed: {error!r}")
+            record_notifications(channel.name, len(chunk) - len(failures), len(failures))
+            delivered += len(chunk) - len(failures)
+            failed += len(failures)
+
+        seconds = time.perf_counter() - start
+        stats = {
+            'notifications': len(notifications),
+            'delivered': delivered,
+            'failed': failed,
+            'seconds': seconds,
+            'delivered_per_second': delivered / seconds if seconds else None,
+        }
+        if notifications:
+            logger.info(
+                f"Dispatched {len(notifications)} notifications: {delivered} delivered, {failed} failed, "
+                f"{stats['delivered_per_second']:.0f}/s."
+            )
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for channel in self.channels:
+            channel.close()
+
+
+def dispatcher_from_env():
+    """Build a dispatcher from NOTIFY_SMTP_HOST/NOTIFY_SMTP_PORT/NOTIFY_EMAIL_FROM/NOTIFY_EMAIL_TO
+    and NOTIFY_WEBHOOK_URL; None when neither channel is configured."""
+    channels = []
+    if os.getenv('NOTIFY_SMTP_HOST'):
+        channels.append(SMTPChannel(
+            host=os.getenv('NOTIFY_SMTP_HOST'),
+            port=int(os.getenv('NOTIFY_SMTP_PORT', '25')),
+            sender=os.getenv('NOTIFY_EMAIL_FROM', 'agents@localhost'),
+            default_recipient=os.getenv('NOTIFY_EMAIL_TO'),
+        ))
+    if os.getenv('NOTIFY_WEBHOOK_URL'):
+        channels.append(WebhookChannel(os.getenv('NOTIFY_WEBHOOK_URL')))
+    if not channels:
+        return None
+    return NotificationDispatcher(channels)
@@ -0,0 +1,299 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from loguru import logger
+from agents.instrumentation import span
+
+
+class Outbox:
+    """Durable local write-ahead outbox.
+
+    Writes are committed to a local SQLite file on the caller's thread and
+    drained to the external systems (Chroma, LangMem, Google) by a background
+    worker, in batches, with retries and idempotency keys.
+    """
+
+    PENDING = 'pending'
+    DONE = 'done'
+    DEAD = 'dead'
+
+    def __init__(self, db_path='data/outbox/outbox.db', batch_size=50, max_attempts=8,
+                 backoff_seconds=1.0, poll_interval=0.5):
+        try:
+            db_dir = os.path.dirname(db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            self.db_path = db_path
+            self.batch_size = batch_size
+            self.max_attempts = max_attempts
+            self.backoff_seconds = backoff_seconds
+            self.poll_interval = poll_interval
+
+            self._handlers = {}
+            self._guards = {}
+            self._lock = threading.Lock()
+            self._wakeup = threading.Event()
+            self._stopping = threading.Event()
+            self._worker = None
+
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    target TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, target, next_attempt_at)"
+            )
+            logger.info(f"Outbox initialized at '{db_path}'.")
+        except Exception as e:
+            logger.exception("Failed to initialize Outbox.")
+            raise e
+
+    @staticmethod
+    def make_key(target, payload):
+        body = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha1(f"{target}:{body}".encode('utf-8')).hexdigest()
+
+    def register_handler(self, target, handler):
+        """Register the callable that applies one payload to ``target``.
+
+        The handler must raise on failure so the entry is retried; it receives
+        the payload and its idempotency key.
+        """
+        self._handlers[target] = (handler, False)
+
+    def register_batch_handler(self, target, handler):
+        """Register a callable that applies a whole batch to ``target`` in one call.
+
+        It receives ``(payload, idempotency_key, created_at)`` tuples and returns
+        one exception, or None, per entry; raising fails the whole batch.
+        """
+        self._handlers[target] = (handler, True)
+
+    def guard(self, prefix, lock):
+        """Run the handlers of targets named ``<prefix>.<name>`` only while holding ``lock``.
+
+        For handlers bound to an agent that is not thread-safe and is also used
+        by other threads under that lock.
+        """
+        self._guards[prefix] = lock
+
+    def enqueue(self, target, payload, idempotency_key=None):
+        return self.enqueue_many([(target, payload, idempotency_key)])[0]
+
+    def enqueue_many(self, entries):
+        """Commit several writes atomically; returns their idempotency keys.
+
+        Entries whose key is already known are ignored, so replaying the same
+        write is harmless.
+        """
+        now = time.time()
+        rows = []
+        keys = []
+        for target, payload, key in entries:
+            key = key or self.make_key(target, payload)
+            keys.append(key)
+            rows.append((key, target, json.dumps(payload, default=str), self.PENDING, now, now))
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO outbox "
+                        "(idempotency_key, target, payload, status, next_attempt_at, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.exception("Error in enqueue_many.")
+            raise e
+        self._wakeup.set()
+        return keys
+
+    def pending_count(self, target=None):
+        query = "SELECT COUNT(*) FROM outbox WHERE status = ?"
+        params = [self.PENDING]
+        if target:
+            query += " AND target = ?"
+            params.append(target)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def pending_targets(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT target FROM outbox WHERE status = ?", (self.PENDING,)).fetchall()
+        return [target for target, in rows]
+
+    def dead_letters(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idempotency_key, target, payload, attempts, last_error FROM outbox WHERE status = ?",
+                (self.DEAD,),
+            ).fetchall()
+        return [
+            {'idempotency_key': key, 'target': target, 'payload': json.loads(payload),
+             'attempts': attempts, 'last_error': error}
+            for key, target, payload, attempts, error in rows
+        ]
+
+    def drain_once(self):
+        """Deliver one batch per registered target; returns the number delivered."""
+        delivered = 0
+        for target, (handler, batched) in list(self._handlers.items()):
+            now = time.time()
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT id, idempotency_key, payload, attempts, created_at FROM outbox "
+                    "WHERE status = ? AND target = ? AND next_attempt_at <= ? "
+                    "ORDER BY id LIMIT ?",
+                    (self.PENDING, target, now, self.batch_size),
+                ).fetchall()
+            if not batch:
+                continue
+
+            entries = [(json.loads(payload), key, created_at) for _, key, payload, _, created_at in batch]
+            guard = self._guards.get(target.split('.', 1)[0]) or contextlib.nullcontext()
+            if batched:
+                try:
+                    with guard, span(f"outbox.{target}"):
+                        errors = list(handler(entries))
+                    if len(errors) != len(entries):
+                        raise ValueError(f"Batch handler returned {len(errors)} results for {len(entries)} entries.")
+                except Exception as e:
+                    errors = [e] * len(entries)
+            else:
+                errors = []
+                for payload, key, _ in entries:
+                    try:
+                        with guard, span(f"outbox.{target}"):
+                            handler(payload, key)
+                        errors.append(None)
+                    except Exception as e:
+                        errors.append(e)
+
+            done = []
+            failed = []
+            for (row_id, _, _, attempts, _), e in zip(batch, errors):
+                if e is None:
+                    done.append((self.DONE, row_id))
+                else:
+                    attempts += 1
+                    status = self.DEAD if attempts >= self.max_attempts else self.PENDING
+                    retry_at = now + self.backoff_seconds * (2 ** (attempts - 1))
+                    failed.append((status, attempts, retry_at, repr(e), row_id))
+                    logger.warning(f"Outbox delivery to '{target}' failed (attempt {attempts}): {e}")
+
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("UPDATE outbox SET status = ? WHERE id = ?", done)
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    failed,
+                )
+                self._conn.execute("COMMIT")
+            delivered += len(done)
+            if done:
+                logger.info(f"Outbox delivered {len(done)} entries to '{target}'.")
+        return delivered
+
+    def flush(self, timeout=30.0):
+        """Deliver every pending entry synchronously, waiting out retry backoff.
+
+        Returns True once nothing is pending for a registered target and no
+        entry became a dead letter meanwhile; False on timeout or dead letters.
+        """
+        deadline = time.time() + timeout
+        dead = self._count(self.DEAD)
+        targets = list(self._handlers)
+        placeholders = ', '.join('?' * len(targets))
+        while True:
+            self.drain_once()
+            with self._lock:
+                pending, next_attempt_at = self._conn.execute(
+                    "SELECT COUNT(*), MIN(next_attempt_at) FROM outbox "
+                    f"WHERE status = ? AND target IN ({placeholders})",
+                    [self.PENDING, *targets],
+                ).fetchone()
+            if not pending:
+                return self._count(self.DEAD) == dead
+            now = time.time()
+            if now >= deadline:
+                return False
+            if next_attempt_at > now:
+                time.sleep(min(next_attempt_at, deadline) - now)
+
+    def _count(self, status):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (status,)).fetchone()[0]
+
+    def purge_delivered(self, older_than_seconds=7 * 24 * 3600):
+        """Forget delivered entries (and their idempotency keys) past the retention window."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status = ? AND created_at < ?",
+                (self.DONE, time.time() - older_than_seconds),
+            )
+        return cursor.rowcount
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name='outbox-worker', daemon=True)
+        self._worker.start()
+        logger.info("Outbox worker started.")
+
+    def stop(self, flush=True, timeout=30.0):
+        """Stop the worker; with ``flush``, returns whether every pending entry was delivered, as ``flush``."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout)
+            self._worker = None
+        flushed = None
+        if flush:
+            flushed = self.flush(timeout)
+            if not flushed:
+                logger.warning(
+                    f"Outbox stopped with {self.pending_count()} entries pending and "
+                    f"{self._count(self.DEAD)} dead letters."
+                )
+        logger.info("Outbox worker stopped.")
+        return flushed
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = self.drain_once()
+            except Exception:
+                logger.exception("Error in outbox worker.")
+                delivered = 0
+            if not delivered:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
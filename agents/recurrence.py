@@ -0,0 +1,137 @@
+import calendar
+import time
+
+SECONDS_PER_DAY = 86400
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+class RecurrenceRule:
+    """The subset of RFC 5545 RRULE used by calendar events.
+
+    Supports FREQ=DAILY/WEEKLY/MONTHLY with INTERVAL, COUNT, UNTIL and, for
+    weekly rules, BYDAY. ``until_utc`` tells whether UNTIL was given in UTC
+    (``...Z``) rather than as a wall-clock date.
+    """
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None, until_utc=False):
+        if freq not in ('DAILY', 'WEEKLY', 'MONTHLY'):
+            raise ValueError(f"Unsupported recurrence frequency: {freq}")
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = byday
+        self.until_utc = until_utc
+
+    @classmethod
+    def parse(cls, rule):
+        """Parse ``'RRULE:FREQ=WEEKLY;BYDAY=MO,WE'``; Google's list form is accepted too."""
+        if isinstance(rule, (list, tuple)):
+            rule = next(r for r in rule if r.startswith('RRULE:'))
+        if rule.startswith('RRULE:'):
+            rule = rule[len('RRULE:'):]
+        parts = dict(part.split('=', 1) for part in rule.split(';') if part)
+        until = parts.get('UNTIL')
+        until_utc = bool(until) and until.endswith('Z')
+        if until:
+            until_format = '%Y%m%dT%H%M%SZ' if 'T' in until else '%Y%m%d'
+            until = calendar.timegm(time.strptime(until, until_format))
+        byday = parts.get('BYDAY')
+        if byday:
+            byday = sorted(WEEKDAYS.index(day) for day in byday.split(','))
+        return cls(
+            freq=parts['FREQ'],
+            interval=int(parts.get('INTERVAL', 1)),
+            count=int(parts['COUNT']) if 'COUNT' in parts else None,
+            until=until,
+            byday=byday,
+            until_utc=until_utc,
+        )
+
+
+def occurrences(dtstart, duration, rule, window_start, window_end, exdates=(), overrides=None):
+    """Lazily yield ``(start, end, override)`` for occurrences overlapping the window.
+
+    Times are epoch seconds. Generation jumps straight to the window, so the
+    cost depends on the window size, not on how long the series has run.
+    ``exdates`` holds cancelled occurrence starts; ``overrides`` maps an
+    occurrence start to ``(start, end, fields)`` for a rescheduled instance.
+    """
+    overrides = overrides or {}
+    exdates = set(exdates)
+    if rule.freq == 'MONTHLY':
+        series = _monthly(dtstart, rule, window_start - duration)
+    else:
+        series = _periodic(dtstart, rule, window_start - duration)
+
+    for start in series:
+        if start >= window_end:
+            break
+        if start + duration <= window_start or start in exdates or start in overrides:
+            continue
+        yield start, start + duration, None
+
+    for original_start, (start, end, fields) in sorted(overrides.items()):
+        if original_start not in exdates and start < window_end and end > window_start:
+            yield start, end, fields
+
+
+def _periodic(dtstart, rule, not_before):
+    if rule.freq == 'DAILY':
+        base = dtstart
+        period = rule.interval * SECONDS_PER_DAY
+        offsets = [0]
+    else:
+        time_of_day = dtstart % SECONDS_PER_DAY
+        weekday = (dtstart // SECONDS_PER_DAY + 3) % 7  # 1970-01-01 was a Thursday
+        base = dtstart - time_of_day - weekday * SECONDS_PER_DAY
+        period = rule.interval * 7 * SECONDS_PER_DAY
+        days = rule.byday or [weekday]
+        offsets = [day * SECONDS_PER_DAY + time_of_day for day in days]
+
+    in_first_period = sum(1 for offset in offsets if base + offset >= dtstart)
+    first = max(0, (not_before - base) // period)
+    index = first
+    while True:
+        for position, offset in enumerate(offsets):
+            start = base + index * period + offset
+            if start < dtstart:
+                continue
+            if index == 0:
+                number = position - (len(offsets) - in_first_period)
+            else:
+                number = in_first_period + (index - 1) * len(offsets) + position
+            if rule.count is not None and number >= rule.count:
+                return
+            if rule.until is not None and start > rule.until:
+                return
+            yield start
+        index += 1
+
+
+def _monthly(dtstart, rule, not_before):
+    struct = time.gmtime(dtstart)
+    time_of_day = dtstart % SECONDS_PER_DAY
+    if rule.count is None:
+        # Without COUNT nothing before the window matters, so skip ahead
+        target = time.gmtime(max(not_before, dtstart))
+        months_between = (target.tm_year - struct.tm_year) * 12 + target.tm_mon - struct.tm_mon
+        index = max(0, months_between - 1) // rule.interval
+    else:
+        index = 0
+
+    number = 0
+    while True:
+        month = struct.tm_mon - 1 + index * rule.interval
+        year, month = struct.tm_year + month // 12, month % 12 + 1
+        index += 1
+        # Months without this day (e.g. the 31st) have no occurrence
+        if struct.tm_mday > calendar.monthrange(year, month)[1]:
+            continue
+        start = calendar.timegm((year, month, struct.tm_mday, 0, 0, 0)) + time_of_day
+        if rule.count is not None and number >= rule.count:
+            return
+        if rule.until is not None and start > rule.until:
+            return
+        number += 1
+        yield start
@@ -1,55 +1,205 @@
-from chromadb import Client as ChromaClient
-from langmem import Client as LangMemClient  # Updated import
 from loguru import logger
+import contextvars
 import datetime
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from agents.google_auth import authenticate_google_api
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from agents.instrumentation import external_call, instrument
+from agents.lazy_import import lazy_import
+from agents.notifications import Notification
+from agents.task_dedup import TaskDeduplicator
+
+# Heavy clients load on first use so importing and constructing the agent stays cheap
+chromadb = lazy_import('chromadb')
+langmem = lazy_import('langmem')
+googleapiclient_discovery = lazy_import('googleapiclient.discovery')
+googleapiclient_errors = lazy_import('googleapiclient.errors')
+google_auth = lazy_import('agents.google_auth')
+
+# Written into a Google Task's notes so a retried delivery can tell that the task already landed
+TASK_KEY_PATTERN = re.compile(r'\[agent-key:([^\]]+)\]')
+# How far the Google Tasks clock may be behind ours when looking for tasks that already landed
+CLOCK_SKEW_SECONDS = 300
+# Context lookups in flight at once for LangMem clients without get_contexts
+CONTEXT_FETCH_WORKERS = 8
 
 
 class ReminderAgent:
 
-    def __init__(self, chroma_client=None, langmem_client=None, tasks_service=None):
+    def __init__(self, chroma_client=None, langmem_client=None, tasks_service=None, outbox=None,
+                 deduplicator=None, duplicate_policy='merge', dispatcher=None, state=None):
         try:
-            # Initialize Chroma client
-            self.chroma_client = chroma_client or ChromaClient(path='data/tasks/')
+            # Clients that are not injected are created on first use
+            self._chroma_client = chroma_client
+            self._langmem_client = langmem_client
+            self._tasks_service = tasks_service
+
+            # Route writes through the durable outbox when one is provided
+            self.outbox = outbox
+            # Tasks queued for Chroma but not delivered yet, so reads here still see them
+            self._queued = {}  # title -> (chroma idempotency key, task)
+            self._queued_lock = threading.Lock()
+            if self.outbox:
+                self.outbox.register_handler('reminder.chroma', self._deliver_to_chroma)
+                self.outbox.register_handler('reminder.langmem', self._deliver_to_langmem)
+                self.outbox.register_batch_handler('reminder.google_tasks', self._deliver_to_google_tasks)
 
-            # Initialize LangMem client
-            self.langmem_client = langmem_client or LangMemClient()  # Updated initialization
+            # Near-duplicate tasks are either merged into the existing one ('merge') or added and tagged ('flag')
+            if duplicate_policy not in ('merge', 'flag'):
+                raise ValueError(f"Unknown duplicate policy '{duplicate_policy}'.")
+            self.deduplicator = deduplicator
+            self.duplicate_policy = duplicate_policy
+            self._known_tasks_indexed = False
 
-            # Initialize Google Tasks service
-            if tasks_service:
-                self.tasks_service = tasks_service
-            else:
-                self.creds = authenticate_google_api()
-                self.tasks_service = build('tasks', 'v1', credentials=self.creds)
+            # Delivers reminders to email/webhook channels; without one they are only logged
+            self.dispatcher = dispatcher
+
+            # Snapshot-backed task list (agents.state_store); without one every pass rescans Chroma
+            self.state = state
 
             logger.info("ReminderAgent initialized successfully with Google Tasks API.")
         except Exception as e:
             logger.exception("Failed to initialize ReminderAgent.")
             raise e
 
+    @property
+    def chroma_client(self):
+        if self._chroma_client is None:
+            self._chroma_client = chromadb.Client(path='data/tasks/')
+        return self._chroma_client
+
+    @property
+    def langmem_client(self):
+        if self._langmem_client is None:
+            self._langmem_client = langmem.Client()
+        return self._langmem_client
+
+    @property
+    def tasks_service(self):
+        if self._tasks_service is None:
+            self.creds = google_auth.authenticate_google_api()
+            self._tasks_service = googleapiclient_discovery.build('tasks', 'v1', credentials=self.creds)
+        return self._tasks_service
+
+    @staticmethod
+    def _add_result(status, title=None, similarity=None):
+        return {'status': status, 'duplicate_of': title, 'similarity': similarity}
+
+    @instrument('reminder.add_task')
     def add_task(self, task_details):
+        """Add a task; returns ``{'status', 'duplicate_of', 'similarity'}``.
+
+        ``status`` is 'added', 'queued' (with an outbox), 'duplicate' (merged
+        into ``duplicate_of``), 'invalid' or 'failed'.
+        """
         try:
             if not self.validate_task_details(task_details):
                 raise ValueError("Invalid task details.")
 
+            title = similarity = None
+            if self.deduplicator:
+                duplicate = self._find_duplicate(task_details)
+                if duplicate:
+                    title, similarity = duplicate
+                    if self.duplicate_policy == 'merge':
+                        logger.info(
+                            f"Task '{task_details['title']}' merged into near-duplicate '{title}' "
+                            f"(similarity {similarity:.2f})."
+                        )
+                        return self._add_result('duplicate', title, similarity)
+                    logger.warning(f"Task '{task_details['title']}' looks like a duplicate of '{title}'.")
+                    task_details = dict(task_details, duplicate_of=title)
+
+            if self.outbox:
+                # Commit locally; the outbox worker fans out to Chroma, LangMem and Google Tasks
+                key = self.outbox.make_key('task', task_details)
+                self.outbox.enqueue_many([
+                    ('reminder.chroma', task_details, f"{key}:chroma"),
+                    ('reminder.langmem', task_details, f"{key}:langmem"),
+                    ('reminder.google_tasks', task_details, f"{key}:google_tasks"),
+                ])
+                with self._queued_lock:
+                    self._queued[task_details['title']] = (f"{key}:chroma", task_details)
+                if self.deduplicator:
+                    self.deduplicator.add(task_details)
+                if self.state:
+                    self._task_state().put_task(task_details)
+                logger.info(f"Task '{task_details['title']}' queued.")
+                return self._add_result('queued', title, similarity)
+
             # Add task to ChromaDB
-            self.chroma_client.add(task_details['title'], task_details)
+            with external_call('chroma'):
+                self.chroma_client.add(task_details['title'], task_details)
+            if self.deduplicator:
+                self.deduplicator.add(task_details)
+            if self.state:
+                self._task_state().put_task(task_details)
 
             # Update LangMem context
-            self.langmem_client.add_memory(task_details)  # Adjusted to match LangMem client API
+            with external_call('langmem'):
+                self.langmem_client.add_memory(task_details)  # Adjusted to match LangMem client API
 
             logger.info(f"Task '{task_details['title']}' added.")
             self.add_task_to_google_tasks(task_details)
+            return self._add_result('added', title, similarity)
         except ValueError as ve:
             logger.error(f"Validation error: {ve}")
-        except HttpError as he:
+            return self._add_result('invalid')
+        except googleapiclient_errors.HttpError as he:
             logger.error(f"HTTP error occurred: {he}")
+            return self._add_result('failed')
         except Exception as e:
             logger.exception("Unexpected error in add_task.")
             raise e
 
+    def _stored_tasks(self):
+        """Every task, from the state store (earliest deadline first) when there is one, else Chroma."""
+        if self.state:
+            return self._task_state().tasks()
+        with external_call('chroma'):
+            tasks = self.chroma_client.get_all()
+        with self._queued_lock:
+            queued = [task for _, task in self._queued.values()]
+        if not queued:
+            return tasks
+        return list(dict({task['title']: task for task in tasks}, **{task['title']: task for task in queued}).values())
+
+    def _stored_task(self, title):
+        with self._queued_lock:
+            if title in self._queued:
+                return self._queued[title][1]
+        with external_call('chroma'):
+            return self.chroma_client.get(title)
+
+    def _task_state(self):
+        # Seeded from a full Chroma scan, and rescanned once stale to pick up other writers
+        if self.state.stale('tasks'):
+            with external_call('chroma'):
+                self.state.replace_tasks(self.chroma_client.get_all())
+        return self.state
+
+    def _find_duplicate(self, task_details):
+        # Index the known tasks once, in bulk, before the first check
+        if not self._known_tasks_indexed:
+            tasks = self._stored_tasks()
+            self.deduplicator.add_many(tasks)
+            self._known_tasks_indexed = True
+        return self.deduplicator.find_duplicate(task_details)
+
+    @instrument('reminder.cluster_tasks')
+    def cluster_tasks(self):
+        """Group all stored tasks into near-duplicate clusters (lists of titles)."""
+        try:
+            tasks = self._stored_tasks()
+            clusters = (self.deduplicator or TaskDeduplicator()).cluster(tasks)
+            for cluster in clusters:
+                logger.info(f"Near-duplicate tasks: {', '.join(repr(title) for title in cluster)}")
+            logger.info(f"Found {len(clusters)} near-duplicate clusters among {len(tasks)} tasks.")
+            return clusters
+        except Exception as e:
+            logger.exception("Error in cluster_tasks.")
+            raise e
+
     def validate_task_details(self, task_details):
         required_keys = ['title', 'deadline', 'goal']
         for key in required_keys:
@@ -63,13 +213,20 @@ class ReminderAgent:
             return False
         return True
 
+    @instrument('reminder.adjust_reminder')
     def adjust_reminder(self):
         try:
-            # Fetch tasks from ChromaDB
-            tasks = self.chroma_client.get_all()
+            # Fetch tasks from ChromaDB (or the state store)
+            tasks = self._stored_tasks()
 
             # Prioritize tasks using LangMem
-            prioritized_tasks = self.langmem_client.prioritize(tasks)  # Adjusted to match LangMem client API
+            with external_call('langmem'):
+                prioritized_tasks = self.langmem_client.prioritize(tasks)  # Adjusted to match LangMem client API
+
+            if self.dispatcher:
+                prioritized_tasks = list(prioritized_tasks)
+                notifications = self._render_reminders(prioritized_tasks, self._fetch_contexts(prioritized_tasks))
+                return self.dispatcher.dispatch(notifications)
 
             for task in prioritized_tasks:
                 deadline = datetime.datetime.strptime(task['deadline'], '%Y-%m-%d').date()
@@ -81,17 +238,21 @@ class ReminderAgent:
             logger.exception("Error in adjust_reminders.")
             raise e
 
+    @instrument('reminder.send_contextual_reminder')
     def send_contextual_reminder(self, task_title):
         try:
-            # Fetch task from ChromaDB
-            task = self.chroma_client.get(task_title)
+            # Fetch task from ChromaDB, or the outbox's pending copy
+            task = self._stored_task(task_title)
             if not task:
                 raise ValueError(f"Task '{task_title}' not found.")
 
             # Get context from LangMem
-            context = self.langmem_client.get_context(task)  # Adjusted to match LangMem client API
+            with external_call('langmem'):
+                context = self.langmem_client.get_context(task)  # Adjusted to match LangMem client API
 
             message = f"Reminder: Complete '{task_title}'. {context}"
+            if self.dispatcher:
+                self.dispatcher.dispatch(self._render_reminders([task], [context]))
             logger.info(message)
 
         except ValueError as ve:
@@ -100,17 +261,147 @@ class ReminderAgent:
             logger.exception("Unexpected error in send_contextual_reminder.")
             raise e
 
-    def add_task_to_google_tasks(self, task_details):
-        task = {
+    @instrument('reminder.send_contextual_reminders')
+    def send_contextual_reminders(self, task_titles=None):
+        """Remind about many tasks at once: one task fetch, one context fetch, one dispatch.
+
+        Without ``task_titles`` every stored task is reminded. Returns the
+        dispatch stats, or None when no dispatcher is configured.
+        """
+        try:
+            tasks = self._stored_tasks()
+            if task_titles is not None:
+                wanted = set(task_titles)
+                tasks = [task for task in tasks if task['title'] in wanted]
+            notifications = self._render_reminders(tasks, self._fetch_contexts(tasks))
+            if not self.dispatcher:
+                for notification in notifications:
+                    logger.info(notification.body)
+                return None
+            return self.dispatcher.dispatch(notifications)
+        except Exception as e:
+            logger.exception("Error in send_contextual_reminders.")
+            raise e
+
+    def _fetch_contexts(self, tasks):
+        # One round trip per cycle when the client can batch
+        get_contexts = getattr(self.langmem_client, 'get_contexts', None)
+        if get_contexts:
+            with external_call('langmem'):
+                return list(get_contexts(tasks))
+
+        # Otherwise one call per task, overlapped, and each counted as a call
+        def get_context(task):
+            with external_call('langmem'):
+                return self.langmem_client.get_context(task)
+
+        if len(tasks) < 2:
+            return [get_context(task) for task in tasks]
+        with ThreadPoolExecutor(min(CONTEXT_FETCH_WORKERS, len(tasks)), thread_name_prefix='langmem') as executor:
+            # Each call runs in a copy of this context so it is attributed to the calling operation
+            futures = [executor.submit(contextvars.copy_context().run, get_context, task) for task in tasks]
+            return [future.result() for future in futures]
+
+    def _render_reminders(self, tasks, contexts):
+        today = datetime.date.today()
+        notifications = []
+        for task, context in zip(tasks, contexts):
+            deadline = datetime.datetime.strptime(task['deadline'], '%Y-%m-%d').date()
+            days_left = (deadline - today).days
+            notifications.append(Notification(
+                subject=f"Reminder: '{task['title']}' is due in {days_left} days",
+                body=f"Reminder: Complete '{task['title']}' (due {task['deadline']}). {context or ''}".rstrip(),
+                recipient=task.get('owner_email'),
+                metadata={'kind': 'task', 'title': task['title'], 'deadline': task['deadline']},
+            ))
+        return notifications
+
+    def _google_task_body(self, task_details, idempotency_key=None):
+        notes = task_details.get('description', '')
+        if idempotency_key:
+            notes = f"{notes}\n\n[agent-key:{idempotency_key}]".lstrip()
+        return {
             'title': task_details['title'],
-            'notes': task_details.get('description', ''),
+            'notes': notes,
             'due': task_details['deadline'] + 'T00:00:00Z',
         }
+
+    def _deliver_to_chroma(self, task_details, idempotency_key):
+        # The stored task carries its key, so a retry after a lost reply is a no-op
+        with external_call('chroma'):
+            existing = self.chroma_client.get(task_details['title'])
+        if existing and existing.get('outbox_key') == idempotency_key:
+            logger.info(f"Task '{task_details['title']}' already in Chroma.")
+            self._delivered(task_details['title'], idempotency_key)
+            return
+        with external_call('chroma'):
+            self.chroma_client.add(task_details['title'], dict(task_details, outbox_key=idempotency_key))
+        self._delivered(task_details['title'], idempotency_key)
+
+    def _delivered(self, title, idempotency_key):
+        # A newer write of the same title stays pending
+        with self._queued_lock:
+            if self._queued.get(title, (None,))[0] == idempotency_key:
+                del self._queued[title]
+
+    def _deliver_to_langmem(self, task_details, idempotency_key):
+        with external_call('langmem'):
+            self.langmem_client.add_memory(task_details)
+
+    def _delivered_task_keys(self, since):
+        """Idempotency keys found in the notes of Google Tasks updated since ``since`` (epoch seconds)."""
+        updated_min = datetime.datetime.fromtimestamp(since - CLOCK_SKEW_SECONDS, datetime.timezone.utc)
+        keys = set()
+        page_token = None
+        while True:
+            with external_call('google_tasks'):
+                page = self.tasks_service.tasks().list(
+                    tasklist='@default', updatedMin=updated_min.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                    showCompleted=True, showHidden=True, showDeleted=True, maxResults=100, pageToken=page_token,
+                ).execute()
+            for task in page.get('items', []):
+                keys.update(TASK_KEY_PATTERN.findall(task.get('notes') or ''))
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return keys
+
+    def _deliver_to_google_tasks(self, entries):
+        """Outbox batch handler: skip tasks that already landed, insert the rest in one batch request.
+
+        Every task is inserted after its entry was queued, so only tasks updated
+        since the oldest entry need checking.
+        """
+        delivered = self._delivered_task_keys(min(created_at for _, _, created_at in entries))
+        errors = [None] * len(entries)
+
+        def inserted(request_id, response, exception):
+            errors[int(request_id)] = exception
+            if exception is None:
+                logger.info(f"Task added to Google Tasks: {response.get('title')}")
+
+        batch = self.tasks_service.new_batch_http_request(callback=inserted)
+        for n, (task_details, key, _) in enumerate(entries):
+            if key in delivered:
+                logger.info(f"Task '{task_details['title']}' already in Google Tasks.")
+                continue
+            batch.add(
+                self.tasks_service.tasks().insert(tasklist='@default', body=self._google_task_body(task_details, key)),
+                request_id=str(n),
+            )
+        # Unlike add_task_to_google_tasks, errors propagate so the outbox retries
+        with external_call('google_tasks'):
+            batch.execute()
+        return errors
+
+    @instrument('reminder.add_task_to_google_tasks')
+    def add_task_to_google_tasks(self, task_details):
+        task = self._google_task_body(task_details)
         try:
-            result = self.tasks_service.tasks().insert(tasklist='@default', body=task).execute()
+            with external_call('google_tasks'):
+                result = self.tasks_service.tasks().insert(tasklist='@default', body=task).execute()
             logger.info(f"Task added to Google Tasks: {result.get('title')}")
             return result
-        except HttpError as he:
+        except googleapiclient_errors.HttpError as he:
             logger.error(f"HTTP error occurred while adding task to Google Tasks: {he}")
         except Exception as e:
             logger.exception("Unexpected error adding task to Google Tasks.")
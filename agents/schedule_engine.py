@@ -0,0 +1,199 @@
+from bisect import bisect_right
+from agents.event_record import local_to_utc, utc_to_local
+
+SECONDS_PER_DAY = 86400
+
+
+def find_conflicts(starts, ends):
+    """Sweep-line conflict detection over ``[start, end)`` intervals.
+
+    Returns ``(i, j)`` index pairs where event ``j`` starts before event ``i``
+    (the latest-ending event seen so far) has finished. Runs in O(n log n).
+    """
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    conflicts = []
+    active = None
+    for j in order:
+        if active is not None and starts[j] < ends[active]:
+            conflicts.append((active, j))
+        if active is None or ends[j] > ends[active]:
+            active = j
+    return conflicts
+
+
+def _merge(starts, ends):
+    merged_starts, merged_ends = [], []
+    for s, e in sorted(zip(starts, ends)):
+        if merged_ends and s < merged_ends[-1]:
+            merged_ends[-1] = max(merged_ends[-1], e)
+        else:
+            merged_starts.append(s)
+            merged_ends.append(e)
+    return merged_starts, merged_ends
+
+
+def _max_weight_compatible(indices, starts, ends, weights):
+    """Weighted interval scheduling: the heaviest subset with no overlaps."""
+    if not indices:
+        return []
+    # Shift to strictly positive weights so an event that overlaps nothing is always kept
+    offset = 1 - min(weights[i] for i in indices)
+    by_end = sorted(indices, key=lambda i: (ends[i], starts[i]))
+    end_times = [ends[i] for i in by_end]
+    best = [0] * (len(by_end) + 1)
+    previous = [0] * len(by_end)
+    chosen = [False] * len(by_end)
+    for k, i in enumerate(by_end):
+        p = bisect_right(end_times, starts[i], 0, k)
+        previous[k] = p
+        include = weights[i] + offset + best[p]
+        if include > best[k]:
+            best[k + 1] = include
+            chosen[k] = True
+        else:
+            best[k + 1] = best[k]
+
+    kept = []
+    k = len(by_end)
+    while k > 0:
+        if chosen[k - 1]:
+            kept.append(by_end[k - 1])
+            k = previous[k - 1]
+        else:
+            k -= 1
+    return kept
+
+
+def _align_to_working_hours(t, duration, working_hours, time_zone):
+    if not working_hours:
+        return t
+    day_start, day_end = working_hours
+    if duration > day_end - day_start:
+        return t
+    # The offset is looked up per candidate, so days after a DST change keep their working hours
+    local = utc_to_local(t, time_zone)
+    day = local - local % SECONDS_PER_DAY
+    time_of_day = local - day
+    if time_of_day < day_start:
+        return local_to_utc(day + day_start, time_zone)
+    if time_of_day + duration > day_end:
+        return local_to_utc(day + SECONDS_PER_DAY + day_start, time_zone)
+    return t
+
+
+def reschedule(starts, ends, priorities=None, fixed=None, buffer_seconds=900, working_hours=None, time_zone='UTC'):
+    """Resolve every conflict in a schedule of epoch-second intervals.
+
+    Fixed events never move. Among the movable events, the highest total
+    priority set that fits around the fixed ones stays put; the rest are
+    repacked, in order of their original start, into the earliest gap after
+    it that leaves ``buffer_seconds`` on both sides and lies within
+    ``working_hours`` (``(start, end)`` seconds into the day, in
+    ``time_zone``). The result is conflict-free.
+
+    Returns ``{index: (new_start, new_end)}`` for the events that moved only.
+    """
+    n = len(starts)
+    priorities = priorities or [1] * n
+    fixed = fixed or [False] * n
+    if not find_conflicts(starts, ends):
+        return {}
+
+    fixed_starts, fixed_ends = _merge(
+        [starts[i] for i in range(n) if fixed[i]],
+        [ends[i] for i in range(n) if fixed[i]],
+    )
+
+    # Movable events that collide with a fixed one are displaced outright
+    displaced, candidates = [], []
+    j = 0
+    for i in sorted((i for i in range(n) if not fixed[i]), key=starts.__getitem__):
+        while j < len(fixed_ends) and fixed_ends[j] <= starts[i]:
+            j += 1
+        if j < len(fixed_ends) and fixed_starts[j] < ends[i]:
+            displaced.append(i)
+        else:
+            candidates.append(i)
+
+    kept = _max_weight_compatible(candidates, starts, ends, priorities)
+    kept_set = set(kept)
+    displaced.extend(i for i in candidates if i not in kept_set)
+    displaced.sort(key=lambda i: (starts[i], -priorities[i], i))
+
+    busy = sorted(list(zip(fixed_starts, fixed_ends)) + [(starts[i], ends[i]) for i in kept])
+    busy_starts = [s for s, _ in busy]
+    busy_ends = [e for _, e in busy]
+
+    moves = {}
+    cursor = None
+    j = 0
+    for i in displaced:
+        duration = ends[i] - starts[i]
+        t = starts[i] if cursor is None else max(starts[i], cursor)
+        while True:
+            t = _align_to_working_hours(t, duration, working_hours, time_zone)
+            while j < len(busy_ends) and busy_ends[j] + buffer_seconds <= t:
+                j += 1
+            if j < len(busy_starts) and busy_starts[j] < t + duration + buffer_seconds:
+                t = busy_ends[j] + buffer_seconds
+                j += 1
+                continue
+            break
+        cursor = t + duration + buffer_seconds
+        if t != starts[i]:
+            moves[i] = (t, t + duration)
+    return moves
+
+
+def next_free_slot(busy_starts, busy_ends, t, duration, buffer_seconds=0, working_hours=None, time_zone='UTC'):
+    """Earliest start at or after ``t`` for an event of ``duration`` seconds.
+
+    ``busy_starts``/``busy_ends`` are sorted, non-overlapping intervals. The slot
+    keeps ``buffer_seconds`` clear of each of them on both sides and lies within
+    ``working_hours``, as in ``reschedule``.
+    """
+    j = bisect_right(busy_ends, t - buffer_seconds)
+    while True:
+        t = _align_to_working_hours(t, duration, working_hours, time_zone)
+        while j < len(busy_ends) and busy_ends[j] + buffer_seconds <= t:
+            j += 1
+        if j < len(busy_starts) and busy_starts[j] < t + duration + buffer_seconds:
+            t = busy_ends[j] + buffer_seconds
+            j += 1
+            continue
+        return t
+
+
+def earliest_common_slot(calendars, t, duration, buffer_seconds=0, working_hours=None, time_zone='UTC'):
+    """Earliest start at or after ``t`` that ``next_free_slot`` accepts in every ``(starts, ends)`` calendar."""
+    # With no calendars the slot still has to lie within working hours
+    calendars = calendars or [([], [])]
+    while True:
+        start = t
+        for busy_starts, busy_ends in calendars:
+            t = next_free_slot(busy_starts, busy_ends, t, duration, buffer_seconds, working_hours, time_zone)
+        if t == start:
+            return t
+
+
+def find_slot(records, meeting, not_before, duration, buffer_seconds=0, working_hours=None, time_zone='UTC',
+              key=None):
+    """Earliest start at or after ``not_before`` that is free around every EventRecord in ``records``.
+
+    With ``key`` (``agents.sharding.calendar_keys``), only the calendars of the
+    teams ``key(meeting)`` names count, as in ``ShardPool.find_slots``; a team
+    without events is free throughout.
+    """
+    if key is None:
+        calendars = {None: ([record.start for record in records], [record.end for record in records])}
+    else:
+        teams = set(key(meeting))
+        calendars = {}
+        for record in records:
+            for team in key(record.source):
+                if team in teams:
+                    starts, ends = calendars.setdefault(team, ([], []))
+                    starts.append(record.start)
+                    ends.append(record.end)
+    calendars = [_merge(starts, ends) for starts, ends in calendars.values()]
+    return earliest_common_slot(calendars, not_before, duration, buffer_seconds, working_hours, time_zone)
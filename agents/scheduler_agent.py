@@ -1,48 +1,150 @@
 import os
-import datetime
+import time
 from dotenv import load_dotenv
 from loguru import logger
-from chromadb import Client
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.schema import SystemMessage, HumanMessage
-from langmem import Client as LangMemClient
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from agents.google_auth import authenticate_google_api
+from agents.lazy_import import lazy_import
+from agents.notifications import Notification
+from agents.instrumentation import external_call, instrument, record_llm_usage, span
+from agents.schedule_engine import find_conflicts, find_slot, reschedule
+from agents.recurrence import RecurrenceRule, occurrences
+from agents.event_record import (
+    MAX_UTC_OFFSET, EventRecord, format_timestamp, local_to_utc, parse_timestamp, utc_to_local,
+)
+
+# Heavy clients load on first use so importing and constructing the agent stays cheap
+chromadb = lazy_import('chromadb')
+langchain_openai = lazy_import('langchain_openai')
+langchain_schema = lazy_import('langchain.schema')
+langmem = lazy_import('langmem')
+googleapiclient_discovery = lazy_import('googleapiclient.discovery')
+googleapiclient_errors = lazy_import('googleapiclient.errors')
+google_auth = lazy_import('agents.google_auth')
 
 class SchedulerAgent:
-    
+
+    # How far ahead recurring events are expanded when no window is given
+    DEFAULT_HORIZON_DAYS = 14
    
-    def __init__(self, chroma_client=None, langmem_client=None, llm=None, calendar_service=None):
+    def __init__(self, chroma_client=None, langmem_client=None, llm=None, calendar_service=None, outbox=None,
+                 dispatcher=None, state=None, agenda_library=None, shard_pool=None):
         try:
             load_dotenv()
-            self.chroma_client = chroma_client or Client(path='data/schedules/')
-            self.langmem_client = langmem_client or LangMemClient()
-            openai_api_key = os.getenv('OPENAI_API_KEY')
-            if not openai_api_key:
+            self._chroma_client = chroma_client
+            self._langmem_client = langmem_client
+            self._llm = llm
+            if not llm and not os.getenv('OPENAI_API_KEY'):
                 raise ValueError("OPENAI_API_KEY environment variable is not set.")
-            self.llm = ChatOpenAI(model_name='gpt-4', temperature=0.7)
-            if calendar_service:
-                self.calendar_service = calendar_service
-            else:
-                self.creds = authenticate_google_api()
-                self.calendar_service = build('calendar', 'v3', credentials=self.creds)
+            self._calendar_service = calendar_service
+            self.outbox = outbox
+            if self.outbox:
+                self.outbox.register_handler('scheduler.google_calendar', self._deliver_to_google_calendar)
+            # Delivers notifications to email/webhook channels; without one they are only logged
+            self.dispatcher = dispatcher
+            # Snapshot-backed schedule index (agents.state_store); without one every query rescans Chroma
+            self.state = state
+            # Past agendas (agents.agenda_library) tried before the LLM
+            self.agenda_library = agenda_library
+            # Per-team process pool (agents.sharding); without one the schedule is a single calendar
+            self.shard_pool = shard_pool
             logger.info("SchedulerAgent initialized successfully with Google Calendar API.")
         except Exception as e:
             logger.exception("Failed to initialize SchedulerAgent.")
             raise e
 
+    @property
+    def chroma_client(self):
+        if self._chroma_client is None:
+            self._chroma_client = chromadb.Client(path='data/schedules/')
+        return self._chroma_client
+
+    @property
+    def langmem_client(self):
+        if self._langmem_client is None:
+            self._langmem_client = langmem.Client()
+        return self._langmem_client
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = langchain_openai.ChatOpenAI(model_name='gpt-4', temperature=0.7)
+        return self._llm
+
+    @property
+    def calendar_service(self):
+        if self._calendar_service is None:
+            self.creds = google_auth.authenticate_google_api()
+            self._calendar_service = googleapiclient_discovery.build('calendar', 'v3', credentials=self.creds)
+        return self._calendar_service
+
+    @instrument('scheduler.retrieve_schedule_data')
     def retrieve_schedule_data(self):
         
         try:
-            schedules = self.chroma_client.get_all()
+            with external_call('chroma'):
+                schedules = self.chroma_client.get_all()
             logger.info(f"Retrieved {len(schedules)} scheduled events.")
             return schedules
         except Exception as e:
             logger.exception("Error in retrieve_schedule_data.")
             raise e
 
+    def _schedule_events(self, window_start, window_end):
+        """Events to consider for a window: from the state store when there is one, else a full scan."""
+        if not self.state:
+            return self.retrieve_schedule_data()
+        return self._event_state().window_events(window_start, window_end)
+
+    def _event_state(self):
+        # Seeded from a full Chroma scan, and rescanned once stale to pick up other writers
+        if self.state.stale('events'):
+            self.state.replace_events(self.retrieve_schedule_data())
+        return self.state
+
+    def _query_window(self, window_start=None, horizon_days=None):
+        start = parse_timestamp(window_start) if window_start else int(time.time())
+        return start, start + (horizon_days or self.DEFAULT_HORIZON_DAYS) * 86400
+
+    def _event_records(self, events, window_start, window_end):
+        """Yield an EventRecord per one-off event and per recurring occurrence within the window.
+
+        Timestamps are parsed once here; everything downstream compares integers.
+        """
+        for event in events:
+            record = EventRecord.from_event(event)
+            if not event.get('recurrence'):
+                if record.start < window_end and record.end > window_start:
+                    yield record
+                continue
+
+            # Expand in the event's wall-clock time so occurrences stay put across DST changes
+            tz = record.tz
+            local_start = utc_to_local(record.start, tz)
+            duration = utc_to_local(record.end, tz) - local_start
+            exdates = [utc_to_local(parse_timestamp(exdate, tz), tz) for exdate in event.get('exdates', [])]
+            overrides = {}
+            for original_start, fields in event.get('overrides', {}).items():
+                override_start = utc_to_local(parse_timestamp(fields.get('start_time', original_start), tz), tz)
+                override_end = (utc_to_local(parse_timestamp(fields['end_time'], tz), tz)
+                                if 'end_time' in fields else override_start + duration)
+                overrides[utc_to_local(parse_timestamp(original_start, tz), tz)] = (override_start, override_end, fields)
+
+            rule = RecurrenceRule.parse(event['recurrence'])
+            if rule.until is not None and rule.until_utc:
+                # Occurrence starts are wall-clock seconds, so UNTIL has to be too
+                rule.until = utc_to_local(rule.until, tz)
+            for occurrence_start, occurrence_end, fields in occurrences(
+                local_start, duration, rule,
+                window_start - MAX_UTC_OFFSET, window_end + MAX_UTC_OFFSET,
+                exdates, overrides,
+            ):
+                start = local_to_utc(occurrence_start, tz)
+                end = local_to_utc(occurrence_end, tz)
+                if start >= window_end or end <= window_start:
+                    continue
+                # Occurrences are moved by editing the series, never individually
+                yield EventRecord(start, end, tz, (fields or event).get('priority', 1), True, event)
+
+    @instrument('scheduler.identify_optimal_slots')
     def identify_optimal_slots(self, meeting_details):
         
         try:
@@ -56,45 +158,54 @@ class SchedulerAgent:
     def _find_available_slot(self, meeting_details):
         
         try:
-            events = self.retrieve_schedule_data()
-
-            duration_minutes = meeting_details.get('duration', 60)
-
-            sorted_events = sorted(events, key=lambda x: x['start_time'])
-            available_slot = None
-            for i in range(len(sorted_events) - 1):
-                current_end = datetime.datetime.strptime(sorted_events[i]['end_time'], '%Y-%m-%dT%H:%M:%SZ')
-                next_start = datetime.datetime.strptime(sorted_events[i + 1]['start_time'], '%Y-%m-%dT%H:%M:%SZ')
-
-                if (next_start - current_end).total_seconds() / 60 >= duration_minutes:
-                    available_slot = current_end + datetime.timedelta(minutes=15)
-                    break
+            window_start, window_end = self._query_window(
+                meeting_details.get('window_start'), meeting_details.get('horizon_days')
+            )
+            events = self._schedule_events(window_start, window_end)
+            with span('scheduler.parse_events'):
+                records = list(self._event_records(events, window_start, window_end))
 
-            if not available_slot:
-                last_event_end = datetime.datetime.strptime(sorted_events[-1]['end_time'], '%Y-%m-%dT%H:%M:%SZ')
-                available_slot = last_event_end + datetime.timedelta(minutes=15)
+            duration = meeting_details.get('duration', 60) * 60
+            # 15 minutes clear of other events; the shard pool only looks at the calendars of the meeting's teams
+            if self.shard_pool is not None:
+                available_slot = self.shard_pool.find_slots(
+                    records, [(meeting_details, window_start, duration)], 15 * 60
+                )[0]
+            else:
+                available_slot = find_slot(records, meeting_details, window_start, duration, 15 * 60)
 
-            available_slot_str = available_slot.strftime('%Y-%m-%dT%H:%M:%SZ')
+            available_slot_str = format_timestamp(available_slot)
             logger.info(f"Available slot identified: {available_slot_str}")
             return available_slot_str
         except Exception as e:
             logger.exception("Error in _find_available_slot.")
             raise e
 
+    @instrument('scheduler.generate_agenda')
     def generate_agenda(self, meeting_details):
         try:
+            if self.agenda_library is not None:
+                agenda = self.agenda_library.lookup(meeting_details)
+                if agenda is not None:
+                    return agenda
+
             agenda_prompt = f"Create a detailed agenda for a meeting about {meeting_details['title']}."
             messages = [
-            SystemMessage(content="You are an assistant that helps create agendas."),
-            HumanMessage(content=agenda_prompt)
+            langchain_schema.SystemMessage(content="You are an assistant that helps create agendas."),
+            langchain_schema.HumanMessage(content=agenda_prompt)
         ]
-            response = self.llm.invoke(messages)
+            with external_call('llm'):
+                response = self.llm.invoke(messages)
+            record_llm_usage(response)
             agenda = response.content  # Extract the agenda from the response
+            if self.agenda_library is not None:
+                self.agenda_library.add(meeting_details, agenda)
             return agenda
         except Exception as e:
             logger.error("Error in generate_agenda.", exc_info=True)
             raise e
 
+    @instrument('scheduler.send_notifications')
     def send_notifications(self, meeting_details, agenda):
       
         try:
@@ -102,52 +213,78 @@ class SchedulerAgent:
                 f"Meeting '{meeting_details['title']}' scheduled on {meeting_details['start_time']}.\n"
                 f"Agenda:\n{agenda}"
             )
+            if self.dispatcher:
+                subject = f"Meeting '{meeting_details['title']}' on {meeting_details['start_time']}"
+                self.dispatcher.dispatch([
+                    Notification(subject, notification_message, recipient=email, metadata={'kind': 'meeting'})
+                    for email in meeting_details.get('participants_emails') or [None]
+                ])
             logger.info(f"Notification sent: {notification_message}")
             
         except Exception as e:
             logger.exception("Error in send_notifications.")
             raise e
 
-    def adjust_schedule(self):
+    @instrument('scheduler.adjust_schedule')
+    def adjust_schedule(self, buffer_minutes=15, working_hours=None, window_start=None, horizon_days=None,
+                        time_zone='UTC'):
         
         try:
-            events = self.retrieve_schedule_data()
-            if not events:
+            window_start, window_end = self._query_window(window_start, horizon_days)
+            events = self._schedule_events(window_start, window_end)
+            with span('scheduler.parse_events'):
+                records = list(self._event_records(events, window_start, window_end))
+            if not records:
                 logger.info("No scheduled events found to adjust.")
-                return
-            
+                return []
+
+            if working_hours:
+                working_hours = (working_hours[0] * 3600, working_hours[1] * 3600)
+            options = dict(buffer_seconds=buffer_minutes * 60, working_hours=working_hours, time_zone=time_zone)
+            if self.shard_pool is not None:
+                conflicts, moves = self.shard_pool.reschedule(records, **options)
+            else:
+                starts = [record.start for record in records]
+                ends = [record.end for record in records]
+                conflicts = find_conflicts(starts, ends)
+                moves = {}
+                if conflicts:
+                    moves = reschedule(
+                        starts,
+                        ends,
+                        priorities=[record.priority for record in records],
+                        fixed=[record.fixed for record in records],
+                        **options,
+                    )
+            if not conflicts:
+                logger.info("No schedule conflicts found.")
+                return []
+            for i, j in conflicts:
+                logger.warning(
+                    f"Conflict detected between '{records[i].source.get('title')}' and '{records[j].source.get('title')}'."
+                )
+
+            # Only events that actually moved are written back
             adjusted_events = []
-            for event in events:
-                start_time = datetime.datetime.strptime(event['start_time'], '%Y-%m-%dT%H:%M:%SZ')
-                end_time = datetime.datetime.strptime(event['end_time'], '%Y-%m-%dT%H:%M:%SZ')
-
-                for other_event in events:
-                    if event == other_event:
-                        continue
-                    other_start = datetime.datetime.strptime(other_event['start_time'], '%Y-%m-%dT%H:%M:%SZ')
-                    other_end = datetime.datetime.strptime(other_event['end_time'], '%Y-%m-%dT%H:%M:%SZ')
-
-                    if (start_time < other_end and end_time > other_start):
-                        logger.warning(f"Conflict detected between '{event['title']}' and '{other_event['title']}'.")
-                        adjusted_start = other_end + datetime.timedelta(minutes=15)
-                        adjusted_end = adjusted_start + (end_time - start_time)
-                        event['start_time'] = adjusted_start.strftime('%Y-%m-%dT%H:%M:%SZ')
-                        event['end_time'] = adjusted_end.strftime('%Y-%m-%dT%H:%M:%SZ')
-                        logger.info(f"Adjusted event '{event['title']}' to start at {event['start_time']} and end at {event['end_time']}.")
-                        break
+            for i in sorted(moves):
+                event = records[i].source
+                event['start_time'] = format_timestamp(moves[i][0])
+                event['end_time'] = format_timestamp(moves[i][1])
+                with external_call('chroma'):
+                    self.chroma_client.update(event['title'], event)
                 adjusted_events.append(event)
+                logger.info(f"Adjusted event '{event['title']}' to start at {event['start_time']} and end at {event['end_time']}.")
+            if self.state:
+                self._event_state().put_events(adjusted_events)
 
-            for adjusted_event in adjusted_events:
-                self.chroma_client.update(adjusted_event['title'], adjusted_event)
-
-            logger.info("Schedule adjustments completed.")
+            logger.info(f"Schedule adjustments completed: {len(adjusted_events)} events moved.")
+            return adjusted_events
         except Exception as e:
             logger.exception("Error in adjust_schedule.")
             raise e
 
-    def add_event_to_google_calendar(self, event_details):
-        
-        event = {
+    def _google_event_body(self, event_details):
+        return {
             'summary': event_details['title'],
             'location': event_details.get('location', ''),
             'description': event_details.get('description', ''),
@@ -164,11 +301,35 @@ class SchedulerAgent:
                 'useDefault': True,
             },
         }
+
+    def _deliver_to_google_calendar(self, event, idempotency_key):
+        # The idempotency key doubles as the Calendar event id, so a retried
+        # insert that already landed comes back as 409 instead of a duplicate.
+        body = dict(event, id=idempotency_key)
+        try:
+            with external_call('google_calendar'):
+                event_result = self.calendar_service.events().insert(calendarId='primary', body=body).execute()
+            logger.info(f"Event created: {event_result.get('htmlLink')}")
+        except googleapiclient_errors.HttpError as he:
+            if he.resp.status == 409:
+                logger.info(f"Event '{event['summary']}' already exists in Google Calendar.")
+                return
+            raise he
+
+    @instrument('scheduler.add_event_to_google_calendar')
+    def add_event_to_google_calendar(self, event_details):
+        
+        event = self._google_event_body(event_details)
+        if self.outbox:
+            key = self.outbox.enqueue('scheduler.google_calendar', event)
+            logger.info(f"Event '{event['summary']}' queued for Google Calendar.")
+            return {'status': 'queued', 'id': key}
         try:
-            event_result = self.calendar_service.events().insert(calendarId='primary', body=event).execute()
+            with external_call('google_calendar'):
+                event_result = self.calendar_service.events().insert(calendarId='primary', body=event).execute()
             logger.info(f"Event created: {event_result.get('htmlLink')}")
             return event_result
-        except HttpError as he:
+        except googleapiclient_errors.HttpError as he:
             logger.error(f"HTTP error occurred while adding event to Google Calendar: {he}")
             raise he
         except Exception as e:
@@ -0,0 +1,285 @@
+"""Sharded, multi-process scheduling for the calendars of a whole organization.
+
+Calendars are partitioned by team (``calendar_keys``) and teams are spread
+over shards by a stable hash. The parent expands the schedule once and copies
+the intervals into one shared-memory table, grouped by team, so workers read
+them in place instead of unpickling events. Every shard then detects
+conflicts, reschedules, or searches for free slots over its own teams in a
+process pool.
+
+Meetings shared by several teams are placed by the parent before the shards
+run, in a fixed order, and are fixed in each of their teams from then on. The
+merged result does not depend on the number of workers or on which shard
+finishes first.
+"""
+import multiprocessing
+import os
+import zlib
+from bisect import bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+from loguru import logger
+from agents.instrumentation import span
+from agents.lazy_import import lazy_import
+from agents.schedule_engine import _merge, earliest_common_slot, find_conflicts, next_free_slot, reschedule
+
+np = lazy_import('numpy')
+
+# Rows of the shared table, with one column per (team, event) pair
+START, END, PRIORITY, KIND, RECORD, PLACED_START, PLACED_END = range(7)
+ROWS = 7
+MOVABLE, FIXED, SHARED = 0, 1, 2
+
+
+def calendar_keys(event):
+    """The teams whose calendars ``event`` is on; events without a team share one default calendar."""
+    teams = event.get('teams')
+    return sorted(set(teams)) if teams else [event.get('team') or '']
+
+
+def shard_of(key, shards):
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(key.encode()) % shards
+
+
+def _attach(name, columns):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((ROWS, columns), dtype=np.int64, buffer=block.buf)
+
+
+def _reschedule_shard(name, columns, teams, buffer_seconds, working_hours, time_zone):
+    """Worker: conflicts and moves, by record index, for the teams at ``(first, end)`` column ranges."""
+    block, table = _attach(name, columns)
+    try:
+        conflicts, moves = [], []
+        for first, end in teams:
+            starts, ends, priorities, kinds, records, placed_starts, placed_ends = table[:, first:end].tolist()
+            conflicts.extend((records[i], records[j]) for i, j in find_conflicts(starts, ends))
+            moved = reschedule(
+                placed_starts,
+                placed_ends,
+                priorities=priorities,
+                fixed=[kind != MOVABLE for kind in kinds],
+                buffer_seconds=buffer_seconds,
+                working_hours=working_hours,
+                time_zone=time_zone,
+            )
+            moves.extend((records[i], start, end) for i, (start, end) in moved.items())
+        return conflicts, moves
+    finally:
+        del table
+        block.close()
+
+
+def _slots_shard(name, columns, requests, working_hours, time_zone):
+    """Worker: ``(request, start)`` for each ``(request, not_before, duration, buffer_seconds, teams)``."""
+    block, table = _attach(name, columns)
+    try:
+        calendars = {}
+        for first, end in {team for *_, teams in requests for team in teams}:
+            calendars[first, end] = _merge(table[START, first:end].tolist(), table[END, first:end].tolist())
+        return [
+            (request, earliest_common_slot(
+                [calendars[team] for team in teams], not_before, duration, buffer_seconds, working_hours, time_zone
+            ))
+            for request, not_before, duration, buffer_seconds, teams in requests
+        ]
+    finally:
+        del table
+        block.close()
+
+
+class ShardPool:
+    """Process pool running the scheduler's interval work per team, in parallel across shards."""
+
+    def __init__(self, workers=None, shards=None, key=calendar_keys):
+        try:
+            self.workers = workers or os.cpu_count() or 1
+            # Several shards per worker, so one large team does not leave the other workers idle
+            self.shards = shards or 4 * self.workers
+            self.key = key
+            self._executor = None
+            logger.info(f"ShardPool initialized with {self.workers} workers and {self.shards} shards.")
+        except Exception as e:
+            logger.exception("Failed to initialize ShardPool.")
+            raise e
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # Not fork: the agents share the process with outbox and server threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+        return self._executor
+
+    def _index(self, records):
+        """One pass over ``records``: the records of each team, the teams of each shared meeting, and the intervals."""
+        key = self.key
+        members, shared = {}, {}
+        starts, ends, priorities, kinds = [], [], [], []
+        for i, record in enumerate(records):
+            teams = key(record.source)
+            for team in teams:
+                if team in members:
+                    members[team].append(i)
+                else:
+                    members[team] = [i]
+            if len(teams) > 1:
+                shared[i] = teams
+                kinds.append(SHARED)
+            else:
+                kinds.append(FIXED if record.fixed else MOVABLE)
+            starts.append(record.start)
+            ends.append(record.end)
+            priorities.append(record.priority)
+        return members, shared, np.array([starts, ends, priorities, kinds], dtype=np.int64).reshape(4, len(records))
+
+    def _share(self, members, intervals, placed):
+        """Copy the intervals into shared memory, one column per (team, event), grouped by team."""
+        ranges, first = {}, 0
+        for team in sorted(members):
+            ranges[team] = (first, first + len(members[team]))
+            first += len(members[team])
+        order = np.fromiter(chain.from_iterable(members[team] for team in ranges), dtype=np.int64, count=first)
+
+        block = shared_memory.SharedMemory(create=True, size=max(ROWS * first * 8, 1))
+        table = np.ndarray((ROWS, first), dtype=np.int64, buffer=block.buf)
+        table[START:KIND + 1] = intervals[:, order]
+        table[RECORD] = order
+        table[PLACED_START:PLACED_END + 1] = table[START:END + 1]
+        if placed:
+            moved = np.isin(order, np.fromiter(placed, dtype=np.int64, count=len(placed)))
+            table[PLACED_START:PLACED_END + 1, moved] = np.array([placed[i] for i in order[moved].tolist()]).T
+        del table
+        return block, first, ranges
+
+    def _by_shard(self, ranges):
+        shards = {}
+        for team in sorted(ranges):
+            shards.setdefault(shard_of(team, self.shards), []).append(team)
+        return [shards[shard] for shard in sorted(shards)]
+
+    def _place_shared(self, records, members, shared, intervals, buffer_seconds, working_hours, time_zone):
+        """Fix the times of meetings that span teams before the teams are scheduled separately.
+
+        In order of priority, then start, each keeps its time unless that collides
+        with a fixed event or an earlier shared meeting of one of its teams; then
+        it moves to the earliest slot free in all of them.
+        """
+        busy = {}
+        for team in {team for teams in shared.values() for team in teams}:
+            rows = np.array(members[team], dtype=np.int64)
+            fixed = rows[intervals[KIND, rows] == FIXED]
+            busy[team] = _merge(intervals[START, fixed].tolist(), intervals[END, fixed].tolist())
+
+        placed = {}
+        for i in sorted(shared, key=lambda i: (not records[i].fixed, -records[i].priority, records[i].start, i)):
+            start, end = records[i].start, records[i].end
+            calendars = [busy[team] for team in shared[i]]
+            if not records[i].fixed:
+                for busy_starts, busy_ends in calendars:
+                    j = bisect_right(busy_ends, start)
+                    if j < len(busy_starts) and busy_starts[j] < end:
+                        start = earliest_common_slot(
+                            calendars, start, end - start, buffer_seconds, working_hours, time_zone
+                        )
+                        end = start + records[i].duration
+                        break
+            placed[i] = (start, end)
+            for busy_starts, busy_ends in calendars:
+                j = bisect_right(busy_ends, start)
+                if j < len(busy_starts) and busy_starts[j] < end:
+                    continue  # two fixed meetings overlap; neither can move
+                insort(busy_starts, start)
+                insort(busy_ends, end)
+        return placed
+
+    def reschedule(self, records, buffer_seconds=900, working_hours=None, time_zone='UTC'):
+        """Resolve conflicts within every team's calendar.
+
+        Returns ``(conflicts, moves)``: record index pairs, as ``find_conflicts``,
+        and ``{index: (new_start, new_end)}`` for the records that moved, as
+        ``reschedule``.
+        """
+        members, shared, intervals = self._index(records)
+        with span('sharding.place_shared'):
+            placed = self._place_shared(records, members, shared, intervals, buffer_seconds, working_hours, time_zone)
+        block, columns, ranges = self._share(members, intervals, placed)
+        try:
+            with span('sharding.reschedule'):
+                futures = [
+                    self.executor.submit(
+                        _reschedule_shard, block.name, columns, [ranges[team] for team in teams],
+                        buffer_seconds, working_hours, time_zone,
+                    )
+                    for teams in self._by_shard(ranges)
+                ]
+                results = [future.result() for future in futures]
+        finally:
+            block.close()
+            block.unlink()
+
+        conflicts = set()
+        moves = {i: (start, end) for i, (start, end) in placed.items() if start != records[i].start}
+        for found, moved in results:
+            conflicts.update((min(i, j), max(i, j)) for i, j in found)
+            moves.update((i, (start, end)) for i, start, end in moved)
+        return sorted(conflicts), {i: moves[i] for i in sorted(moves)}
+
+    def find_slots(self, records, meetings, buffer_seconds=900, working_hours=None, time_zone='UTC'):
+        """Earliest start for each ``(meeting, not_before, duration)`` that is free in all of its teams.
+
+        Each round, every shard proposes the earliest start free in its own teams;
+        a meeting is settled once no shard proposes later than the round started with.
+        """
+        members, _, intervals = self._index(records)
+        block, columns, ranges = self._share(members, intervals, {})
+        try:
+            wanted = [[team for team in self.key(meeting) if team in ranges] for meeting, _, _ in meetings]
+            pending = {
+                n: next_free_slot([], [], not_before, duration, 0, working_hours, time_zone)
+                for n, (_, not_before, duration) in enumerate(meetings)
+            }
+            slots = {}
+            while pending:
+                shards = {}
+                for n, start in pending.items():
+                    for team in wanted[n]:
+                        shards.setdefault(shard_of(team, self.shards), {}).setdefault(n, []).append(ranges[team])
+                with span('sharding.find_slots'):
+                    futures = [
+                        self.executor.submit(
+                            _slots_shard, block.name, columns,
+                            [(n, pending[n], meetings[n][2], buffer_seconds, teams) for n, teams in requests.items()],
+                            working_hours, time_zone,
+                        )
+                        for _, requests in sorted(shards.items())
+                    ]
+                    proposals = {}
+                    for future in futures:
+                        for n, start in future.result():
+                            proposals[n] = max(proposals.get(n, start), start)
+                later = {}
+                for n, start in pending.items():
+                    if proposals.get(n, start) == start:
+                        slots[n] = start
+                    else:
+                        later[n] = proposals[n]
+                pending = later
+        finally:
+            block.close()
+            block.unlink()
+        return [slots[n] for n in range(len(meetings))]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def shard_pool_from_env():
+    """A ShardPool with SCHEDULER_WORKERS processes, or None when it is not set."""
+    workers = os.getenv('SCHEDULER_WORKERS')
+    return ShardPool(int(workers)) if workers else None
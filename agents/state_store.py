@@ -0,0 +1,562 @@
+"""Snapshot plus write-ahead delta log of the agents' derived state, for fast restarts.
+
+Three kinds of state are kept, each keyed by title:
+
+- schedule events, ordered by start time;
+- tasks, ordered by deadline;
+- per-goal milestone counters.
+
+Opening a store memory-maps the latest snapshot, which costs the same whatever
+its size. The delta log, bounded by ``snapshot_every``, is then replayed into
+a small in-memory overlay that shadows snapshot entries by title. Every change
+is appended to the log before it is applied. Once ``snapshot_every`` records
+or ``snapshot_interval`` seconds have accumulated, the merged state is written
+to a new snapshot and the log is truncated.
+
+Snapshot layout, little-endian:
+
+    header    magic b'AGSTATE\\0', version u32, section count u32, log sequence u64, written-at f64
+    table     per section: tag (4 bytes), offset u64, length u64
+    sections  8-byte aligned; numeric columns are raw arrays (see COLUMNS), JSON
+              records and titles are blobs indexed by an ``n + 1`` offsets column
+
+Delta log records are a length u32, a CRC-32 u32 and a sequence u64, followed
+by a JSON payload. On open, a torn or corrupt tail left by a crash mid-append
+is cut off. Records already covered by the snapshot's sequence are skipped,
+so a crash between writing a snapshot and truncating the log is harmless.
+"""
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from loguru import logger
+from agents.event_record import EventRecord, parse_timestamp
+from agents.instrumentation import instrument, span
+from agents.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+MAGIC = b'AGSTATE\0'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQd')
+SECTION = struct.Struct('<4sQQ')
+RECORD = struct.Struct('<IIQ')
+SECTIONS = ('events', 'tasks', 'goals')
+
+COLUMNS = {
+    b'EVST': '<i8',  # event start, ascending
+    b'EVEN': '<i8',  # event end
+    b'EVRC': '<i8',  # rows of recurring events
+    b'EVOF': '<i8',  # offsets into EVDT, the events as JSON
+    b'TKDL': '<i8',  # task deadline, ascending
+    b'TKOF': '<i8',  # offsets into TKDT, the tasks as JSON
+    b'GLOF': '<i8',  # offsets into GLTI, the goal titles, ascending
+    b'GLCR': '<f8',  # goal created, NaN for milestones logged before their goal
+    b'GLTG': '<i8',  # target milestones
+    b'GLTD': '<f8',  # target date, NaN when unset
+    b'GLMC': '<i8',  # milestone count
+    b'GLLM': '<f8',  # last milestone, NaN when none
+}
+GOAL_COLUMNS = ('created', 'target_milestones', 'target_date', 'milestone_count', 'last_milestone')
+DEFAULT_TARGET_MILESTONES = 10
+
+
+def _deadline(task):
+    return parse_timestamp(task['deadline'])
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _pack(items):
+    """``(offsets, blob)`` for a list of byte strings."""
+    offsets = np.zeros(len(items) + 1, dtype='<i8')
+    if items:
+        np.cumsum([len(item) for item in items], out=offsets[1:])
+    return offsets, b''.join(items)
+
+
+class _Snapshot:
+    """Read-only view of a snapshot file; columns are numpy views of the mapping."""
+
+    def __init__(self, path=None):
+        self.sequence = 0
+        self.written_at = 0.0
+        self.meta = {'sections': []}
+        self._sections = {}
+        self._columns = {}
+        self._map = None
+        if not path or not os.path.exists(path) or not os.path.getsize(path):
+            return
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count, self.sequence, self.written_at = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"'{path}' is not an agent state snapshot.")
+            if version != VERSION:
+                raise ValueError(f"'{path}' has snapshot version {version}, expected {VERSION}.")
+            for i in range(count):
+                tag, offset, length = SECTION.unpack_from(self._map, HEADER.size + i * SECTION.size)
+                if offset + length > len(self._map):
+                    raise ValueError(f"'{path}' is truncated.")
+                self._sections[tag] = (offset, length)
+        except struct.error:
+            raise ValueError(f"'{path}' is truncated.")
+        self.meta = json.loads(self.blob(b'META'))
+
+    def column(self, tag):
+        if tag not in self._columns:
+            dtype = np.dtype(COLUMNS[tag])
+            offset, length = self._sections.get(tag, (0, 0))
+            self._columns[tag] = (np.frombuffer(self._map, dtype, length // dtype.itemsize, offset)
+                                  if length else np.zeros(0, dtype))
+        return self._columns[tag]
+
+    def blob(self, tag, start=0, end=None):
+        offset, length = self._sections.get(tag, (0, 0))
+        return self._map[offset + start:offset + (length if end is None else end)] if length else b''
+
+    def item(self, offsets_tag, blob_tag, row):
+        offsets = self.column(offsets_tag)
+        return self.blob(blob_tag, int(offsets[row]), int(offsets[row + 1]))
+
+    def event(self, row):
+        return json.loads(self.item(b'EVOF', b'EVDT', row))
+
+    def task(self, row):
+        return json.loads(self.item(b'TKOF', b'TKDT', row))
+
+    def goal_title(self, row):
+        return self.item(b'GLOF', b'GLTI', row).decode('utf-8')
+
+    def goal_row(self, title):
+        """Row of ``title`` among the sorted goal titles (binary search), or None."""
+        lo, hi = 0, len(self.column(b'GLCR'))
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.goal_title(mid) < title:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.column(b'GLCR')) and self.goal_title(lo) == title:
+            return lo
+        return None
+
+    def close(self):
+        self._columns.clear()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a column view; the mapping goes when it does
+                pass
+
+
+class StateStore:
+    """Durable, restart-friendly state for the agents.
+
+    Callers seed a section from the source of truth (``replace_events``,
+    ``replace_tasks``, ``replace_goals``). After that they record their own
+    changes with the ``put_*`` methods and query the store instead of
+    rescanning. ``has(section)`` tells whether a section has been seeded;
+    ``stale(section)`` also turns true ``reseed_interval`` seconds after the
+    last seed, so writes made to the source by other processes show up.
+    """
+
+    def __init__(self, directory='data/state', snapshot_every=10_000, snapshot_interval=300.0, sync=False,
+                 reseed_interval=3600.0):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.directory = directory
+            self.snapshot_path = os.path.join(directory, 'snapshot.bin')
+            self.log_path = os.path.join(directory, 'delta.log')
+            self.snapshot_every = snapshot_every
+            self.snapshot_interval = snapshot_interval
+            self.sync = sync
+            self.reseed_interval = reseed_interval
+            self._lock = threading.RLock()
+            with span('state.open'):
+                self._open()
+            logger.info(
+                f"StateStore opened at '{directory}' (snapshot sequence {self._snapshot.sequence}, "
+                f"{self._pending} log records replayed)."
+            )
+        except Exception as e:
+            logger.exception("Failed to initialize StateStore.")
+            raise e
+
+    def _open(self):
+        try:
+            self._snapshot = _Snapshot(self.snapshot_path)
+        except ValueError as e:
+            # The snapshot is only a cache; callers re-seed sections that are missing
+            logger.warning(f"Discarding agent state: {e}")
+            self._snapshot = _Snapshot()
+            open(self.log_path, 'wb').close()
+        self._reset_overlay()
+        self._sequence = self._snapshot.sequence
+        self._pending = 0
+        self._replay()
+        self._log_fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _reset_overlay(self):
+        self._events = {}  # title -> (start, end, recurring, event), None when deleted
+        self._tasks = {}  # title -> (deadline, task), None when deleted
+        self._goals = {}  # title -> [created, target, target_date, count, last]
+        self._shadowed_goal_rows = set()
+
+    def _replay(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+        position = 0
+        while position + RECORD.size <= len(data):
+            length, crc, sequence = RECORD.unpack_from(data, position)
+            end = position + RECORD.size + length
+            if end > len(data) or zlib.crc32(data[position + 8:end]) != crc:
+                break
+            if sequence > self._snapshot.sequence:
+                self._apply(json.loads(data[position + RECORD.size:end]))
+                self._sequence = sequence
+                self._pending += 1
+            position = end
+        if position < len(data):
+            logger.warning(f"Cutting {len(data) - position} bytes of torn delta log at offset {position}.")
+            os.truncate(self.log_path, position)
+
+    def has(self, section):
+        return section in self._snapshot.meta['sections']
+
+    def stale(self, section):
+        """Whether ``section`` should be (re)seeded: never seeded, or seeded ``reseed_interval`` or more seconds ago."""
+        if not self.has(section):
+            return True
+        if self.reseed_interval is None:
+            return False
+        seeded_at = self._snapshot.meta.get('seeded_at', {}).get(section, 0.0)
+        return time.time() - seeded_at >= self.reseed_interval
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    # Changes
+
+    def put_events(self, events):
+        self._append([{'op': 'event', 'event': event} for event in events])
+
+    def delete_event(self, title):
+        self._append([{'op': 'event_delete', 'title': title}])
+
+    def put_task(self, task):
+        self._append([{'op': 'task', 'task': task}])
+
+    def delete_task(self, title):
+        self._append([{'op': 'task_delete', 'title': title}])
+
+    def put_goal(self, title, created, target_milestones=DEFAULT_TARGET_MILESTONES, target_date=None):
+        """Define or redefine a goal; its milestone counters are kept."""
+        self._append([{'op': 'goal', 'title': title, 'created': created,
+                       'target_milestones': int(target_milestones), 'target_date': target_date}])
+
+    def add_milestone(self, title, timestamp):
+        self._append([{'op': 'milestone', 'title': title, 'timestamp': timestamp}])
+
+    def _append(self, ops):
+        # Parse before logging so the log never holds a record that cannot be replayed
+        entries = [self._entry(op) for op in ops]
+        with self._lock:
+            records = []
+            for op in ops:
+                self._sequence += 1
+                body = struct.pack('<Q', self._sequence) + _dumps(op)
+                records.append(struct.pack('<II', len(body) - 8, zlib.crc32(body)) + body)
+            data = memoryview(b''.join(records))
+            while data:
+                data = data[os.write(self._log_fd, data):]
+            if self.sync:
+                os.fsync(self._log_fd)
+            for op, entry in zip(ops, entries):
+                self._apply(op, entry)
+            self._pending += len(ops)
+            if self._pending >= self.snapshot_every or (
+                    self.snapshot_interval is not None
+                    and time.time() - self._snapshot.written_at >= self.snapshot_interval):
+                self.snapshot()
+
+    @staticmethod
+    def _entry(op):
+        if op['op'] == 'event':
+            record = EventRecord.from_event(op['event'])
+            return record.start, record.end, bool(op['event'].get('recurrence')), op['event']
+        if op['op'] == 'task':
+            return _deadline(op['task']), op['task']
+        if op['op'] not in ('event_delete', 'task_delete', 'goal', 'milestone'):
+            raise ValueError(f"Unknown state operation {op['op']!r}.")
+        return None
+
+    def _apply(self, op, entry=None):
+        kind = op['op']
+        if kind in ('event', 'task'):
+            entry = entry or self._entry(op)
+            (self._events if kind == 'event' else self._tasks)[op[kind]['title']] = entry
+        elif kind == 'event_delete':
+            self._events[op['title']] = None
+        elif kind == 'task_delete':
+            self._tasks[op['title']] = None
+        elif kind == 'goal':
+            row = self._goal_row(op['title'])
+            row[0] = float(op['created'])
+            row[1] = op['target_milestones']
+            row[2] = math.nan if op['target_date'] is None else float(op['target_date'])
+        elif kind == 'milestone':
+            row = self._goal_row(op['title'])
+            row[3] += 1
+            row[4] = op['timestamp'] if math.isnan(row[4]) else max(row[4], op['timestamp'])
+        else:
+            raise ValueError(f"Unknown state operation {kind!r}.")
+
+    def _goal_row(self, title):
+        row = self._goals.get(title)
+        if row is None:
+            position = self._snapshot.goal_row(title)
+            if position is None:
+                row = [math.nan, DEFAULT_TARGET_MILESTONES, math.nan, 0, math.nan]
+            else:
+                row = [self._snapshot.column(tag)[position].item()
+                       for tag in (b'GLCR', b'GLTG', b'GLTD', b'GLMC', b'GLLM')]
+                self._shadowed_goal_rows.add(position)
+            self._goals[title] = row
+        return row
+
+    # Queries
+
+    def window_events(self, window_start, window_end):
+        """Events that may fall in ``[window_start, window_end)``: one-off events that overlap
+        it, plus every recurring series that has started by its end (expanding them is up to
+        the caller)."""
+        with self._lock:
+            snapshot = self._snapshot
+            starts, ends = snapshot.column(b'EVST'), snapshot.column(b'EVEN')
+            recurring = snapshot.column(b'EVRC')
+            # Rows are sorted by start, and no one-off event is longer than max_event_duration
+            lo = int(np.searchsorted(starts, window_start - snapshot.meta.get('max_event_duration', 0)))
+            hi = int(np.searchsorted(starts, window_end))
+            rows = lo + np.nonzero(ends[lo:hi] > window_start)[0]
+            # A series starting after the window has no occurrence in it
+            rows = np.concatenate([rows[~np.isin(rows, recurring)], recurring[starts[recurring] < window_end]])
+            events = []
+            for row in rows.tolist():
+                event = snapshot.event(row)
+                if event['title'] not in self._events:
+                    events.append(event)
+            for entry in self._events.values():
+                if entry and entry[0] < window_end and (entry[2] or entry[1] > window_start):
+                    events.append(dict(entry[3]))
+            return events
+
+    def events(self):
+        """Every event, in start order for the snapshot part."""
+        with self._lock:
+            snapshot = self._snapshot
+            events = [event for event in map(snapshot.event, range(len(snapshot.column(b'EVST'))))
+                      if event['title'] not in self._events]
+            events.extend(dict(entry[3]) for entry in self._events.values() if entry)
+            return events
+
+    def tasks(self, limit=None):
+        """Tasks earliest deadline first; ``limit`` stops after that many, decoding no more."""
+        with self._lock:
+            snapshot = self._snapshot
+            deadlines = snapshot.column(b'TKDL')
+
+            def from_snapshot():
+                # Rows are stored sorted by (deadline, title), which is also a valid min-heap
+                for row in range(len(deadlines)):
+                    task = snapshot.task(row)
+                    if task['title'] not in self._tasks:
+                        yield int(deadlines[row]), task['title'], task
+
+            overlay = sorted((entry[0], title, entry[1]) for title, entry in self._tasks.items() if entry)
+            merged = heapq.merge(from_snapshot(), overlay, key=lambda item: item[:2])
+            return [dict(task) for _, _, task in itertools.islice(merged, limit)]
+
+    def goal_columns(self, titles=None):
+        """Goals as the columns ``summarize_goals`` takes, with milestone counters included.
+
+        With ``titles``, only those goals are looked up, in ``log n`` each.
+        """
+        with self._lock:
+            if titles is not None:
+                rows = [(title, self._goal_values(title)) for title in titles]
+                return self._columns([(title, row) for title, row in rows if row and not math.isnan(row[0])])
+            return self._columns(self._goal_table(include_pending=False))
+
+    def _goal_values(self, title):
+        if title in self._goals:
+            return self._goals[title]
+        position = self._snapshot.goal_row(title)
+        if position is None:
+            return None
+        return [self._snapshot.column(tag)[position].item() for tag in (b'GLCR', b'GLTG', b'GLTD', b'GLMC', b'GLLM')]
+
+    def _goal_table(self, include_pending):
+        """``(title, [created, target, target_date, count, last])`` for every goal; pending
+        rows are milestones logged for a goal that has not been defined yet."""
+        snapshot = self._snapshot
+        created = snapshot.column(b'GLCR')
+        keep = np.ones(len(created), dtype=bool)
+        keep[list(self._shadowed_goal_rows)] = False
+        if not include_pending:
+            keep &= ~np.isnan(created)
+        rows = np.nonzero(keep)[0]
+        values = np.column_stack([snapshot.column(tag)[rows].astype(np.float64)
+                                  for tag in (b'GLCR', b'GLTG', b'GLTD', b'GLMC', b'GLLM')])
+        table = [(snapshot.goal_title(row), value) for row, value in zip(rows.tolist(), values.tolist())]
+        table.extend((title, row) for title, row in self._goals.items()
+                     if include_pending or not math.isnan(row[0]))
+        return table
+
+    @staticmethod
+    def _columns(table):
+        values = np.array([row for _, row in table], dtype=np.float64).reshape(len(table), 5)
+        return {
+            'title': np.array([title for title, _ in table], dtype=object),
+            'created': values[:, 0],
+            'target_milestones': values[:, 1].astype(np.int64),
+            'target_date': values[:, 2],
+            'milestone_count': values[:, 3].astype(np.int64),
+            'last_milestone': values[:, 4],
+        }
+
+    # Snapshots
+
+    def replace_events(self, events):
+        """Seed (or reseed) the schedule from a full scan."""
+        self.snapshot(events=list(events))
+
+    def replace_tasks(self, tasks):
+        self.snapshot(tasks=list(tasks))
+
+    def replace_goals(self, goals):
+        """Seed goal counters from columns like ``load_ledgers`` returns plus
+        ``milestone_count`` and ``last_milestone``."""
+        table = list(zip(
+            (str(title) for title in goals['title']),
+            np.column_stack([np.asarray(goals[name], dtype=np.float64) for name in GOAL_COLUMNS]).tolist()
+            if len(goals['title']) else [],
+        ))
+        self.snapshot(goals=table)
+
+    @instrument('state.snapshot')
+    def snapshot(self, events=None, tasks=None, goals=None):
+        """Write the merged state, with any given sections replaced, to a new snapshot
+        and truncate the delta log."""
+        try:
+            with self._lock:
+                written_at = time.time()
+                seeded = [name for name, given in zip(SECTIONS, (events, tasks, goals)) if given is not None]
+                seeded_at = dict(self._snapshot.meta.get('seeded_at', {}), **dict.fromkeys(seeded, written_at))
+                sections, max_event_duration = self._event_sections(self.events() if events is None else events)
+                sections.update(self._task_sections(self.tasks() if tasks is None else tasks))
+                sections.update(self._goal_sections(self._goal_table(include_pending=True) if goals is None else goals))
+                meta = {'sections': sorted(set(self._snapshot.meta['sections']).union(seeded)),
+                        'max_event_duration': max_event_duration, 'seeded_at': seeded_at}
+                self._write({b'META': _dumps(meta), **sections}, written_at)
+
+                os.ftruncate(self._log_fd, 0)
+                previous = self._snapshot
+                self._snapshot = _Snapshot(self.snapshot_path)
+                previous.close()
+                self._reset_overlay()
+                self._pending = 0
+            logger.info(f"State snapshot written at sequence {self._sequence}.")
+        except Exception as e:
+            logger.exception("Error in snapshot.")
+            raise e
+
+    @staticmethod
+    def _event_sections(events):
+        rows = []
+        for event in {event['title']: event for event in events}.values():
+            record = EventRecord.from_event(event)
+            rows.append((record.start, record.end, bool(event.get('recurrence')), _dumps(event)))
+        rows.sort(key=lambda row: row[0])
+        offsets, blob = _pack([row[3] for row in rows])
+        max_event_duration = max((end - start for start, end, recurring, _ in rows if not recurring), default=0)
+        return {
+            b'EVST': np.array([row[0] for row in rows], dtype='<i8'),
+            b'EVEN': np.array([row[1] for row in rows], dtype='<i8'),
+            b'EVRC': np.array([i for i, row in enumerate(rows) if row[2]], dtype='<i8'),
+            b'EVOF': offsets,
+            b'EVDT': blob,
+        }, max_event_duration
+
+    @staticmethod
+    def _task_sections(tasks):
+        rows = sorted((_deadline(task), task['title'], _dumps(task)) for task in {t['title']: t for t in tasks}.values())
+        offsets, blob = _pack([row[2] for row in rows])
+        return {b'TKDL': np.array([row[0] for row in rows], dtype='<i8'), b'TKOF': offsets, b'TKDT': blob}
+
+    @staticmethod
+    def _goal_sections(table):
+        table = sorted(table, key=lambda item: item[0])
+        offsets, blob = _pack([title.encode('utf-8') for title, _ in table])
+        values = np.array([row for _, row in table], dtype=np.float64).reshape(len(table), 5)
+        return {
+            b'GLOF': offsets,
+            b'GLTI': blob,
+            b'GLCR': values[:, 0].astype('<f8'),
+            b'GLTG': values[:, 1].astype('<i8'),
+            b'GLTD': values[:, 2].astype('<f8'),
+            b'GLMC': values[:, 3].astype('<i8'),
+            b'GLLM': values[:, 4].astype('<f8'),
+        }
+
+    def _write(self, sections, written_at):
+        table, chunks = [], []
+        offset = HEADER.size + len(sections) * SECTION.size
+        for tag, data in sections.items():
+            data = data.tobytes() if hasattr(data, 'tobytes') else bytes(data)
+            padding = -offset % 8
+            chunks.append(b'\0' * padding + data)
+            offset += padding
+            table.append(SECTION.pack(tag, offset, len(data)))
+            offset += len(data)
+        temporary = self.snapshot_path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(sections), self._sequence, written_at))
+            f.write(b''.join(table))
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+
+    def close(self, snapshot=False):
+        """Close the log; with ``snapshot``, first fold any logged changes into a new snapshot."""
+        with self._lock:
+            if snapshot and self._pending and self._log_fd is not None:
+                self.snapshot()
+            if self._log_fd is not None:
+                os.close(self._log_fd)
+                self._log_fd = None
+            self._snapshot.close()
+
+
+def state_from_env():
+    """A StateStore in AGENT_STATE_DIR, reseeded every AGENT_STATE_RESEED_SECONDS (default an hour),
+    or None when AGENT_STATE_DIR is not set."""
+    directory = os.getenv('AGENT_STATE_DIR')
+    if not directory:
+        return None
+    return StateStore(directory, reseed_interval=float(os.getenv('AGENT_STATE_RESEED_SECONDS', '3600')))
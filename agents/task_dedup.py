@@ -0,0 +1,259 @@
+import re
+import zlib
+from collections import OrderedDict
+from agents.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+STOPWORDS = frozenset('a an the to for of and in on with by at my our your'.split())
+# Generic task verbs say little about what a task is about ("Prepare" vs "Draft" marketing plan)
+GENERIC_VERBS = frozenset(
+    'prepare draft write review finalize update plan create make do finish complete work start '
+    'discuss present send check attend follow'.split()
+)
+MAX_DESCRIPTION_CHARS = 500
+
+
+class HashingEmbedder:
+    """Offline embedding: signed feature hashing of words and character trigrams.
+
+    Good enough to catch reworded or re-typed tasks; pass a real embedding
+    function (e.g. ``OpenAIEmbeddings().embed_documents``) to
+    ``TaskDeduplicator`` for semantic matching.
+    """
+
+    def __init__(self, dim=512, vocabulary_size=100_000):
+        self.dim = dim
+        self.vocabulary_size = vocabulary_size
+        self._features = {}
+
+    def _word_features(self, word):
+        """Sparse ``(indices, values)`` of one word, cached since vocabularies are small."""
+        features = self._features.get(word)
+        if features is None:
+            weight = 0.25 if word in GENERIC_VERBS else 1.0
+            padded = f"#{word}#"
+            indices, values = [], []
+            for position, feature in enumerate([word] + [padded[i:i + 3] for i in range(len(word))]):
+                h = zlib.crc32(feature.encode('utf-8'))
+                indices.append(h % self.dim)
+                values.append((1.0 if h & 0x80000000 else -1.0) * weight * (1.0 if position == 0 else 0.5))
+            if len(self._features) >= self.vocabulary_size:
+                self._features.clear()
+            features = self._features[word] = (indices, values)
+        return features
+
+    def __call__(self, texts):
+        flat, values = [], []
+        for row, text in enumerate(texts):
+            base = row * self.dim
+            for word in re.findall(r'[a-z0-9]+', text.lower()):
+                if word in STOPWORDS:
+                    continue
+                word_indices, word_values = self._word_features(word)
+                flat.extend(base + index for index in word_indices)
+                values.extend(word_values)
+        counts = np.bincount(np.array(flat, dtype=np.int64), weights=np.array(values), minlength=len(texts) * self.dim)
+        return counts.reshape(len(texts), self.dim).astype(np.float32)
+
+
+class ANNIndex:
+    """Cosine-similarity index over unit vectors using random-hyperplane LSH.
+
+    Small indexes are searched exactly; past ``exact_below`` vectors, only the
+    candidates sharing a bucket in at least one of ``tables`` hash tables are
+    scored.
+    """
+
+    def __init__(self, dim, tables=16, bits=8, seed=0, exact_below=2048):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.exact_below = exact_below
+        self.tables = tables
+        self.bits = bits
+        self.planes = rng.standard_normal((dim, tables * bits)).astype(np.float32)
+        self.weights = 1 << np.arange(bits)
+        self.keys = []
+        self.positions = {}
+        self.vectors = np.zeros((64, dim), dtype=np.float32)
+        self.codes = np.zeros((tables, 64), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def _codes(self, vectors):
+        # One bucket code per (table, vector)
+        signs = (vectors @ self.planes > 0).reshape(len(vectors), self.tables, self.bits)
+        return (signs @ self.weights).T
+
+    def add_many(self, keys, vectors):
+        new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self.positions]
+        if not new:
+            return
+        size = len(self.keys)
+        if size + len(new) > len(self.vectors):
+            capacity = max(2 * len(self.vectors), size + len(new))
+            vectors_grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors_grown[:size] = self.vectors[:size]
+            codes_grown = np.zeros((len(self.codes), capacity), dtype=np.int32)
+            codes_grown[:, :size] = self.codes[:, :size]
+            self.vectors, self.codes = vectors_grown, codes_grown
+        block = np.array([vector for _, vector in new], dtype=np.float32)
+        self.vectors[size:size + len(new)] = block
+        self.codes[:, size:size + len(new)] = self._codes(block)
+        for offset, (key, _) in enumerate(new):
+            self.positions[key] = size + offset
+            self.keys.append(key)
+
+    def add(self, key, vector):
+        self.add_many([key], [vector])
+
+    def query(self, vector, k=5, min_score=0.0):
+        """Return up to ``k`` ``(key, score)`` pairs scoring at least ``min_score``, best first."""
+        size = len(self.keys)
+        if not size:
+            return []
+        vector = np.asarray(vector, dtype=np.float32)
+        if size < self.exact_below:
+            candidates = np.arange(size)
+        else:
+            codes = self._codes(vector[None, :])
+            candidates = np.nonzero((self.codes[:, :size] == codes).any(axis=0))[0]
+        scores = self.vectors[candidates] @ vector
+        keep = scores >= min_score
+        candidates, scores = candidates[keep], scores[keep]
+        best = np.argsort(-scores, kind='stable')[:k]
+        return [(self.keys[candidates[i]], float(scores[i])) for i in best]
+
+
+class TaskDeduplicator:
+    """Flags near-duplicate tasks by cosine similarity of title + description embeddings.
+
+    Embeddings are computed in batches and cached by text, so re-checking or
+    re-clustering known tasks costs no embedding calls.
+    """
+
+    def __init__(self, embed=None, threshold=0.8, batch_size=64, cache_size=100_000, index=None):
+        self.embed = embed or HashingEmbedder()
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.index = index
+        # The task first indexed under each title, so a task is not reported as a duplicate of itself
+        self._indexed = {}
+
+    @staticmethod
+    def task_text(task):
+        description = (task.get('description') or '')[:MAX_DESCRIPTION_CHARS]
+        return f"{task['title']}. {description}" if description else task['title']
+
+    def embed_tasks(self, tasks):
+        texts = [self.task_text(task) for task in tasks]
+        vectors = {}
+        for text in texts:
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                vectors[text] = self._cache[text]
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            embedded = np.asarray(self.embed(batch), dtype=np.float32)
+            norms = np.linalg.norm(embedded, axis=1, keepdims=True)
+            embedded = embedded / np.where(norms == 0, 1.0, norms)
+            for text, vector in zip(batch, embedded):
+                vectors[text] = self._cache[text] = vector
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return np.array([vectors[text] for text in texts], dtype=np.float32)
+
+    def _ensure_index(self, dim):
+        if self.index is None:
+            self.index = ANNIndex(dim)
+        return self.index
+
+    @staticmethod
+    def _numbers(title):
+        # "Q1 report" and "Q2 report" are different tasks however similar they look
+        return set(re.findall(r'\d+', title))
+
+    def _matches(self, task, candidates):
+        numbers = self._numbers(task['title'])
+        for key, score in candidates:
+            if key != task['title'] and self._numbers(key) == numbers:
+                return key, score
+        return None
+
+    def find_duplicate(self, task):
+        """Return ``(title, similarity)`` of the closest known near-duplicate, or None."""
+        vector = self.embed_tasks([task])[0]
+        index = self._ensure_index(len(vector))
+        title = task['title']
+        if title in index and self._indexed.get(title) is not task:
+            # A known title is the same task whatever its description says
+            return title, float(index.vectors[index.positions[title]] @ vector)
+        return self._matches(task, index.query(vector, k=5, min_score=self.threshold))
+
+    def add_many(self, tasks):
+        tasks = [task for task in tasks if task and task.get('title')]
+        if not tasks:
+            return
+        vectors = self.embed_tasks(tasks)
+        self._ensure_index(vectors.shape[1]).add_many([task['title'] for task in tasks], vectors)
+        for task in tasks:
+            self._indexed.setdefault(task['title'], task)
+
+    def add(self, task):
+        self.add_many([task])
+
+    def cluster(self, tasks):
+        """Group tasks into near-duplicate clusters; returns lists of titles with more than one member."""
+        by_title = {task['title']: task for task in tasks if task and task.get('title')}
+        if not by_title:
+            return []
+        titles = list(by_title)
+        vectors = self.embed_tasks(list(by_title.values()))
+
+        parent = list(range(len(titles)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Only tasks with the same numbers can be duplicates, so compare within those groups
+        groups = {}
+        for i, title in enumerate(titles):
+            groups.setdefault(frozenset(self._numbers(title)), []).append(i)
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            members = np.array(members)
+            for i, j in self._similar_pairs(vectors[members]):
+                parent[find(members[i])] = find(members[j])
+
+        clusters = {}
+        for i, title in enumerate(titles):
+            clusters.setdefault(find(i), []).append(title)
+        return sorted((group for group in clusters.values() if len(group) > 1), key=lambda group: group[0])
+
+    def _similar_pairs(self, vectors, block_size=1024):
+        """Yield index pairs ``(i, j)``, ``i < j``, whose similarity reaches the threshold."""
+        if len(vectors) <= 4 * block_size:
+            for start in range(0, len(vectors), block_size):
+                scores = vectors[start:start + block_size] @ vectors.T
+                rows, columns = np.nonzero(scores >= self.threshold)
+                for i, j in zip(rows + start, columns):
+                    if i < j:
+                        yield int(i), int(j)
+            return
+        index = ANNIndex(vectors.shape[1], exact_below=0)
+        index.add_many(range(len(vectors)), vectors)
+        for i, vector in enumerate(vectors):
+            for j, _ in index.query(vector, k=10, min_score=self.threshold):
+                if i < j:
+                    yield i, j
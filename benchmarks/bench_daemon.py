@@ -0,0 +1,150 @@
+"""Compare request latency against a warm daemon with the cold one-shot path.
+
+The cold path is what a scheduled ``main.py`` run pays: a fresh interpreter
+that imports the agents and the client libraries they use, builds the agents
+and performs one operation. The warm path is one HTTP request to an
+``AgentDaemon`` that already holds its agents. Both run against the fakes in
+``benchmarks.fakes``, so network and OAuth time are excluded and the real
+gap is larger.
+
+Usage: python -m benchmarks.bench_daemon [--requests 200] [--cold-runs 5] [--no-client-imports]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from loguru import logger
+from benchmarks import datagen
+from benchmarks.fakes import (
+    FakeCalendarService, FakeLangMem, FakeLettaClient, FakeLLM, FakeTasksService,
+    InMemoryChromaClient, InMemoryStore,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries the real clients import on first use; the one-shot path always pays for them
+CLIENT_LIBRARIES = ['chromadb', 'langchain_openai', 'langmem', 'letta', 'googleapiclient.discovery', 'matplotlib.pyplot']
+
+COLD_SCRIPT = """
+import importlib, os, sys, tempfile
+from loguru import logger
+logger.remove()
+for name in {libraries!r}:
+    try:
+        importlib.import_module(name)
+    except Exception:
+        pass
+os.chdir(tempfile.mkdtemp(prefix='agent-bench-'))
+sys.path.insert(0, {root!r})
+from benchmarks.bench_daemon import build_daemon, OPERATIONS
+daemon = build_daemon()
+daemon.call({operation!r}, OPERATIONS[{operation!r}])
+daemon.outbox.close()
+"""
+
+OPERATIONS = {
+    'add_task': {'task': datagen.generate_tasks(1)[0]},
+    'find_slot': {'meeting': {'duration': 60, 'window_start': '2024-12-02T00:00:00Z'}},
+    'log_milestone': {'goal_title': 'Goal 0', 'milestone': 'Reviewed roadmap'},
+    'summarize': {'title': 'Meeting Notes 0'},
+}
+
+
+def build_daemon():
+    from agents.daemon import AgentDaemon
+    from agents.goal_tracker_agent import GoalTrackerAgent
+    from agents.knowledge_retrieval_agent import KnowledgeRetrievalAgent
+    from agents.outbox import Outbox
+    from agents.reminder_agent import ReminderAgent
+    from agents.scheduler_agent import SchedulerAgent
+
+    outbox = Outbox(db_path=os.path.join(tempfile.mkdtemp(prefix='agent-bench-'), 'outbox.db'))
+    knowledge = KnowledgeRetrievalAgent(
+        db_path=tempfile.gettempdir(), chroma_client=InMemoryChromaClient(), llm=FakeLLM()
+    )
+    knowledge.store_document(*datagen.generate_documents(1)[0])
+    goals = GoalTrackerAgent(client=FakeLettaClient())
+    goals.input_goal(datagen.generate_goals(1)[0][0])
+    return AgentDaemon(
+        scheduler=SchedulerAgent(
+            chroma_client=InMemoryStore(datagen.generate_calendar(200)), langmem_client=FakeLangMem(),
+            llm=FakeLLM(), calendar_service=FakeCalendarService(), outbox=outbox,
+        ),
+        reminder=ReminderAgent(
+            chroma_client=InMemoryStore(), langmem_client=FakeLangMem(), tasks_service=FakeTasksService(),
+            outbox=outbox,
+        ),
+        knowledge=knowledge,
+        goals=goals,
+        outbox=outbox,
+    )
+
+
+def cold_latencies(operation, runs, libraries):
+    script = COLD_SCRIPT.format(libraries=libraries, root=ROOT, operation=operation)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], check=True, cwd=ROOT, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def warm_latencies(client, operation, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.call(operation, **OPERATIONS[operation])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(timings, q):
+    ordered = sorted(timings)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help="warm requests per operation")
+    parser.add_argument('--cold-runs', type=int, default=5, help="one-shot processes per operation")
+    parser.add_argument('--no-client-imports', action='store_true',
+                        help="do not charge the cold path for importing the client libraries")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level='ERROR')
+    from agents.daemon import DaemonClient, TCPServer
+
+    previous = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='agent-bench-'))
+    daemon = build_daemon()
+    server = TCPServer(('127.0.0.1', 0), daemon)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = DaemonClient(port=server.server_address[1])
+    libraries = [] if args.no_client_imports else CLIENT_LIBRARIES
+    try:
+        print(f"{'operation':<16} {'warm p50':>10} {'warm p99':>10} {'cold p50':>10} {'speed-up':>9}")
+        for operation in OPERATIONS:
+            warm = warm_latencies(client, operation, args.requests)
+            cold = cold_latencies(operation, args.cold_runs, libraries)
+            warm_p50 = statistics.median(warm)
+            cold_p50 = statistics.median(cold)
+            print(
+                f"{operation:<16} {1000 * warm_p50:8.2f}ms {1000 * percentile(warm, 0.99):8.2f}ms "
+                f"{1000 * cold_p50:8.1f}ms {cold_p50 / warm_p50:8.0f}x"
+            )
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+        os.chdir(previous)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Compare restart cost with and without the agent state snapshot.
+
+Cold is what every start used to pay before answering its first query: a full
+scan of the schedule into sorted EventRecords, sorting every task by
+deadline, and reading both goal ledgers to count milestones. Warm opens a
+``StateStore`` (memory-mapping the snapshot and replaying a delta log of
+``--log-records`` changes) and answers the same first queries:
+
+- the events of one day;
+- the ten earliest tasks;
+- one goal's counters.
+
+Opening stays flat as the data grows. The first queries grow only with what
+they return: every recurring series is part of a window's answer, and
+datagen makes 2% of events recurring.
+
+Usage: python -m benchmarks.bench_restart [--sizes 1000 10000 100000] [--log-records 1000] [--repeats 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from operator import attrgetter
+from loguru import logger
+from benchmarks import datagen
+from benchmarks.run import goal_records
+
+
+def build(directory, size, log_records):
+    from agents.goal_analytics import load_ledgers, milestone_counters
+    from agents.goal_io import import_records
+    from agents.state_store import StateStore
+
+    events = datagen.generate_calendar(size)
+    tasks = datagen.generate_tasks(size)
+    goals_dir = os.path.join(directory, 'goals')
+    goals = datagen.generate_goals(max(size // 10, 1))
+    import_records([goal_records(goals)], goals_dir, write_goal_files=False, now=0.0)
+
+    state = StateStore(os.path.join(directory, 'state'), snapshot_every=log_records + 1, snapshot_interval=None)
+    state.replace_events(events)
+    state.replace_tasks(tasks)
+    columns, milestones = load_ledgers(goals_dir)
+    count, last = milestone_counters(columns, milestones)
+    state.replace_goals(dict(columns, milestone_count=count, last_milestone=last))
+    for i in range(log_records):
+        if i % 2:
+            state.add_milestone(goals[i % len(goals)][0]['title'], float(i))
+        else:
+            state.put_task(dict(tasks[i % len(tasks)], deadline='2024-12-01'))
+    state.close()
+    return events, tasks, goals_dir, goals[0][0]['title']
+
+
+def cold_start(events, tasks, goals_dir, title):
+    from agents.event_record import EventRecord
+    from agents.goal_analytics import load_ledgers, milestone_counters
+    from agents.state_store import _deadline
+    records = sorted(map(EventRecord.from_event, events), key=attrgetter('start'))
+    by_deadline = sorted(tasks, key=_deadline)[:10]
+    columns, milestones = load_ledgers(goals_dir)
+    count, _ = milestone_counters(columns, milestones)
+    return len(records), len(by_deadline), int(count[list(columns['title']).index(title)])
+
+
+def open_state(directory):
+    from agents.state_store import StateStore
+    return StateStore(os.path.join(directory, 'state'), snapshot_interval=None)
+
+
+def warm_start(directory, window_start, title):
+    state = open_state(directory)
+    try:
+        events = state.window_events(window_start, window_start + 86400)
+        tasks = state.tasks(limit=10)
+        goal = state.goal_columns([title])
+        return len(events), len(tasks), int(goal['milestone_count'][0])
+    finally:
+        state.close()
+
+
+def timed(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--log-records', type=int, default=1_000, help="changes in the delta log at restart")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level='ERROR')
+    from agents.event_record import parse_timestamp
+
+    print(f"{'records':>9} {'cold':>11} {'warm':>11} {'(open)':>11} {'snapshot':>10} {'speed-up':>9}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp(prefix='agent-bench-')
+        try:
+            events, tasks, goals_dir, title = build(directory, size, args.log_records)
+            window_start = parse_timestamp(events[len(events) // 2]['start_time'])
+            cold = timed(lambda: cold_start(events, tasks, goals_dir, title), args.repeats)
+            warm = timed(lambda: warm_start(directory, window_start, title), args.repeats)
+            opened = timed(lambda: open_state(directory).close(), args.repeats)
+            snapshot_mb = os.path.getsize(os.path.join(directory, 'state', 'snapshot.bin')) / 1e6
+            print(
+                f"{size:>9} {1000 * cold:9.1f}ms {1000 * warm:9.2f}ms {1000 * opened:9.2f}ms "
+                f"{snapshot_mb:8.1f}MB {cold / warm:8.1f}x"
+            )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
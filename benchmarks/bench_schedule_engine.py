@@ -0,0 +1,43 @@
+"""Benchmark conflict detection and rescheduling on large synthetic calendars.
+
+Usage: python -m benchmarks.bench_schedule_engine [n_events ...]
+"""
+import random
+import sys
+import time
+from agents.schedule_engine import find_conflicts, reschedule
+
+
+def generate_events(n, seed=0, conflict_rate=0.1):
+    rng = random.Random(seed)
+    starts, ends, priorities, fixed = [], [], [], []
+    t = 0
+    for _ in range(n):
+        duration = rng.choice([1800, 3600, 5400])
+        # Most events are laid out back to back; a fraction overlap their predecessor
+        start = t - rng.randrange(900, 1800, 300) if starts and rng.random() < conflict_rate else t
+        starts.append(start)
+        ends.append(start + duration)
+        priorities.append(rng.randint(1, 3))
+        fixed.append(rng.random() < 0.02)
+        t = max(t, start + duration)
+    return starts, ends, priorities, fixed
+
+
+def run(n):
+    starts, ends, priorities, fixed = generate_events(n)
+
+    t0 = time.perf_counter()
+    conflicts = find_conflicts(starts, ends)
+    t1 = time.perf_counter()
+    moves = reschedule(starts, ends, priorities=priorities, fixed=fixed, buffer_seconds=600,
+                       working_hours=(9 * 3600, 17 * 3600))
+    t2 = time.perf_counter()
+
+    print(f"{n:>8} events  {len(conflicts):>7} conflicts  {len(moves):>7} moved  "
+          f"detect {1000 * (t1 - t0):8.1f} ms  reschedule {1000 * (t2 - t1):8.1f} ms")
+
+
+if __name__ == '__main__':
+    for n in [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]:
+        run(n)
@@ -0,0 +1,76 @@
+"""Scaling of sharded scheduling across worker processes.
+
+Builds an organization calendar (``datagen.generate_org_calendar``), expands
+it into EventRecords once, then times ``ShardPool.reschedule`` over every
+team and ``ShardPool.find_slots`` for a batch of meetings, each with 1 to N
+workers. Pools are started before timing. Expanding the events and writing
+moves back stay in the calling process and are not part of these numbers.
+
+Usage: python -m benchmarks.bench_sharding [--teams 200] [--events-per-team 500] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from loguru import logger
+from benchmarks import datagen
+
+
+def timed(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--events-per-team', type=int, default=500)
+    parser.add_argument('--shared-rate', type=float, default=0.05, help="fraction of events involving two teams")
+    parser.add_argument('--meetings', type=int, default=2_000, help="meetings per find_slots batch")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1))))
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level='ERROR')
+    from agents.event_record import EventRecord
+    from agents.sharding import ShardPool
+
+    events = datagen.generate_org_calendar(args.teams, args.events_per_team, shared_rate=args.shared_rate)
+    records = [EventRecord.from_event(event) for event in events]
+    rng = random.Random(0)
+    teams = sorted({event.get('team') for event in events} - {None})
+    meetings = [
+        ({'teams': rng.sample(teams, min(len(teams), rng.randint(1, 3)))},
+         datagen.BASE_TIME + rng.randrange(0, 30) * 86400, rng.choice([1800, 3600]))
+        for _ in range(args.meetings)
+    ]
+    print(f"{len(records)} events in {args.teams} teams on {cores} cores")
+
+    print(f"{'workers':>7} {'reschedule':>12} {'speed-up':>9} {'find_slots':>12} {'speed-up':>9}")
+    baseline = None
+    for workers in args.workers:
+        pool = ShardPool(workers)
+        try:
+            pool.find_slots(records, meetings[:1])  # start the workers
+            reschedule = timed(lambda: pool.reschedule(records), args.repeats)
+            slots = timed(lambda: pool.find_slots(records, meetings), args.repeats)
+        finally:
+            pool.close()
+        baseline = baseline or (reschedule, slots)
+        print(
+            f"{workers:>7} {1000 * reschedule:10.1f}ms {baseline[0] / reschedule:8.2f}x "
+            f"{1000 * slots:10.1f}ms {baseline[1] / slots:8.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Measure cold-start cost: importing each agent module and constructing the agent.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+so the numbers include everything pulled in transitively; the heaviest
+imports are listed so regressions (an eager ``import chromadb`` creeping
+back in) are easy to spot.
+
+Usage: python -m benchmarks.bench_startup [--top 5] [--repeats 3]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    'agents.scheduler_agent',
+    'agents.reminder_agent',
+    'agents.knowledge_retrieval_agent',
+    'agents.goal_tracker_agent',
+    'main',
+]
+
+# Constructed against the fakes, so only the agent's own start-up work is timed
+CONSTRUCT = {
+    'agents.scheduler_agent': (
+        "from benchmarks.fakes import FakeCalendarService, FakeLangMem, FakeLLM, InMemoryStore\n"
+        "SchedulerAgent(chroma_client=InMemoryStore(), langmem_client=FakeLangMem(), llm=FakeLLM(), "
+        "calendar_service=FakeCalendarService())"
+    ),
+    'agents.reminder_agent': (
+        "from benchmarks.fakes import FakeLangMem, FakeTasksService, InMemoryStore\n"
+        "ReminderAgent(chroma_client=InMemoryStore(), langmem_client=FakeLangMem(), tasks_service=FakeTasksService())"
+    ),
+    'agents.knowledge_retrieval_agent': (
+        "import tempfile\n"
+        "from benchmarks.fakes import FakeLLM, InMemoryChromaClient\n"
+        "KnowledgeRetrievalAgent(db_path=tempfile.gettempdir(), chroma_client=InMemoryChromaClient(), llm=FakeLLM())"
+    ),
+    'agents.goal_tracker_agent': (
+        "from benchmarks.fakes import FakeLettaClient\n"
+        "GoalTrackerAgent(client=FakeLettaClient())"
+    ),
+}
+
+TIMED_SCRIPT = """
+import time
+start = time.perf_counter()
+from {module} import *
+imported = time.perf_counter()
+{construct}
+constructed = time.perf_counter()
+print(imported - start, constructed - imported)
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """Return ``[(cumulative_us, module)]`` from ``-X importtime`` output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        entries.append((int(cumulative), name.strip()))
+    return entries
+
+
+def import_profile(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if result.returncode:
+        return None, result.stderr.strip().splitlines()[-1]
+    return parse_importtime(result.stderr), None
+
+
+def timed_start(module):
+    script = TIMED_SCRIPT.format(module=module, construct=CONSTRUCT.get(module, 'pass'))
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, cwd=ROOT)
+    if result.returncode:
+        return None
+    import_s, construct_s = map(float, result.stdout.split())
+    return import_s, construct_s
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=5, help="heaviest imports to list per module")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for module in MODULES:
+        profile, error = import_profile(module)
+        if profile is None:
+            print(f"{module:<36} import failed: {error}")
+            continue
+        runs = [run for run in (timed_start(module) for _ in range(args.repeats)) if run]
+        total_us = max(cumulative for cumulative, _ in profile)
+        line = f"{module:<36} importtime {total_us / 1000:8.1f} ms"
+        if runs:
+            import_s = statistics.median(run[0] for run in runs)
+            construct_s = statistics.median(run[1] for run in runs)
+            line += f"  wall import {1000 * import_s:8.1f} ms  construct {1000 * construct_s:7.2f} ms"
+        print(line)
+        # Only top-level packages, so one heavy dependency is not listed once per submodule
+        top_level = {}
+        for cumulative, name in profile:
+            root = name.split('.')[0]
+            if root != module.split('.')[0] and cumulative > top_level.get(root, 0):
+                top_level[root] = cumulative
+        for root, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {root:<32} {cumulative / 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
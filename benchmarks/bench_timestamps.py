@@ -0,0 +1,40 @@
+"""Micro-benchmark timestamp parsing and comparison.
+
+Compares the old approach (``strptime`` on every comparison) with parsing
+once into EventRecord epoch seconds and comparing integers.
+
+Usage: python -m benchmarks.bench_timestamps [n]
+"""
+import datetime
+import sys
+import timeit
+from agents.event_record import EventRecord, parse_timestamp
+
+FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def run(n):
+    stamps = [f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z" for i in range(n)]
+    offsets = [stamp[:-1] + '+02:00' for stamp in stamps]
+    records = [EventRecord(parse_timestamp(stamp), parse_timestamp(stamp) + 3600) for stamp in stamps]
+    pairs = list(zip(stamps, stamps[1:]))
+    record_pairs = list(zip(records, records[1:]))
+
+    cases = {
+        'strptime parse': lambda: [datetime.datetime.strptime(s, FORMAT) for s in stamps],
+        'fromisoformat parse': lambda: [datetime.datetime.fromisoformat(s) for s in offsets],
+        'parse_timestamp (Z)': lambda: [parse_timestamp(s) for s in stamps],
+        'parse_timestamp (offset)': lambda: [parse_timestamp(s) for s in offsets],
+        'parse_timestamp (zone)': lambda: [parse_timestamp(s[:-1], 'Europe/Berlin') for s in stamps],
+        'strptime compare': lambda: [
+            datetime.datetime.strptime(a, FORMAT) < datetime.datetime.strptime(b, FORMAT) for a, b in pairs
+        ],
+        'record compare': lambda: [a.end > b.start for a, b in record_pairs],
+    }
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=1, repeat=3))
+        print(f"{name:<26} {1e9 * seconds / n:9.1f} ns/op")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
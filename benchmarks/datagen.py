@@ -0,0 +1,97 @@
+"""Seeded generators for realistic calendars, tasks, documents and goals."""
+import random
+from agents.event_record import format_timestamp, parse_timestamp
+
+BASE_TIME = parse_timestamp('2024-12-02T00:00:00Z')  # a Monday
+TOPICS = ['roadmap', 'hiring', 'budget', 'launch', 'design', 'security', 'marketing', 'customer', 'infra', 'sales']
+VERBS = ['Prepare', 'Review', 'Draft', 'Finalize', 'Discuss', 'Plan', 'Update', 'Present']
+WORDS = ('the team agreed to revisit timeline scope risks owners metrics quarter launch customers budget '
+         'hiring pipeline design review security audit marketing campaign follow up next steps').split()
+
+
+def generate_calendar(n, seed=0, conflict_rate=0.1, recurring_rate=0.02):
+    """Weekday events between 9:00 and 18:00, some overlapping, a few recurring."""
+    rng = random.Random(seed)
+    events = []
+    day = 0
+    t = BASE_TIME + 9 * 3600
+    for i in range(n):
+        duration = rng.choice([1800, 1800, 3600, 3600, 5400])
+        if events and rng.random() < conflict_rate:
+            start = t - rng.choice([900, 1800])
+        else:
+            start = t + rng.choice([0, 0, 900, 1800])
+        event = {
+            'title': f"{rng.choice(VERBS)} {rng.choice(TOPICS)} #{i}",
+            'start_time': format_timestamp(start),
+            'end_time': format_timestamp(start + duration),
+            'participants_emails': [f"user{rng.randrange(50)}@example.com" for _ in range(rng.randint(1, 4))],
+            'priority': rng.randint(1, 3),
+        }
+        if rng.random() < recurring_rate:
+            event['recurrence'] = 'RRULE:FREQ=WEEKLY'
+            event['fixed'] = True
+        events.append(event)
+        t = max(t, start + duration)
+        if t - (BASE_TIME + day * 86400) >= 18 * 3600:
+            day += 1 if (day % 7) < 4 else 3
+            t = BASE_TIME + day * 86400 + 9 * 3600
+    return events
+
+
+def generate_org_calendar(teams, events_per_team, seed=0, shared_rate=0.05, **options):
+    """One ``generate_calendar`` per team; ``shared_rate`` of the events also involve another team."""
+    rng = random.Random(seed)
+    names = [f"team{t:03d}" for t in range(teams)]
+    events = []
+    for t, team in enumerate(names):
+        for event in generate_calendar(events_per_team, seed=seed * 100_003 + t, **options):
+            event['title'] = f"{team}: {event['title']}"
+            if teams > 1 and rng.random() < shared_rate:
+                event['teams'] = [team, rng.choice([other for other in names if other != team])]
+            else:
+                event['team'] = team
+            events.append(event)
+    return events
+
+
+def generate_tasks(n, seed=0, duplicate_rate=0.0):
+    """Tasks with deadlines up to two months out; ``duplicate_rate`` of them reword an earlier task."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        if tasks and duplicate_rate and rng.random() < duplicate_rate:
+            # Same task under a different verb, as people re-enter things they forgot they had added
+            original = rng.choice(tasks)
+            verb, rest = original['title'].split(' ', 1)
+            tasks.append(dict(original, title=f"{rng.choice([v for v in VERBS if v != verb])} {rest}"))
+            continue
+        tasks.append({
+            'title': f"{rng.choice(VERBS)} {rng.choice(TOPICS)} plan #{i}",
+            'deadline': format_timestamp(BASE_TIME + rng.randrange(1, 60) * 86400)[:10],
+            'goal': f"Goal {rng.randrange(max(n // 20, 1))}",
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))),
+        })
+    return tasks
+
+
+def generate_documents(n, words=800, seed=0):
+    rng = random.Random(seed)
+    return [
+        (f"Meeting Notes {i}", '. '.join(
+            ' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(words // 12)
+        ))
+        for i in range(n)
+    ]
+
+
+def generate_goals(n, milestones_per_goal=10, seed=0):
+    rng = random.Random(seed)
+    return [
+        (
+            {'title': f"Goal {i}", 'description': f"Ship {rng.choice(TOPICS)}", 'milestones': [],
+             'target_milestones': milestones_per_goal * 2},
+            [f"{rng.choice(VERBS)} {rng.choice(TOPICS)}" for _ in range(rng.randint(0, milestones_per_goal * 2))],
+        )
+        for i in range(n)
+    ]
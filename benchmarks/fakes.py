@@ -0,0 +1,358 @@
+"""Deterministic in-process stand-ins for the agents' external services.
+
+Every fake records how many calls it served and can add a fixed latency per
+call, so benchmarks can model network round trips without touching the
+network.
+"""
+import itertools
+import json
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+class _Latency:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class _Request:
+    def __init__(self, result):
+        self._result = result
+
+    def execute(self):
+        return self._result
+
+
+class FakeCalendarService(_Latency):
+    """Google Calendar ``service.events().insert(...).execute()``."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.events_by_id = {}
+        self._ids = itertools.count(1)
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        self._call()
+        event_id = body.get('id') or f"event{next(self._ids)}"
+        event = dict(body, id=event_id, htmlLink=f"https://calendar.local/{event_id}")
+        self.events_by_id[event_id] = event
+        return _Request(event)
+
+
+class _Deferred:
+    def __init__(self, service, apply):
+        self._service = service
+        self._apply = apply
+
+    def execute(self):
+        self._service._call()
+        return self._apply()
+
+
+class _BatchRequest:
+    """``BatchHttpRequest``: every added request runs in one round trip."""
+
+    def __init__(self, service, callback=None):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests))))
+
+    def execute(self):
+        if not self._requests:
+            return
+        self._service._call()
+        for request, callback, request_id in self._requests:
+            try:
+                response, exception = request._apply(), None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeTasksService(_Latency):
+    """Google Tasks ``service.tasks().insert/list(...).execute()`` and batch requests."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.tasks_by_list = {}
+
+    def tasks(self):
+        return self
+
+    def new_batch_http_request(self, callback=None):
+        return _BatchRequest(self, callback)
+
+    def insert(self, tasklist, body):
+        def apply():
+            task = dict(body, updated=time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()))
+            self.tasks_by_list.setdefault(tasklist, []).append(task)
+            return dict(task)
+        return _Deferred(self, apply)
+
+    def list(self, tasklist, updatedMin=None, pageToken=None, maxResults=100, **options):
+        def apply():
+            tasks = [task for task in self.tasks_by_list.get(tasklist, [])
+                     if updatedMin is None or task['updated'][:19] >= updatedMin[:19]]
+            start = int(pageToken or 0)
+            page = {'items': tasks[start:start + maxResults]}
+            if start + maxResults < len(tasks):
+                page['nextPageToken'] = str(start + maxResults)
+            return page
+        return _Deferred(self, apply)
+
+
+class FakeLLM(_Latency):
+    """Chat model whose ``invoke`` echoes a canned answer after ``latency`` seconds."""
+
+    def __init__(self, latency=0.0, response="1. Introductions\n2. Updates\n3. Next steps"):
+        super().__init__(latency)
+        self.response = response
+
+    def invoke(self, messages):
+        self._call()
+        return SimpleNamespace(content=self.response)
+
+
+class FakeLangMem(_Latency):
+    """The subset of the LangMem client used by ReminderAgent and SchedulerAgent."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.memories = []
+
+    def add_memory(self, memory):
+        self._call()
+        self.memories.append(memory)
+
+    def prioritize(self, tasks):
+        self._call()
+        return sorted(tasks, key=lambda task: task['deadline'])
+
+    def get_context(self, task):
+        self._call()
+        return f"Part of goal '{task.get('goal', '')}'."
+
+    def get_contexts(self, tasks):
+        self._call()
+        return [f"Part of goal '{task.get('goal', '')}'." for task in tasks]
+
+
+class InMemoryStore(_Latency):
+    """Keyed record store with the ``add/get/get_all/update`` API the agents call on Chroma."""
+
+    def __init__(self, records=None, latency=0.0):
+        super().__init__(latency)
+        self.records = {}
+        for record in records or []:
+            self.records[record['title']] = record
+
+    def add(self, key, record):
+        self._call()
+        self.records[key] = record
+
+    def update(self, key, record):
+        self._call()
+        self.records[key] = record
+
+    def get(self, key):
+        self._call()
+        return self.records.get(key)
+
+    def get_all(self):
+        self._call()
+        return list(self.records.values())
+
+
+class InMemoryCollection:
+    """Chroma collection with token-overlap ranking in place of embeddings."""
+
+    def __init__(self):
+        self.documents = {}
+        self.metadatas = {}
+
+    def add(self, documents, metadatas, ids):
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            self.documents[doc_id] = document
+            self.metadatas[doc_id] = metadata
+
+    def query(self, query_texts, n_results=10):
+        results = []
+        for text in query_texts:
+            terms = set(re.findall(r'\w+', text.lower()))
+            scored = sorted(
+                self.documents.items(),
+                key=lambda item: -len(terms & set(re.findall(r'\w+', item[1].lower()))),
+            )
+            results.append([document for _, document in scored[:n_results]])
+        return {'documents': results}
+
+
+class InMemoryChromaClient:
+    """Chroma client exposing the collection API used by KnowledgeRetrievalAgent."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, InMemoryCollection())
+
+    def get_collection(self, name):
+        return self.collections[name]
+
+
+class FakeLettaClient:
+    """Letta client that accepts GoalTrackerAgent's configuration calls."""
+
+    def __init__(self):
+        self.agents = {}
+
+    def set_default_embedding_config(self, config):
+        pass
+
+    def set_default_llm_config(self, config):
+        pass
+
+    def create_agent(self, name, **kwargs):
+        self.agents[name] = SimpleNamespace(id=f"agent-{len(self.agents) + 1}", name=name)
+        return self.agents[name]
+
+    def get_agent_id(self, agent_name):
+        agent = self.agents.get(agent_name)
+        return agent.id if agent else None
+
+    def get_agent(self, agent_id):
+        return next(agent for agent in self.agents.values() if agent.id == agent_id)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        self.reply("220 localhost ESMTP sink")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply("250 localhost")
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                if 'reject' in command.lower():
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(command)
+                    self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b".\r\n":
+                        break
+                    data.append(data_line)
+                self.server.received(b''.join(data), recipients)
+                self.reply("250 OK")
+            elif verb in ('RSET', 'NOOP'):
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Minimal SMTP sink on localhost that counts (and optionally keeps) messages."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, keep=False, latency=0.0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.port = self.server_address[1]
+        self.keep = keep
+        self.latency = latency
+        self.messages = []
+        self.count = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def received(self, data, recipients):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.count += 1
+            if self.keep:
+                self.messages.append(data)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status = self.server.received(json.loads(body))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalWebhookServer(ThreadingHTTPServer):
+    """Webhook receiver on localhost; answers 500 for recipients containing 'fail'."""
+
+    daemon_threads = True
+
+    def __init__(self, keep=False, latency=0.0):
+        super().__init__(('127.0.0.1', 0), _WebhookHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/hooks/notify"
+        self.keep = keep
+        self.latency = latency
+        self.payloads = []
+        self.count = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def received(self, payload):
+        if self.latency:
+            time.sleep(self.latency)
+        if 'fail' in (payload.get('recipient') or ''):
+            return 500
+        with self._lock:
+            self.count += 1
+            if self.keep:
+                self.payloads.append(payload)
+        return 204
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
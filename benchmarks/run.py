@@ -0,0 +1,397 @@
+"""End-to-end benchmark suite for the agents, run entirely against local fakes.
+
+Usage:
+    python -m benchmarks.run [--scales small medium] [--repeats 5] [--llm-latency 0.05]
+                             [--filter scheduler] [--output results.json] [--compare baseline.json]
+
+Results are written as JSON (one entry per benchmark and scale) so runs can be
+compared with ``--compare``.
+"""
+import argparse
+import contextlib
+import copy
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from loguru import logger
+from benchmarks import datagen
+from benchmarks.fakes import (
+    FakeCalendarService, FakeLangMem, FakeLettaClient, FakeLLM, FakeTasksService,
+    InMemoryChromaClient, InMemoryStore, LocalSMTPServer, LocalWebhookServer,
+)
+
+SCALES = {
+    'small': {'events': 100, 'tasks': 100, 'documents': 10, 'goals': 10},
+    'medium': {'events': 1_000, 'tasks': 1_000, 'documents': 100, 'goals': 100},
+    'large': {'events': 10_000, 'tasks': 5_000, 'documents': 500, 'goals': 1_000},
+}
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+@contextlib.contextmanager
+def working_directory():
+    # The goal and outbox code write relative to the current directory
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix='agent-bench-')
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def scheduler_agent(events, llm_latency=0.0, outbox=None):
+    from agents.scheduler_agent import SchedulerAgent
+    return SchedulerAgent(
+        chroma_client=InMemoryStore(copy.deepcopy(events)),
+        langmem_client=FakeLangMem(),
+        llm=FakeLLM(llm_latency),
+        calendar_service=FakeCalendarService(),
+        outbox=outbox,
+    )
+
+
+@benchmark('scheduler.find_available_slot')
+def bench_find_available_slot(scale, llm_latency):
+    agent = scheduler_agent(datagen.generate_calendar(scale['events']))
+    meeting = {'duration': 240, 'window_start': '2024-12-02T00:00:00Z', 'horizon_days': 365}
+    return None, lambda _: agent.identify_optimal_slots(meeting), 1
+
+
+@benchmark('scheduler.adjust_schedule')
+def bench_adjust_schedule(scale, llm_latency):
+    events = datagen.generate_calendar(scale['events'])
+    # adjust_schedule rewrites the events it moves, so each run gets a fresh copy
+    setup = lambda: scheduler_agent(events)
+    return setup, lambda agent: agent.adjust_schedule(window_start='2024-12-02T00:00:00Z', horizon_days=365), 1
+
+
+@benchmark('scheduler.add_event_to_google_calendar')
+def bench_add_event(scale, llm_latency):
+    events = datagen.generate_calendar(min(scale['events'], 1_000))
+    agent = scheduler_agent([])
+
+    def run(_):
+        for event in events:
+            agent.add_event_to_google_calendar(event)
+    return None, run, len(events)
+
+
+@benchmark('scheduler.generate_agenda')
+def bench_generate_agenda(scale, llm_latency):
+    agent = scheduler_agent([], llm_latency)
+    meetings = datagen.generate_calendar(20)
+
+    def run(_):
+        for meeting in meetings:
+            agent.generate_agenda(meeting)
+    return None, run, len(meetings)
+
+
+@benchmark('scheduler.generate_agenda_library')
+def bench_generate_agenda_library(scale, llm_latency):
+    # The same meetings recurring: the first round fills the library, the timed rounds reuse it
+    from agents.agenda_library import AgendaLibrary
+    agent = scheduler_agent([], llm_latency)
+    agent.agenda_library = AgendaLibrary(path=os.path.abspath('agendas.ndjson'))
+    meetings = datagen.generate_calendar(20)
+    for meeting in meetings:
+        agent.generate_agenda(meeting)
+
+    def run(_):
+        for meeting in meetings:
+            agent.generate_agenda(meeting)
+    return None, run, len(meetings)
+
+
+@benchmark('reminder.add_task')
+def bench_add_task(scale, llm_latency):
+    from agents.reminder_agent import ReminderAgent
+    tasks = datagen.generate_tasks(scale['tasks'])
+    setup = lambda: ReminderAgent(
+        chroma_client=InMemoryStore(), langmem_client=FakeLangMem(), tasks_service=FakeTasksService()
+    )
+
+    def run(agent):
+        for task in tasks:
+            agent.add_task(task)
+    return setup, run, len(tasks)
+
+
+@benchmark('reminder.add_task_outbox')
+def bench_add_task_outbox(scale, llm_latency):
+    from agents.outbox import Outbox
+    from agents.reminder_agent import ReminderAgent
+    tasks = datagen.generate_tasks(scale['tasks'])
+
+    def setup():
+        outbox = Outbox(db_path=os.path.join(tempfile.mkdtemp(prefix='agent-bench-'), 'outbox.db'))
+        return ReminderAgent(
+            chroma_client=InMemoryStore(), langmem_client=FakeLangMem(),
+            tasks_service=FakeTasksService(), outbox=outbox,
+        )
+
+    def run(agent):
+        for task in tasks:
+            agent.add_task(task)
+        agent.outbox.close()
+        shutil.rmtree(os.path.dirname(agent.outbox.db_path), ignore_errors=True)
+    return setup, run, len(tasks)
+
+
+@benchmark('reminder.add_task_dedup')
+def bench_add_task_dedup(scale, llm_latency):
+    from agents.reminder_agent import ReminderAgent
+    from agents.task_dedup import TaskDeduplicator
+    tasks = datagen.generate_tasks(scale['tasks'], duplicate_rate=0.2)
+    setup = lambda: ReminderAgent(
+        chroma_client=InMemoryStore(), langmem_client=FakeLangMem(), tasks_service=FakeTasksService(),
+        deduplicator=TaskDeduplicator(),
+    )
+
+    def run(agent):
+        for task in tasks:
+            agent.add_task(task)
+    return setup, run, len(tasks)
+
+
+@benchmark('reminder.cluster_tasks')
+def bench_cluster_tasks(scale, llm_latency):
+    from agents.reminder_agent import ReminderAgent
+    tasks = datagen.generate_tasks(scale['tasks'], duplicate_rate=0.2)
+    agent = ReminderAgent(
+        chroma_client=InMemoryStore(tasks), langmem_client=FakeLangMem(), tasks_service=FakeTasksService()
+    )
+    return None, lambda _: agent.cluster_tasks(), 1
+
+
+@benchmark('reminder.adjust_reminder')
+def bench_adjust_reminder(scale, llm_latency):
+    from agents.reminder_agent import ReminderAgent
+    tasks = datagen.generate_tasks(scale['tasks'])
+    agent = ReminderAgent(
+        chroma_client=InMemoryStore(tasks), langmem_client=FakeLangMem(), tasks_service=FakeTasksService()
+    )
+    return None, lambda _: agent.adjust_reminder(), 1
+
+
+@benchmark('reminder.send_contextual_reminders')
+def bench_send_contextual_reminders(scale, llm_latency):
+    # Delivered over real sockets to local SMTP and webhook sinks; ops are deliveries
+    from agents.notifications import NotificationDispatcher, SMTPChannel, WebhookChannel
+    from agents.reminder_agent import ReminderAgent
+    tasks = datagen.generate_tasks(scale['tasks'])
+    smtp, webhook = LocalSMTPServer(), LocalWebhookServer()
+    dispatcher = NotificationDispatcher([
+        SMTPChannel(port=smtp.port, default_recipient='owner@example.com'),
+        WebhookChannel(webhook.url),
+    ])
+    agent = ReminderAgent(
+        chroma_client=InMemoryStore(tasks), langmem_client=FakeLangMem(), tasks_service=FakeTasksService(),
+        dispatcher=dispatcher,
+    )
+    return None, lambda _: agent.send_contextual_reminders(), 2 * len(tasks)
+
+
+@benchmark('knowledge.store_document')
+def bench_store_document(scale, llm_latency):
+    from agents.knowledge_retrieval_agent import KnowledgeRetrievalAgent
+    documents = datagen.generate_documents(scale['documents'])
+
+    def setup():
+        return KnowledgeRetrievalAgent(
+            db_path=tempfile.gettempdir(), chroma_client=InMemoryChromaClient(), llm=FakeLLM(llm_latency)
+        )
+
+    def run(agent):
+        for title, content in documents:
+            agent.store_document(title, content)
+    return setup, run, len(documents)
+
+
+@benchmark('knowledge.generate_summary')
+def bench_generate_summary(scale, llm_latency):
+    from agents.knowledge_retrieval_agent import KnowledgeRetrievalAgent
+    documents = datagen.generate_documents(scale['documents'])
+    agent = KnowledgeRetrievalAgent(
+        db_path=tempfile.gettempdir(), chroma_client=InMemoryChromaClient(), llm=FakeLLM(llm_latency)
+    )
+    for title, content in documents:
+        agent.store_document(title, content)
+    return None, lambda _: agent.generate_summary(documents[0][0]), 1
+
+
+@benchmark('goals.input_and_log_milestones')
+def bench_goal_io(scale, llm_latency):
+    from agents.goal_tracker_agent import GoalTrackerAgent
+    goals = datagen.generate_goals(scale['goals'])
+    milestones = sum(len(goal_milestones) for _, goal_milestones in goals)
+
+    def setup():
+        shutil.rmtree('data/goals', ignore_errors=True)
+        return GoalTrackerAgent(client=FakeLettaClient())
+
+    def run(agent):
+        for goal, goal_milestones in goals:
+            agent.input_goal(goal)
+            for milestone in goal_milestones:
+                agent.log_milestone(goal['title'], milestone)
+    return setup, run, len(goals) + milestones
+
+
+@benchmark('goals.goal_summary')
+def bench_goal_summary(scale, llm_latency):
+    from agents.goal_tracker_agent import GoalTrackerAgent
+    shutil.rmtree('data/goals', ignore_errors=True)
+    agent = GoalTrackerAgent(client=FakeLettaClient())
+    for goal, goal_milestones in datagen.generate_goals(scale['goals']):
+        agent.input_goal(goal)
+        for milestone in goal_milestones:
+            agent.log_milestone(goal['title'], milestone)
+    return None, lambda _: agent.goal_summary(), 1
+
+
+def goal_records(goals):
+    records = []
+    for goal, goal_milestones in goals:
+        records.append({'type': 'goal', 'title': goal['title'], 'description': goal['description'],
+                        'target_milestones': goal['target_milestones']})
+        records.extend({'type': 'milestone', 'title': goal['title'], 'milestone': milestone}
+                       for milestone in goal_milestones)
+    return records
+
+
+@benchmark('goals.import_goals')
+def bench_import_goals(scale, llm_latency):
+    from agents.goal_io import write_records
+    from agents.goal_tracker_agent import GoalTrackerAgent
+    records = goal_records(datagen.generate_goals(scale['goals']))
+    path = os.path.abspath('import.ndjson')
+    write_records(records, path)
+
+    def setup():
+        shutil.rmtree('data/goals', ignore_errors=True)
+        return GoalTrackerAgent(client=FakeLettaClient())
+    return setup, lambda agent: agent.import_goals(path), len(records)
+
+
+@benchmark('goals.export_goals')
+def bench_export_goals(scale, llm_latency):
+    from agents.goal_io import write_records
+    from agents.goal_tracker_agent import GoalTrackerAgent
+    records = goal_records(datagen.generate_goals(scale['goals']))
+    path = os.path.abspath('import.ndjson')
+    write_records(records, path)
+    shutil.rmtree('data/goals', ignore_errors=True)
+    agent = GoalTrackerAgent(client=FakeLettaClient())
+    agent.import_goals(path)
+    return None, lambda _: agent.export_goals(os.path.abspath('export.ndjson')), len(records)
+
+
+def measure(setup, run, repeats):
+    timings = []
+    for _ in range(repeats):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r') as f:
+        baseline = {(entry['name'], entry['scale']): entry for entry in json.load(f)['results']}
+    print(f"\nComparison with {baseline_path} (median):")
+    for entry in results:
+        previous = baseline.get((entry['name'], entry['scale']))
+        if previous:
+            change = (entry['median_s'] / previous['median_s'] - 1) * 100 if previous['median_s'] else 0.0
+            print(f"  {entry['name']:<40} {entry['scale']:<7} {change:+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="seconds added to every fake LLM call")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--output', default=None, help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument('--compare', default=None, help="earlier results file to diff against")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level='ERROR')
+
+    results = []
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    with working_directory():
+        for scale_name in args.scales:
+            for name, factory in BENCHMARKS.items():
+                if args.filter not in name:
+                    continue
+                setup, run, ops = factory(SCALES[scale_name], args.llm_latency)
+                timings = measure(setup, run, args.repeats)
+                median = statistics.median(timings)
+                entry = {
+                    'name': name,
+                    'scale': scale_name,
+                    'ops': ops,
+                    'repeats': args.repeats,
+                    'min_s': min(timings),
+                    'median_s': median,
+                    'mean_s': statistics.fmean(timings),
+                    'ops_per_s': ops / median if median else None,
+                }
+                results.append(entry)
+                print(f"{name:<40} {scale_name:<7} median {1000 * median:10.2f} ms  {entry['ops_per_s'] or 0:12.1f} ops/s")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'llm_latency_s': args.llm_latency,
+        },
+        'results': results,
+    }
+    if not output:
+        results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+        os.makedirs(results_dir, exist_ok=True)
+        output = os.path.join(results_dir, time.strftime('%Y%m%dT%H%M%S') + '.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,17 +3,38 @@ from agents.goal_tracker_agent import GoalTrackerAgent
 from agents.knowledge_retrieval_agent import KnowledgeRetrievalAgent
 from agents.reminder_agent import ReminderAgent
 from agents.scheduler_agent import SchedulerAgent
+from agents.outbox import Outbox
+from agents.task_dedup import TaskDeduplicator
+from agents.notifications import dispatcher_from_env
+from agents.state_store import state_from_env
+from agents.sharding import shard_pool_from_env
+from agents.agenda_library import AgendaLibrary
+from agents.event_record import format_timestamp, parse_timestamp
+from agents import instrumentation
 from loguru import logger
+import os
+import sys
 
 def main():
     logger.info("Application started.")
 
+    outbox = Outbox()
+    outbox.start()
+    # Email/webhook delivery when NOTIFY_* is configured; otherwise notifications are only logged
+    dispatcher = dispatcher_from_env()
+    # Snapshot-backed agent state when AGENT_STATE_DIR is set, so restarts skip the full scans
+    state = state_from_env()
+    # Per-team worker processes for scheduling when SCHEDULER_WORKERS is set
+    shard_pool = shard_pool_from_env()
+
     try:
         # Initialize agents
-        goal_tracker = GoalTrackerAgent()
+        goal_tracker = GoalTrackerAgent(state=state)
         knowledge_retriever = KnowledgeRetrievalAgent()
-        reminder_agent = ReminderAgent()
-        scheduler_agent = SchedulerAgent()
+        reminder_agent = ReminderAgent(outbox=outbox, deduplicator=TaskDeduplicator(), dispatcher=dispatcher,
+                                       state=state)
+        scheduler_agent = SchedulerAgent(outbox=outbox, dispatcher=dispatcher, state=state,
+                                         agenda_library=AgendaLibrary(), shard_pool=shard_pool)
 
         # Calculate current and future dates
         current_datetime = datetime.now()
@@ -47,7 +68,9 @@ def main():
         }
         optimal_slot = scheduler_agent.identify_optimal_slots(meeting_details)
         meeting_details['start_time'] = optimal_slot
-        meeting_details['end_time'] = (datetime.fromisoformat(optimal_slot) + one_hour_duration).isoformat()
+        meeting_details['end_time'] = format_timestamp(
+            parse_timestamp(optimal_slot) + int(one_hour_duration.total_seconds())
+        )
         meeting_details['description'] = summary
         agenda = scheduler_agent.generate_agenda(meeting_details)
         meeting_details['description'] += f"\nAgenda:\n{agenda}"
@@ -63,15 +86,15 @@ def main():
             'description': 'Develop a comprehensive marketing plan for the new product.'
         }
         reminder_agent.add_task(task_details)
-        reminder_agent.adjust_reminders()
+        reminder_agent.adjust_reminder()
         reminder_agent.send_contextual_reminder(task_details['title'])
 
-        # Add meeting as a task to Reminder Agent
+        # Add meeting as a task to Reminder Agent; the agenda stays on the calendar event
         reminder_task = {
             'title': f"Attend {meeting_details['title']}",
             'deadline': one_week_later.strftime('%Y-%m-%d'),
             'goal': 'Participate in scheduled meetings',
-            'description': meeting_details['description']
+            'description': f"Meeting at {meeting_details['start_time']}."
         }
         reminder_agent.add_task(reminder_task)
 
@@ -79,6 +102,23 @@ def main():
 
     except Exception as e:
         logger.exception("An error occurred in the main application.")
+    finally:
+        # Deliver whatever is still queued before exiting
+        if not outbox.stop(flush=True):
+            logger.error("Not every queued write was delivered; pending entries are retried on the next run.")
+        if dispatcher:
+            dispatcher.close()
+        if shard_pool:
+            shard_pool.close()
+        if state:
+            state.close()
+        metrics_file = os.getenv('AGENT_METRICS_FILE')
+        if instrumentation.is_enabled() and metrics_file:
+            instrumentation.registry.write_prometheus(metrics_file)
 
 if __name__ == '__main__':
-    main()
+    if '--daemon' in sys.argv[1:]:
+        from agents import daemon
+        daemon.main([arg for arg in sys.argv[1:] if arg != '--daemon'])
+    else:
+        main()
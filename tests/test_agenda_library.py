@@ -0,0 +1,89 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock
+from agents.agenda_library import AgendaLibrary, make_template
+from agents.scheduler_agent import SchedulerAgent
+
+AGENDA = "Agenda for Sprint Planning (2024-12-02):\n1. Review velocity\n2. Pick stories\n3. Budget: $500"
+
+
+class TestAgendaLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'agendas.ndjson')
+        self.library = AgendaLibrary(path=self.path)
+        self.meeting = {'title': 'Sprint Planning', 'start_time': '2024-12-02T10:00:00Z',
+                        'participants_emails': ['a@example.com', 'b@example.com']}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_make_template(self):
+        self.assertEqual(
+            make_template(AGENDA, self.meeting),
+            "Agenda for $title ($date):\n1. Review velocity\n2. Pick stories\n3. Budget: $$500",
+        )
+
+    def test_recurring_meeting_reuses_filled_agenda(self):
+        self.library.add(self.meeting, AGENDA)
+
+        agenda = self.library.lookup({'title': 'sprint planning', 'start_time': '2024-12-16T10:00:00Z',
+                                      'participants_emails': ['b@example.com', 'a@example.com']})
+
+        self.assertEqual(agenda, AGENDA.replace('Sprint Planning', 'sprint planning').replace('2024-12-02', '2024-12-16'))
+        self.assertEqual(self.library.stats(), {'hits': 1, 'misses': 0, 'hit_ratio': 1.0})
+
+    def test_unrelated_meeting_misses(self):
+        self.library.add(self.meeting, AGENDA)
+
+        self.assertIsNone(self.library.lookup({'title': 'Quarterly budget review'}))
+        self.assertIsNone(AgendaLibrary(path=os.path.join(self.temp_dir, 'empty.ndjson')).lookup(self.meeting))
+        self.assertEqual(self.library.stats()['hit_ratio'], 0.0)
+
+    def test_participants_raise_or_lower_confidence(self):
+        self.library.add(self.meeting, AGENDA)
+        same = self.library.match(dict(self.meeting, title='Sprint planning session'))
+        other = self.library.match(dict(self.meeting, title='Sprint planning session',
+                                        participants_emails=['x@example.com']))
+
+        self.assertGreater(same[1], other[1])
+
+    def test_library_persists_and_latest_agenda_wins(self):
+        self.library.add(self.meeting, AGENDA)
+        self.library.add(self.meeting, "1. Demo\n2. Plan")
+
+        reloaded = AgendaLibrary(path=self.path)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.lookup(self.meeting), "1. Demo\n2. Plan")
+
+
+class TestSchedulerAgentAgendaLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.llm = MagicMock()
+        self.llm.invoke.return_value = MagicMock(content="1. Updates for Weekly Sync\n2. Blockers")
+        self.agent = SchedulerAgent(
+            chroma_client=MagicMock(), langmem_client=MagicMock(), llm=self.llm, calendar_service=MagicMock(),
+            agenda_library=AgendaLibrary(path=os.path.join(self.temp_dir, 'agendas.ndjson')),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_llm_only_on_miss(self):
+        first = self.agent.generate_agenda({'title': 'Weekly Sync'})
+        second = self.agent.generate_agenda({'title': 'Weekly Sync'})
+        third = self.agent.generate_agenda({'title': 'Incident postmortem'})
+
+        self.assertEqual(first, second)
+        self.assertEqual(third, "1. Updates for Weekly Sync\n2. Blockers")
+        self.assertEqual(self.llm.invoke.call_count, 2)
+        self.assertEqual(self.agent.agenda_library.stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from agents.daemon import AgentDaemon, DaemonClient, TCPServer, UnixServer
+from agents.outbox import Outbox
+
+
+class TestAgentDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.outbox = Outbox(db_path=os.path.join(self.temp_dir, 'outbox.db'), backoff_seconds=0)
+        self.scheduler = MagicMock()
+        self.reminder = MagicMock()
+        self.daemon = AgentDaemon(
+            scheduler=self.scheduler, reminder=self.reminder, knowledge=MagicMock(), goals=MagicMock(),
+            outbox=self.outbox,
+        )
+        self.server = TCPServer(('127.0.0.1', 0), self.daemon)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = DaemonClient(port=self.server.server_address[1])
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.daemon.close()
+        self.outbox.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_operations_reach_the_warm_agents(self):
+        self.scheduler.identify_optimal_slots.return_value = '2024-12-02T09:15:00Z'
+        task = {'title': 'Task 1', 'deadline': '2024-12-10'}
+
+        self.client.call('add_task', task=task)
+        slot = self.client.call('find_slot', meeting={'duration': 60})
+        self.client.call('add_task', task=task)
+
+        self.assertEqual(slot, '2024-12-02T09:15:00Z')
+        self.assertEqual(self.reminder.add_task.call_count, 2)
+        self.reminder.add_task.assert_called_with(task)
+        self.scheduler.identify_optimal_slots.assert_called_once_with({'duration': 60})
+
+    def test_unknown_operation_and_bad_arguments(self):
+        with self.assertRaisesRegex(RuntimeError, '404'):
+            self.client.call('drop_tables')
+        with self.assertRaisesRegex(RuntimeError, '400'):
+            self.client.call('add_task', title='missing task argument')
+        self.reminder.add_task.assert_not_called()
+
+    def test_agent_errors_are_reported(self):
+        self.reminder.add_task.side_effect = RuntimeError('chroma down')
+        with self.assertRaisesRegex(RuntimeError, '500.*chroma down'):
+            self.client.call('add_task', task={'title': 'Task 1'})
+        # The connection stays usable after an error
+        self.assertEqual(self.client.health()['status'], 'ok')
+
+    def test_close_flushes_pending_writes(self):
+        handler = MagicMock()
+        self.outbox.register_handler('chroma', handler)
+        self.outbox.enqueue('chroma', {'title': 'Task 1'})
+
+        self.daemon.close()
+
+        handler.assert_called_once()
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+
+class TestLazyDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.outbox = Outbox(db_path=os.path.join(self.temp_dir, 'outbox.db'), backoff_seconds=0)
+        self.daemon = AgentDaemon(outbox=self.outbox)
+
+    def tearDown(self):
+        self.outbox.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_close_delivers_entries_left_for_unbuilt_agents(self):
+        handler = MagicMock()
+
+        def build(name):
+            self.outbox.register_handler(f'{name}.chroma', handler)
+            return MagicMock()
+
+        self.outbox.enqueue('reminder.chroma', {'title': 'Task 1'})
+        with patch.object(self.daemon, '_build', side_effect=build) as build_agent:
+            self.assertTrue(self.daemon.close())
+
+        build_agent.assert_called_once_with('reminder')
+        handler.assert_called_once()
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_close_reports_entries_without_a_handler(self):
+        self.outbox.enqueue('reminder.chroma', {'title': 'Task 1'})
+        with patch.object(self.daemon, '_build', side_effect=RuntimeError('no credentials')):
+            self.assertFalse(self.daemon.close())
+        self.assertEqual(self.outbox.pending_count(), 1)
+
+
+class TestUnixSocket(unittest.TestCase):
+
+    def test_call_over_unix_socket(self):
+        temp_dir = tempfile.mkdtemp()
+        outbox = Outbox(db_path=os.path.join(temp_dir, 'outbox.db'))
+        goals = MagicMock()
+        daemon = AgentDaemon(scheduler=MagicMock(), reminder=MagicMock(), knowledge=MagicMock(), goals=goals,
+                             outbox=outbox)
+        socket_path = os.path.join(temp_dir, 'agents.sock')
+        server = UnixServer(socket_path, daemon)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = DaemonClient(socket_path=socket_path)
+        try:
+            client.call('log_milestone', goal_title='Goal 1', milestone='Done')
+            goals.log_milestone.assert_called_once_with('Goal 1', 'Done')
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+            outbox.close()
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import calendar
+import time
+from agents.event_record import (
+    EventRecord, format_timestamp, local_to_utc, parse_timestamp, utc_to_local,
+)
+
+
+def epoch(timestamp):
+    return calendar.timegm(time.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ'))
+
+
+class TestEventRecord(unittest.TestCase):
+
+    def test_parse_utc(self):
+        self.assertEqual(parse_timestamp('2024-12-01T10:00:00Z'), epoch('2024-12-01T10:00:00Z'))
+
+    def test_parse_offsets(self):
+        expected = epoch('2024-12-01T10:00:00Z')
+        self.assertEqual(parse_timestamp('2024-12-01T12:00:00+02:00'), expected)
+        self.assertEqual(parse_timestamp('2024-12-01T05:00:00-0500'), expected)
+        self.assertEqual(parse_timestamp('2024-12-01T15:30+05:30'), expected)
+        self.assertEqual(parse_timestamp('2024-12-01 10:00:00.123456Z'), expected)
+
+    def test_naive_timestamps_use_time_zone(self):
+        self.assertEqual(parse_timestamp('2024-12-01T10:00:00'), epoch('2024-12-01T10:00:00Z'))
+        # Winter and summer offsets for New York
+        self.assertEqual(parse_timestamp('2024-12-01T05:00:00', 'America/New_York'), epoch('2024-12-01T10:00:00Z'))
+        self.assertEqual(parse_timestamp('2024-07-01T06:00:00', 'America/New_York'), epoch('2024-07-01T10:00:00Z'))
+
+    def test_date_only(self):
+        self.assertEqual(parse_timestamp('2024-12-01'), epoch('2024-12-01T00:00:00Z'))
+
+    def test_invalid_timestamps(self):
+        for value in ['', 'tomorrow', '2024-13-01T10:00:00Z', '2024-12-01T10:00:00+2', '2024/12/01']:
+            with self.assertRaises(ValueError):
+                parse_timestamp(value)
+
+    def test_format_round_trip(self):
+        self.assertEqual(format_timestamp(parse_timestamp('2024-02-29T23:59:59Z')), '2024-02-29T23:59:59Z')
+
+    def test_local_conversion(self):
+        utc = epoch('2024-07-01T10:00:00Z')
+        local = utc_to_local(utc, 'Europe/Berlin')
+        self.assertEqual(local - utc, 2 * 3600)
+        self.assertEqual(local_to_utc(local, 'Europe/Berlin'), utc)
+
+    def test_record_from_event(self):
+        record = EventRecord.from_event({
+            'title': 'Sync',
+            'start_time': '2024-12-01T10:00:00',
+            'end_time': '2024-12-01T11:00:00',
+            'time_zone': 'Europe/Berlin',
+            'priority': 3,
+        })
+        self.assertEqual(record.start, epoch('2024-12-01T09:00:00Z'))
+        self.assertEqual(record.duration, 3600)
+        self.assertEqual(record.tz, 'Europe/Berlin')
+        self.assertEqual(record.priority, 3)
+        self.assertFalse(record.fixed)
+        self.assertTrue(record.overlaps(EventRecord(record.end - 1, record.end + 60)))
+        self.assertFalse(record.overlaps(EventRecord(record.end, record.end + 60)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from agents.goal_analytics import load_ledgers, summarize_goals, summary_records
+
+DAY = 86400.0
+
+
+class TestGoalAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, rows):
+        with open(os.path.join(self.temp_dir, name), 'w') as f:
+            f.writelines('\t'.join(str(field) for field in row) + '\n' for row in rows)
+
+    def test_load_ledgers(self):
+        self.write('goals.tsv', [(0.0, 'Launch', 10, ''), (0.0, 'Hire', 4, 30 * DAY), (5.0, 'Launch', 20, '')])
+        self.write('milestones.tsv', [(DAY, 'Launch', 'Research'), (2 * DAY, 'Hire', 'Post job'), (3 * DAY, 'Unknown', 'x')])
+
+        goals, milestones = load_ledgers(self.temp_dir)
+
+        self.assertEqual(list(goals['title']), ['Launch', 'Hire'])
+        self.assertEqual(list(goals['target_milestones']), [20, 4])
+        self.assertTrue(np.isnan(goals['target_date'][0]))
+        self.assertEqual(list(milestones['goal_index']), [0, 1])
+
+        goals, milestones = load_ledgers(self.temp_dir, only={'Hire'})
+        self.assertEqual(list(goals['title']), ['Hire'])
+        self.assertEqual(list(milestones['timestamp']), [2 * DAY])
+
+    def test_missing_ledgers(self):
+        goals, milestones = load_ledgers(self.temp_dir)
+        summary = summarize_goals(goals, milestones, now=0)
+        self.assertEqual(summary_records(summary), [])
+
+    def test_summarize_goals(self):
+        goals = {
+            'title': np.array(['On track', 'Behind', 'Done', 'Idle'], dtype=object),
+            'created': np.zeros(4),
+            'target_milestones': np.array([4, 4, 2, 5]),
+            'target_date': np.array([20 * DAY, 12 * DAY, np.nan, np.nan]),
+        }
+        milestones = {
+            'goal_index': np.array([0, 0, 1, 2, 2]),
+            'timestamp': np.array([2 * DAY, 5 * DAY, 9 * DAY, DAY, 3 * DAY]),
+        }
+
+        summary = summarize_goals(goals, milestones, now=10 * DAY, stale_days=7)
+
+        self.assertEqual(list(summary['milestones']), [2, 1, 2, 0])
+        self.assertEqual(list(summary['progress']), [50.0, 25.0, 100.0, 0.0])
+        self.assertAlmostEqual(summary['velocity_per_day'][0], 0.2)
+        # Two more milestones at 0.2/day lands on day 20
+        self.assertAlmostEqual(summary['projected_completion'][0], 20 * DAY)
+        self.assertEqual(summary['projected_completion'][2], 3 * DAY)
+        self.assertEqual(summary['projected_completion'][3], np.inf)
+        self.assertEqual(list(summary['at_risk']), [False, True, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
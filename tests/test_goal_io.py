@@ -0,0 +1,114 @@
+import unittest
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+from agents.goal_analytics import load_ledgers
+from agents.goal_io import detect_format, import_records, iter_ledger_records, read_records, write_records
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+RECORDS = [
+    {'type': 'goal', 'title': 'Launch', 'description': 'Ship\tit', 'created': 0.0, 'target_milestones': 3,
+     'target_date': 86400.0},
+    {'type': 'goal', 'title': 'Hire', 'description': '', 'created': 10.0, 'target_milestones': 2,
+     'target_date': None},
+    {'type': 'milestone', 'title': 'Launch', 'milestone': 'Research', 'timestamp': 100.0},
+    {'type': 'milestone', 'title': 'Launch', 'milestone': 'Design', 'timestamp': 200.0},
+    {'type': 'milestone', 'title': 'Hire', 'milestone': 'Post job', 'timestamp': 300.0},
+]
+
+
+class TestGoalIO(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.goals_dir = os.path.join(self.temp_dir, 'goals')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def round_trip(self, name):
+        path = os.path.join(self.temp_dir, name)
+        counts = import_records([RECORDS[:3], RECORDS[3:]], goals_dir=self.goals_dir)
+        self.assertEqual(counts, {'goals': 2, 'milestones': 3})
+
+        self.assertEqual(write_records(iter_ledger_records(self.goals_dir), path, batch_size=2), 5)
+        records = [record for batch in read_records(path, batch_size=2) for record in batch]
+
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]['description'], 'Ship it')
+        self.assertEqual(records[0]['target_date'], 86400.0)
+        self.assertIsNone(records[1]['target_date'])
+        self.assertEqual([record['milestone'] for record in records[2:]], ['Research', 'Design', 'Post job'])
+
+        other_dir = os.path.join(self.temp_dir, 'other')
+        import_records(read_records(path), goals_dir=other_dir)
+        goals, milestones = load_ledgers(other_dir)
+        self.assertEqual(list(goals['title']), ['Launch', 'Hire'])
+        self.assertEqual(list(milestones['goal_index']), [0, 0, 1])
+
+    def test_ndjson_round_trip(self):
+        self.round_trip('goals.ndjson')
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        self.round_trip('goals.parquet')
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_arrow_round_trip(self):
+        self.round_trip('goals.arrow')
+
+    def test_import_writes_goal_files(self):
+        import_records([RECORDS], goals_dir=self.goals_dir)
+        with open(os.path.join(self.goals_dir, 'Launch.txt')) as f:
+            content = f.read()
+        self.assertIn("'title': 'Launch'", content)
+        self.assertTrue(content.endswith("\nMilestone: Research\nMilestone: Design"))
+
+    def test_import_into_existing_directory(self):
+        import_records([RECORDS], goals_dir=self.goals_dir)
+        path = os.path.join(self.temp_dir, 'goals.ndjson')
+        write_records(iter_ledger_records(self.goals_dir), path)
+
+        counts = import_records(read_records(path), goals_dir=self.goals_dir)
+        self.assertEqual(counts, {'goals': 0, 'milestones': 0})
+        counts = import_records([[RECORDS[0], {'type': 'milestone', 'title': 'Launch', 'milestone': 'Build',
+                                               'timestamp': 300.0}]], goals_dir=self.goals_dir)
+        self.assertEqual(counts, {'goals': 0, 'milestones': 1})
+
+        goals, milestones = load_ledgers(self.goals_dir)
+        self.assertEqual(list(milestones['goal_index']), [0, 0, 1, 0])
+        with open(os.path.join(self.goals_dir, 'Launch.txt')) as f:
+            content = f.read()
+        self.assertEqual(content.count("'title': 'Launch'"), 1)
+        self.assertTrue(content.endswith("\nMilestone: Research\nMilestone: Design\nMilestone: Build"))
+
+    def test_import_accepts_iso_timestamps(self):
+        path = os.path.join(self.temp_dir, 'goals.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'type': 'goal', 'title': 'Launch', 'target_date': '1970-01-02T00:00:00Z'}) + '\n')
+            f.write(json.dumps({'type': 'milestone', 'title': 'Launch', 'milestone': 'x',
+                                'timestamp': '1970-01-01T00:01:40Z'}) + '\n')
+        import_records(read_records(path), goals_dir=self.goals_dir, now=50.0)
+        goals, milestones = load_ledgers(self.goals_dir)
+        self.assertEqual(goals['target_date'][0], 86400.0)
+        self.assertEqual(goals['created'][0], 50.0)
+        self.assertEqual(list(goals['target_milestones']), [10])
+        self.assertEqual(milestones['timestamp'][0], 100.0)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            detect_format('goals.csv')
+        with self.assertRaises(ValueError):
+            import_records([[{'type': 'note', 'title': 'x'}]], goals_dir=self.goals_dir)
+        path = os.path.join(self.temp_dir, 'broken.ndjson')
+        with open(path, 'w') as f:
+            f.write('{"type": "goal"\n')
+        with self.assertRaisesRegex(ValueError, 'broken.ndjson:1'):
+            list(read_records(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
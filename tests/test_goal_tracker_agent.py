@@ -1,6 +1,8 @@
 import unittest
 import os
 import shutil
+import time
+from unittest.mock import patch
 from agents.goal_tracker_agent import GoalTrackerAgent
 
 class TestGoalTrackerAgent(unittest.TestCase):
@@ -64,5 +66,51 @@ class TestGoalTrackerAgent(unittest.TestCase):
         except Exception as e:
             self.fail(f"send_motivational_reminder raised an exception {e}")
 
+    def test_send_motivational_reminder_for_goal_file_only(self):
+        # A goal from before the ledgers, and milestones logged without input_goal
+        with open(os.path.join(self.test_data_dir, 'Old.txt'), 'w') as f:
+            f.write("{'title': 'Old'}\nMilestone: One\nMilestone: Two")
+        self.agent.log_milestone('Unregistered', 'Milestone 1')
+
+        with patch('agents.goal_tracker_agent.logger') as logger:
+            self.agent.send_motivational_reminder('Old')
+            self.agent.send_motivational_reminder('Unregistered')
+        messages = [call.args[0] for call in logger.info.call_args_list]
+        self.assertIn("Motivational reminder sent: You're 20.0% closer to achieving 'Old'!", messages)
+        self.assertIn("Motivational reminder sent: You're 10.0% closer to achieving 'Unregistered'!", messages)
+        with self.assertRaises(ValueError):
+            self.agent.send_motivational_reminder('Missing')
+
+    def test_send_due_reminders(self):
+        stalled_goal = dict(self.goal_details, title='Stalled Goal')
+        self.agent.input_goal(self.goal_details)
+        self.agent.input_goal(stalled_goal)
+        self.agent.log_milestone(self.goal_details['title'], 'Milestone 1')
+
+        now = time.time() + 20 * 24 * 3600
+        at_risk = self.agent.send_due_reminders(now=now, stale_days=30)
+        self.assertEqual(at_risk, [])
+
+        at_risk = self.agent.send_due_reminders(now=now, stale_days=14)
+        self.assertEqual(sorted(at_risk), ['Stalled Goal', 'Test Goal'])
+
+    def test_export_and_import_goals(self):
+        self.agent.input_goal(self.goal_details)
+        self.agent.log_milestone(self.goal_details['title'], 'Milestone 1')
+        export_path = os.path.join(self.test_data_dir, 'export.ndjson')
+
+        self.assertEqual(self.agent.export_goals(export_path), 2)
+        with open(export_path, 'r') as f:
+            exported = f.read()
+        shutil.rmtree(self.test_data_dir)
+        os.makedirs(self.test_data_dir)
+        with open(os.path.join(self.test_data_dir, 'import.ndjson'), 'w') as f:
+            f.write(exported)
+
+        counts = self.agent.import_goals(os.path.join(self.test_data_dir, 'import.ndjson'))
+        self.assertEqual(counts, {'goals': 1, 'milestones': 1})
+        summary = self.agent.goal_summary()
+        self.assertEqual(list(summary['milestones']), [1])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import unittest
+from types import SimpleNamespace
+from agents import instrumentation
+from agents.instrumentation import (
+    Histogram, external_call, instrument, record_cache, record_llm_usage, registry, span,
+)
+
+
+class Service:
+
+    @instrument('service.fetch')
+    def fetch(self, fail=False):
+        with external_call('chroma'):
+            pass
+        record_llm_usage(SimpleNamespace(usage_metadata={'total_tokens': 42}))
+        if fail:
+            raise RuntimeError("boom")
+        return 'result'
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        registry.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        registry.reset()
+
+    def test_disabled_records_nothing(self):
+        instrumentation.disable()
+        self.assertEqual(Service().fetch(), 'result')
+        with span('block'):
+            record_cache('agenda', True)
+        self.assertEqual(registry.snapshot(), {'latency': {}, 'counters': {}})
+
+    def test_operation_latency_and_attribution(self):
+        service = Service()
+        service.fetch()
+        with self.assertRaises(RuntimeError):
+            service.fetch(fail=True)
+
+        snapshot = registry.snapshot()
+        latency = snapshot['latency']['agent_operation_seconds{operation="service.fetch"}']
+        self.assertEqual(latency['count'], 2)
+        self.assertIsNotNone(latency['p99_s'])
+
+        counters = snapshot['counters']
+        self.assertEqual(counters['agent_operations_total{operation="service.fetch",status="ok"}'], 1)
+        self.assertEqual(counters['agent_operations_total{operation="service.fetch",status="error"}'], 1)
+        self.assertEqual(counters['agent_external_calls_total{operation="service.fetch",system="chroma"}'], 2)
+        self.assertEqual(counters['agent_llm_tokens_total{operation="service.fetch"}'], 84)
+
+    def test_cache_counters(self):
+        record_cache('agenda', True)
+        record_cache('agenda', False)
+        record_cache('agenda', True)
+        counters = registry.snapshot()['counters']
+        self.assertEqual(counters['agent_cache_requests_total{cache="agenda",result="hit"}'], 2)
+        self.assertEqual(counters['agent_cache_requests_total{cache="agenda",result="miss"}'], 1)
+
+    def test_prometheus_rendering(self):
+        Service().fetch()
+        text = registry.render_prometheus()
+        self.assertIn('# TYPE agent_operation_seconds histogram', text)
+        self.assertIn('agent_operation_seconds_bucket{operation="service.fetch",le="+Inf"} 1', text)
+        self.assertIn('agent_operation_seconds_count{operation="service.fetch"} 1', text)
+        self.assertIn('# TYPE agent_external_calls_total counter', text)
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram()
+        for _ in range(99):
+            histogram.observe(0.002)
+        histogram.observe(2.0)
+        self.assertLessEqual(histogram.quantile(0.5), 0.0025)
+        self.assertGreater(histogram.quantile(0.999), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+import unittest
+from agents.lazy_import import lazy_import
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_module_loads_on_first_attribute_access(self):
+        module = lazy_import('json')
+        self.assertIn('not loaded', repr(module))
+        self.assertEqual(module.dumps([1]), '[1]')
+        self.assertIn("'json' (loaded)", repr(module))
+
+    def test_missing_attribute_raises(self):
+        with self.assertRaises(AttributeError):
+            lazy_import('json').does_not_exist
+
+    def test_agent_imports_skip_heavy_dependencies(self):
+        heavy = ('chromadb', 'langchain', 'langchain_openai', 'langmem', 'letta', 'matplotlib', 'googleapiclient')
+        script = (
+            "import sys\n"
+            "import agents.scheduler_agent, agents.reminder_agent, agents.knowledge_retrieval_agent, "
+            "agents.goal_tracker_agent\n"
+            f"print(','.join(name for name in {heavy!r} if name in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
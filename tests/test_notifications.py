@@ -0,0 +1,155 @@
+import threading
+import unittest
+from benchmarks.fakes import LocalSMTPServer, LocalWebhookServer
+from agents.notifications import (
+    Channel, ConnectionPool, Notification, NotificationDispatcher, PooledChannel, SMTPChannel, WebhookChannel,
+    dispatcher_from_env,
+)
+from unittest import mock
+
+
+def notifications(n, recipient='owner@example.com'):
+    return [Notification(f"Reminder {i}", f"Complete task {i}.", recipient=recipient) for i in range(n)]
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_reuses_connections(self):
+        created = []
+        pool = ConnectionPool(lambda: created.append(object()) or created[-1], size=2, close=lambda c: None)
+        for _ in range(5):
+            with pool.connection():
+                pass
+        self.assertEqual(len(created), 1)
+
+    def test_discards_connection_that_raised(self):
+        closed = []
+        pool = ConnectionPool(object, size=2, close=closed.append)
+        with self.assertRaises(RuntimeError):
+            with pool.connection():
+                raise RuntimeError("broken")
+        self.assertEqual(len(closed), 1)
+
+    def test_bounds_concurrent_connections(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+        pool = ConnectionPool(object, size=3, close=lambda c: None)
+
+        def use():
+            with pool.connection():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                threading.Event().wait(0.01)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=use) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(peak[0], 3)
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+
+    def test_smtp_and_webhook_delivery(self):
+        smtp = LocalSMTPServer(keep=True)
+        webhook = LocalWebhookServer(keep=True)
+        dispatcher = NotificationDispatcher(
+            [SMTPChannel(port=smtp.port, pool_size=2), WebhookChannel(webhook.url, pool_size=2)], chunk_size=7
+        )
+        try:
+            stats = dispatcher.dispatch(notifications(30))
+        finally:
+            dispatcher.close()
+            smtp.stop()
+            webhook.stop()
+
+        self.assertEqual(stats['notifications'], 30)
+        self.assertEqual(stats['delivered'], 60)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(smtp.count, 30)
+        self.assertEqual(webhook.count, 30)
+        self.assertIn(b"Subject: Reminder 0", b''.join(smtp.messages))
+        self.assertEqual(sorted(p['subject'] for p in webhook.payloads)[0], "Reminder 0")
+
+    def test_failures_are_counted_per_notification(self):
+        smtp = LocalSMTPServer()
+        webhook = LocalWebhookServer()
+        dispatcher = NotificationDispatcher([SMTPChannel(port=smtp.port), WebhookChannel(webhook.url)])
+        batch = notifications(4) + [Notification("Bad", "x", recipient='reject-fail@example.com')]
+        try:
+            stats = dispatcher.dispatch(batch)
+        finally:
+            dispatcher.close()
+            smtp.stop()
+            webhook.stop()
+
+        self.assertEqual(stats['delivered'], 8)
+        self.assertEqual(stats['failed'], 2)
+        self.assertEqual(smtp.count, 4)
+        self.assertEqual(webhook.count, 4)
+
+    def test_missing_recipient_fails_email_only(self):
+        smtp = LocalSMTPServer()
+        dispatcher = NotificationDispatcher([SMTPChannel(port=smtp.port)])
+        try:
+            stats = dispatcher.dispatch(notifications(2, recipient=None))
+        finally:
+            dispatcher.close()
+            smtp.stop()
+        self.assertEqual(stats['failed'], 2)
+
+    def test_retries_chunk_on_dropped_connection(self):
+        webhook = LocalWebhookServer()
+        channel = WebhookChannel(webhook.url, pool_size=1)
+        real_send = channel._send
+        calls = []
+
+        def flaky_send(connection, notification):
+            calls.append(notification)
+            if len(calls) == 2:
+                raise ConnectionResetError("peer closed")
+            real_send(connection, notification)
+
+        channel._send = flaky_send
+        try:
+            failures = channel.send_many(notifications(3))
+        finally:
+            channel.close()
+            webhook.stop()
+        self.assertEqual(failures, [])
+        self.assertEqual(webhook.count, 3)
+
+    def test_channel_exception_fails_whole_chunk(self):
+        class Broken(Channel):
+            name = 'broken'
+
+            def send_many(self, notifications):
+                raise RuntimeError("down")
+
+        dispatcher = NotificationDispatcher([Broken()], chunk_size=2)
+        stats = dispatcher.dispatch(notifications(5))
+        dispatcher.close()
+        self.assertEqual(stats['delivered'], 0)
+        self.assertEqual(stats['failed'], 5)
+
+    def test_channels_must_implement_sending(self):
+        with self.assertRaises(TypeError):
+            Channel()
+        with self.assertRaises(TypeError):
+            PooledChannel()
+
+    def test_dispatcher_from_env(self):
+        with mock.patch.dict('os.environ', {}, clear=True):
+            self.assertIsNone(dispatcher_from_env())
+        with mock.patch.dict('os.environ', {'NOTIFY_WEBHOOK_URL': 'http://127.0.0.1:9/hook'}, clear=True):
+            dispatcher = dispatcher_from_env()
+            self.assertEqual([channel.name for channel in dispatcher.channels], ['webhook'])
+            dispatcher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import MagicMock
+from agents.outbox import Outbox
+
+
+class TestOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.outbox = Outbox(db_path=os.path.join(self.temp_dir, 'outbox.db'), backoff_seconds=0)
+
+    def tearDown(self):
+        self.outbox.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_enqueue_and_flush(self):
+        handler = MagicMock()
+        self.outbox.register_handler('chroma', handler)
+
+        key = self.outbox.enqueue('chroma', {'title': 'Task 1'})
+        self.assertEqual(self.outbox.pending_count(), 1)
+
+        self.assertTrue(self.outbox.flush())
+        handler.assert_called_once_with({'title': 'Task 1'}, key)
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_duplicate_writes_are_ignored(self):
+        handler = MagicMock()
+        self.outbox.register_handler('chroma', handler)
+
+        self.outbox.enqueue('chroma', {'title': 'Task 1'})
+        self.outbox.enqueue('chroma', {'title': 'Task 1'})
+        self.outbox.flush()
+        self.outbox.enqueue('chroma', {'title': 'Task 1'})
+        self.outbox.flush()
+
+        handler.assert_called_once()
+
+    def test_failed_delivery_is_retried(self):
+        handler = MagicMock(side_effect=[RuntimeError("unavailable"), None])
+        self.outbox.register_handler('google', handler)
+
+        self.outbox.enqueue('google', {'title': 'Task 1'})
+        self.outbox.flush()
+
+        self.assertEqual(handler.call_count, 2)
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_exhausted_retries_become_dead_letters(self):
+        self.outbox.max_attempts = 2
+        self.outbox.register_handler('google', MagicMock(side_effect=RuntimeError("unavailable")))
+
+        self.outbox.enqueue('google', {'title': 'Task 1'})
+        self.outbox.flush()
+
+        dead = self.outbox.dead_letters()
+        self.assertEqual(len(dead), 1)
+        self.assertEqual(dead[0]['payload'], {'title': 'Task 1'})
+        self.assertEqual(dead[0]['attempts'], 2)
+
+    def test_background_worker_drains(self):
+        handler = MagicMock()
+        self.outbox.register_handler('chroma', handler)
+        self.outbox.start()
+
+        self.outbox.enqueue_many([('chroma', {'title': f'Task {i}'}, None) for i in range(5)])
+        self.outbox.stop(flush=True)
+
+        self.assertEqual(handler.call_count, 5)
+
+    def test_flush_waits_for_retries_in_backoff(self):
+        self.outbox.backoff_seconds = 0.05
+        handler = MagicMock(side_effect=[RuntimeError("unavailable"), None])
+        self.outbox.register_handler('google', handler)
+
+        self.outbox.enqueue('google', {'title': 'Task 1'})
+
+        self.assertTrue(self.outbox.flush(timeout=5))
+        self.assertEqual(handler.call_count, 2)
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_flush_reports_dead_letters(self):
+        self.outbox.max_attempts = 1
+        self.outbox.register_handler('google', MagicMock(side_effect=RuntimeError("unavailable")))
+
+        self.outbox.enqueue('google', {'title': 'Task 1'})
+
+        self.assertFalse(self.outbox.flush())
+
+    def test_stop_reports_undelivered_entries(self):
+        self.outbox.max_attempts = 1
+        self.outbox.register_handler('chroma', MagicMock(side_effect=RuntimeError("down")))
+        self.outbox.enqueue('chroma', {'title': 'Task 1'})
+        self.assertFalse(self.outbox.stop(flush=True, timeout=1))
+        self.assertIsNone(self.outbox.stop(flush=False))
+
+    def test_batch_handler_gets_whole_batch(self):
+        batches = []
+
+        def handler(entries):
+            batches.append([payload['title'] for payload, _, _ in entries])
+            return [RuntimeError("rejected") if payload['title'] == 'Task 1' else None for payload, _, _ in entries]
+
+        self.outbox.max_attempts = 1
+        self.outbox.register_batch_handler('google', handler)
+        self.outbox.enqueue_many([('google', {'title': f'Task {i}'}, None) for i in range(3)])
+        self.outbox.flush()
+
+        self.assertEqual(batches, [['Task 0', 'Task 1', 'Task 2']])
+        self.assertEqual([dead['payload']['title'] for dead in self.outbox.dead_letters()], ['Task 1'])
+
+
+    def test_guarded_handlers_hold_the_lock(self):
+        lock = threading.Lock()
+        held = []
+        self.outbox.guard('reminder', lock)
+        self.outbox.register_handler('reminder.chroma', lambda payload, key: held.append(lock.locked()))
+        self.outbox.register_handler('chroma', lambda payload, key: held.append(lock.locked()))
+        self.outbox.enqueue('reminder.chroma', {'title': 'Task 1'})
+        self.outbox.enqueue('chroma', {'title': 'Task 1'})
+
+        with lock:
+            # Not delivered while another thread uses the agent
+            worker = threading.Thread(target=self.outbox.drain_once)
+            worker.start()
+            worker.join(0.2)
+            self.assertEqual(held, [])
+        worker.join()
+        self.assertTrue(self.outbox.flush())
+        self.assertEqual(sorted(held), [False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
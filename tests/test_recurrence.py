@@ -0,0 +1,76 @@
+import unittest
+import calendar
+import time
+from agents.recurrence import RecurrenceRule, occurrences
+
+HOUR = 3600
+DAY = 86400
+
+
+def epoch(timestamp):
+    return calendar.timegm(time.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ'))
+
+
+class TestRecurrence(unittest.TestCase):
+
+    def test_parse_rule(self):
+        rule = RecurrenceRule.parse(['RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=WE,MO;UNTIL=20250101T000000Z'])
+        self.assertEqual(rule.freq, 'WEEKLY')
+        self.assertEqual(rule.interval, 2)
+        self.assertEqual(rule.byday, [0, 2])
+        self.assertEqual(rule.until, epoch('2025-01-01T00:00:00Z'))
+
+    def test_unsupported_frequency(self):
+        with self.assertRaises(ValueError):
+            RecurrenceRule.parse('FREQ=HOURLY')
+
+    def test_weekly_byday_within_window(self):
+        # Monday 2024-12-02 10:00
+        dtstart = epoch('2024-12-02T10:00:00Z')
+        rule = RecurrenceRule.parse('FREQ=WEEKLY;BYDAY=MO,WE')
+        result = list(occurrences(dtstart, HOUR, rule, epoch('2024-12-09T00:00:00Z'), epoch('2024-12-16T00:00:00Z')))
+        self.assertEqual(
+            [start for start, _, _ in result],
+            [epoch('2024-12-09T10:00:00Z'), epoch('2024-12-11T10:00:00Z')],
+        )
+
+    def test_count_limits_series(self):
+        dtstart = epoch('2024-12-04T10:00:00Z')  # Wednesday
+        rule = RecurrenceRule.parse('FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=4')
+        result = list(occurrences(dtstart, HOUR, rule, dtstart, dtstart + 30 * DAY))
+        self.assertEqual(
+            [start for start, _, _ in result],
+            [epoch('2024-12-04T10:00:00Z'), epoch('2024-12-06T10:00:00Z'),
+             epoch('2024-12-09T10:00:00Z'), epoch('2024-12-11T10:00:00Z')],
+        )
+
+    def test_far_window_is_reached_without_scanning_history(self):
+        rule = RecurrenceRule.parse('FREQ=DAILY')
+        window_start = epoch('2100-01-01T00:00:00Z')
+        result = list(occurrences(0, HOUR, rule, window_start, window_start + 3 * DAY))
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0][0], window_start)
+
+    def test_exdates_and_overrides(self):
+        dtstart = epoch('2024-12-02T10:00:00Z')
+        rule = RecurrenceRule.parse('FREQ=DAILY;COUNT=3')
+        moved = (epoch('2024-12-03T15:00:00Z'), epoch('2024-12-03T16:00:00Z'), {'title': 'Moved'})
+        result = list(occurrences(
+            dtstart, HOUR, rule, dtstart, dtstart + 7 * DAY,
+            exdates=[epoch('2024-12-04T10:00:00Z')],
+            overrides={epoch('2024-12-03T10:00:00Z'): moved},
+        ))
+        self.assertEqual(result, [(dtstart, dtstart + HOUR, None), moved])
+
+    def test_monthly_skips_short_months(self):
+        dtstart = epoch('2024-01-31T09:00:00Z')
+        rule = RecurrenceRule.parse('FREQ=MONTHLY;COUNT=3')
+        result = list(occurrences(dtstart, HOUR, rule, dtstart, dtstart + 365 * DAY))
+        self.assertEqual(
+            [start for start, _, _ in result],
+            [dtstart, epoch('2024-03-31T09:00:00Z'), epoch('2024-05-31T09:00:00Z')],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,14 @@
 import unittest
+import json
+import os
+import shutil
+import tempfile
 from unittest import mock
+from agents import instrumentation
+from agents.outbox import Outbox
 from agents.reminder_agent import ReminderAgent
+from benchmarks.fakes import FakeLangMem, FakeTasksService, InMemoryStore
+from agents.task_dedup import TaskDeduplicator
 
 class TestReminderAgent(unittest.TestCase):
 
@@ -55,6 +63,147 @@ class TestReminderAgent(unittest.TestCase):
         
         self.mock_tasks_service.tasks().insert.assert_called()
 
+    def test_add_task_with_outbox(self):
+        
+        mock_outbox = mock.MagicMock()
+        mock_outbox.make_key.return_value = "key"
+        agent = ReminderAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=self.mock_langmem_client,
+            tasks_service=self.mock_tasks_service,
+            outbox=mock_outbox
+        )
+        task_details = {
+            "title": "Test Task",
+            "deadline": "2024-12-01",
+            "goal": "Test Goal"
+        }
+
+        agent.add_task(task_details)
+
+        
+        mock_outbox.enqueue_many.assert_called_once_with([
+            ("reminder.chroma", task_details, "key:chroma"),
+            ("reminder.langmem", task_details, "key:langmem"),
+            ("reminder.google_tasks", task_details, "key:google_tasks"),
+        ])
+        self.mock_chroma_client.add.assert_not_called()
+        self.mock_tasks_service.tasks().insert.assert_not_called()
+
+    def test_outbox_retry_after_lost_reply_does_not_duplicate(self):
+        temp_dir = tempfile.mkdtemp()
+        outbox = Outbox(db_path=os.path.join(temp_dir, 'outbox.db'), backoff_seconds=0)
+        tasks_service = FakeTasksService()
+        chroma = InMemoryStore()
+        agent = ReminderAgent(chroma_client=chroma, langmem_client=FakeLangMem(), tasks_service=tasks_service,
+                              outbox=outbox)
+        try:
+            for i in range(3):
+                agent.add_task({"title": f"Task {i}", "deadline": "2024-12-01", "goal": "Test Goal"})
+            calls = tasks_service.calls
+            self.assertTrue(outbox.flush())
+            # One list call and one batch insert for the three tasks
+            self.assertEqual(tasks_service.calls - calls, 2)
+
+            # As if the replies had been lost: the same entries are delivered again
+            with outbox._lock:
+                rows = outbox._conn.execute(
+                    "SELECT payload, idempotency_key, created_at FROM outbox WHERE target = 'reminder.google_tasks'"
+                ).fetchall()
+            entries = [(json.loads(payload), key, created_at) for payload, key, created_at in rows]
+            self.assertEqual(agent._deliver_to_google_tasks(entries), [None] * 3)
+            for (task, key, _) in entries:
+                agent._deliver_to_chroma(task, key.replace('google_tasks', 'chroma'))
+
+            self.assertEqual(len(tasks_service.tasks_by_list['@default']), 3)
+            self.assertEqual(len(chroma.records), 3)
+        finally:
+            outbox.close()
+            shutil.rmtree(temp_dir)
+
+    def test_queued_task_is_visible_before_delivery(self):
+        temp_dir = tempfile.mkdtemp()
+        outbox = Outbox(db_path=os.path.join(temp_dir, 'outbox.db'), backoff_seconds=0)
+        chroma = InMemoryStore()
+        langmem = FakeLangMem()
+        agent = ReminderAgent(chroma_client=chroma, langmem_client=langmem, tasks_service=FakeTasksService(),
+                              outbox=outbox)
+        task = {"title": "Task 1", "deadline": "2024-12-01", "goal": "Test Goal"}
+        try:
+            self.assertEqual(agent.add_task(task)["status"], "queued")
+            self.assertIsNone(chroma.get("Task 1"))
+            with mock.patch.object(langmem, 'get_context', wraps=langmem.get_context) as get_context:
+                agent.send_contextual_reminder("Task 1")
+            get_context.assert_called_once_with(task)
+            self.assertEqual([t["title"] for t in agent._stored_tasks()], ["Task 1"])
+
+            self.assertTrue(outbox.flush())
+            self.assertEqual(agent._queued, {})
+            self.assertEqual([t["title"] for t in agent._stored_tasks()], ["Task 1"])
+        finally:
+            outbox.close()
+            shutil.rmtree(temp_dir)
+
+    def test_add_task_merges_near_duplicates(self):
+        
+        self.mock_chroma_client.get_all.return_value = [
+            {"title": "Prepare marketing plan", "deadline": "2024-12-01", "goal": "Launch"}
+        ]
+        agent = ReminderAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=self.mock_langmem_client,
+            tasks_service=self.mock_tasks_service,
+            deduplicator=TaskDeduplicator()
+        )
+
+        result = agent.add_task({"title": "Draft marketing plan", "deadline": "2024-12-02", "goal": "Launch"})
+        added = agent.add_task({"title": "Book venue", "deadline": "2024-12-02", "goal": "Launch"})
+        duplicate = agent.add_task({"title": "Book the venue", "deadline": "2024-12-03", "goal": "Launch"})
+        same_title = agent.add_task({"title": "Prepare marketing plan", "deadline": "2024-12-04", "goal": "Launch",
+                                     "description": "Budget and channels for the spring campaign."})
+
+        
+        self.assertEqual(result["duplicate_of"], "Prepare marketing plan")
+        self.assertEqual(duplicate["duplicate_of"], "Book venue")
+        self.assertEqual(added, {"status": "added", "duplicate_of": None, "similarity": None})
+        self.assertEqual(same_title["status"], "duplicate")
+        self.assertEqual(same_title["duplicate_of"], "Prepare marketing plan")
+        self.mock_chroma_client.get_all.assert_called_once()
+        self.mock_chroma_client.add.assert_called_once()
+        self.mock_tasks_service.tasks().insert.assert_called_once()
+
+    def test_add_task_flags_near_duplicates(self):
+        
+        self.mock_chroma_client.get_all.return_value = [
+            {"title": "Prepare marketing plan", "deadline": "2024-12-01", "goal": "Launch"}
+        ]
+        agent = ReminderAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=self.mock_langmem_client,
+            tasks_service=self.mock_tasks_service,
+            deduplicator=TaskDeduplicator(),
+            duplicate_policy="flag"
+        )
+
+        agent.add_task({"title": "Draft marketing plan", "deadline": "2024-12-02", "goal": "Launch"})
+
+        
+        stored = self.mock_chroma_client.add.call_args[0][1]
+        self.assertEqual(stored["duplicate_of"], "Prepare marketing plan")
+
+    def test_cluster_tasks(self):
+        
+        self.mock_chroma_client.get_all.return_value = [
+            {"title": "Prepare marketing plan", "deadline": "2024-12-01", "goal": "Launch"},
+            {"title": "Draft marketing plan", "deadline": "2024-12-01", "goal": "Launch"},
+            {"title": "Renew passport", "deadline": "2024-12-01", "goal": "Travel"}
+        ]
+
+        clusters = self.agent.cluster_tasks()
+
+        
+        self.assertEqual(clusters, [["Prepare marketing plan", "Draft marketing plan"]])
+
     def test_adjust_reminder(self):
         
         mock_tasks = [
@@ -81,6 +230,92 @@ class TestReminderAgent(unittest.TestCase):
         self.mock_chroma_client.get.assert_called_with(task_title)
         self.mock_langmem_client.get_context.assert_called_with(mock_task)
 
+    def test_adjust_reminder_dispatches_with_one_context_fetch(self):
+        
+        mock_tasks = [
+            {"title": "Task 1", "deadline": "2024-12-01", "goal": "Test Goal", "owner_email": "a@example.com"},
+            {"title": "Task 2", "deadline": "2024-12-05", "goal": "Test Goal"}
+        ]
+        self.mock_chroma_client.get_all.return_value = mock_tasks
+        self.mock_langmem_client.prioritize.return_value = mock_tasks
+        self.mock_langmem_client.get_contexts.return_value = ["Context 1.", "Context 2."]
+        dispatcher = mock.MagicMock()
+        dispatcher.dispatch.return_value = {"delivered": 2}
+        agent = ReminderAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=self.mock_langmem_client,
+            tasks_service=self.mock_tasks_service,
+            dispatcher=dispatcher
+        )
+
+        stats = agent.adjust_reminder()
+
+        
+        self.assertEqual(stats, {"delivered": 2})
+        self.mock_langmem_client.get_contexts.assert_called_once_with(mock_tasks)
+        self.mock_langmem_client.get_context.assert_not_called()
+        sent = dispatcher.dispatch.call_args[0][0]
+        self.assertEqual([n.recipient for n in sent], ["a@example.com", None])
+        self.assertIn("Context 2.", sent[1].body)
+
+    def test_adjust_reminder_without_batched_contexts(self):
+        
+        class LangMemClient:
+            def prioritize(self, tasks): pass
+            def get_context(self, task): pass
+
+        tasks = [{"title": f"Task {i}", "deadline": "2024-12-01", "goal": "Test Goal"} for i in range(3)]
+        self.mock_chroma_client.get_all.return_value = tasks
+        langmem_client = mock.create_autospec(LangMemClient, instance=True)
+        langmem_client.prioritize.return_value = tasks
+        langmem_client.get_context.side_effect = lambda task: f"Context for {task['title']}."
+        dispatcher = mock.MagicMock()
+        agent = ReminderAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=langmem_client,
+            tasks_service=self.mock_tasks_service,
+            dispatcher=dispatcher
+        )
+
+        instrumentation.enable()
+        try:
+            agent.adjust_reminder()
+            counters = instrumentation.registry.snapshot()['counters']
+        finally:
+            instrumentation.disable()
+            instrumentation.registry.reset()
+
+        
+        self.assertEqual(langmem_client.get_context.call_count, 3)
+        sent = dispatcher.dispatch.call_args[0][0]
+        self.assertEqual([n.body for n in sent],
+                         [f"Reminder: Complete 'Task {i}' (due 2024-12-01). Context for Task {i}." for i in range(3)])
+        # prioritize, then one call per context lookup
+        self.assertEqual(
+            counters['agent_external_calls_total{operation="reminder.adjust_reminder",system="langmem"}'], 4
+        )
+
+    def test_send_contextual_reminders_filters_titles(self):
+        
+        self.mock_chroma_client.get_all.return_value = [
+            {"title": "Task 1", "deadline": "2024-12-01", "goal": "Test Goal"},
+            {"title": "Task 2", "deadline": "2024-12-05", "goal": "Test Goal"}
+        ]
+        self.mock_langmem_client.get_contexts.side_effect = lambda tasks: ["Context."] * len(tasks)
+        dispatcher = mock.MagicMock()
+        agent = ReminderAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=self.mock_langmem_client,
+            tasks_service=self.mock_tasks_service,
+            dispatcher=dispatcher
+        )
+
+        agent.send_contextual_reminders(["Task 2"])
+
+        
+        sent = dispatcher.dispatch.call_args[0][0]
+        self.assertEqual([n.metadata["title"] for n in sent], ["Task 2"])
+
     def test_add_task_to_google_tasks(self):
         
         task_details = {
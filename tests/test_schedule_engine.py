@@ -0,0 +1,121 @@
+import unittest
+import random
+from types import SimpleNamespace
+from agents.event_record import parse_timestamp
+from agents.schedule_engine import earliest_common_slot, find_conflicts, find_slot, next_free_slot, reschedule
+
+HOUR = 3600
+
+
+def apply_moves(starts, ends, moves):
+    starts, ends = list(starts), list(ends)
+    for i, (s, e) in moves.items():
+        starts[i], ends[i] = s, e
+    return starts, ends
+
+
+class TestScheduleEngine(unittest.TestCase):
+
+    def test_find_conflicts(self):
+        starts = [10 * HOUR, 13 * HOUR, int(10.5 * HOUR)]
+        ends = [11 * HOUR, 14 * HOUR, int(11.5 * HOUR)]
+        self.assertEqual(find_conflicts(starts, ends), [(0, 2)])
+
+    def test_back_to_back_events_do_not_conflict(self):
+        self.assertEqual(find_conflicts([0, HOUR], [HOUR, 2 * HOUR]), [])
+        self.assertEqual(reschedule([0, HOUR], [HOUR, 2 * HOUR]), {})
+
+    def test_later_event_moves_after_buffer(self):
+        starts = [10 * HOUR, int(10.5 * HOUR)]
+        ends = [11 * HOUR, int(11.5 * HOUR)]
+        moves = reschedule(starts, ends, buffer_seconds=900)
+        self.assertEqual(moves, {1: (11 * HOUR + 900, 12 * HOUR + 900)})
+
+    def test_higher_priority_event_keeps_its_slot(self):
+        starts = [10 * HOUR, int(10.5 * HOUR)]
+        ends = [11 * HOUR, int(11.5 * HOUR)]
+        moves = reschedule(starts, ends, priorities=[1, 5], buffer_seconds=0)
+        self.assertEqual(list(moves), [0])
+        self.assertGreaterEqual(moves[0][0], int(11.5 * HOUR))
+
+    def test_zero_priority_event_without_conflicts_stays(self):
+        starts = [9 * HOUR, 10 * HOUR, int(10.5 * HOUR)]
+        ends = [10 * HOUR, 11 * HOUR, int(11.5 * HOUR)]
+        moves = reschedule(starts, ends, priorities=[0, 1, 1])
+        self.assertNotIn(0, moves)
+        self.assertEqual(len(moves), 1)
+
+    def test_fixed_event_never_moves(self):
+        starts = [10 * HOUR, int(10.5 * HOUR)]
+        ends = [11 * HOUR, int(11.5 * HOUR)]
+        moves = reschedule(starts, ends, priorities=[5, 1], fixed=[False, True], buffer_seconds=0)
+        self.assertEqual(list(moves), [0])
+
+    def test_moved_event_respects_working_hours(self):
+        starts = [16 * HOUR, int(16.5 * HOUR)]
+        ends = [17 * HOUR, int(17.5 * HOUR)]
+        moves = reschedule(starts, ends, buffer_seconds=0, working_hours=(9 * HOUR, 17 * HOUR))
+        self.assertEqual(moves, {1: (24 * HOUR + 9 * HOUR, 24 * HOUR + 10 * HOUR)})
+
+    def test_working_hours_follow_daylight_saving_changes(self):
+        # Berlin moves to summer time on 2024-03-31; 09:00 is 08:00Z before and 07:00Z after
+        on_call = parse_timestamp('2024-04-01T07:00:00Z'), parse_timestamp('2024-04-01T15:00:00Z')
+        starts = [on_call[0], parse_timestamp('2024-04-01T10:00:00Z')]
+        ends = [on_call[1], parse_timestamp('2024-04-01T11:00:00Z')]
+        moves = reschedule(starts, ends, fixed=[True, False], buffer_seconds=0,
+                           working_hours=(9 * HOUR, 17 * HOUR), time_zone='Europe/Berlin')
+        self.assertEqual(moves[1][0], parse_timestamp('2024-04-02T07:00:00Z'))
+        self.assertEqual(
+            next_free_slot([], [], parse_timestamp('2024-03-30T17:00:00Z'), HOUR,
+                           working_hours=(9 * HOUR, 17 * HOUR), time_zone='Europe/Berlin'),
+            parse_timestamp('2024-03-31T07:00:00Z'),
+        )
+
+    def test_output_is_conflict_free(self):
+        rng = random.Random(7)
+        starts = [rng.randrange(0, 30 * 24 * HOUR, 900) for _ in range(2000)]
+        ends = [s + rng.choice([1800, 3600, 5400]) for s in starts]
+        priorities = [rng.randint(1, 3) for _ in starts]
+        fixed = [rng.random() < 0.05 for _ in starts]
+
+        moves = reschedule(starts, ends, priorities=priorities, fixed=fixed, buffer_seconds=600)
+        new_starts, new_ends = apply_moves(starts, ends, moves)
+
+        # Fixed events may overlap each other, but nothing else may
+        for i, j in find_conflicts(new_starts, new_ends):
+            self.assertTrue(fixed[i] and fixed[j], f"events {i} and {j} still overlap")
+        for i, (s, e) in moves.items():
+            self.assertFalse(fixed[i])
+            self.assertGreater(s, starts[i])
+            self.assertEqual(e - s, ends[i] - starts[i])
+
+    def test_next_free_slot(self):
+        busy_starts, busy_ends = [9 * HOUR, 11 * HOUR], [10 * HOUR, 12 * HOUR]
+        self.assertEqual(next_free_slot(busy_starts, busy_ends, 8 * HOUR, HOUR), 8 * HOUR)
+        self.assertEqual(next_free_slot(busy_starts, busy_ends, int(9.5 * HOUR), HOUR), 10 * HOUR)
+        # With a buffer the hour between the two no longer fits
+        self.assertEqual(next_free_slot(busy_starts, busy_ends, 8 * HOUR, HOUR, buffer_seconds=900), 12 * HOUR + 900)
+        self.assertEqual(
+            next_free_slot([], [], 18 * HOUR, HOUR, working_hours=(9 * HOUR, 17 * HOUR)), 24 * HOUR + 9 * HOUR
+        )
+
+
+    def test_earliest_common_slot(self):
+        a = ([9 * HOUR], [10 * HOUR])
+        b = ([10 * HOUR], [11 * HOUR])
+        self.assertEqual(earliest_common_slot([a, b], 9 * HOUR, HOUR), 11 * HOUR)
+        self.assertEqual(earliest_common_slot([], 9 * HOUR, HOUR), 9 * HOUR)
+        self.assertEqual(earliest_common_slot([], 18 * HOUR, HOUR, working_hours=(9 * HOUR, 17 * HOUR)), 33 * HOUR)
+
+    def test_find_slot_without_key_sees_every_team(self):
+        records = [
+            SimpleNamespace(start=9 * HOUR, end=17 * HOUR, source={'title': 'Offsite', 'team': 'eng'}),
+            SimpleNamespace(start=17 * HOUR, end=18 * HOUR, source={'title': 'Review'}),
+        ]
+        self.assertEqual(find_slot(records, {}, 9 * HOUR, HOUR, buffer_seconds=900), 18 * HOUR + 900)
+        team_of = lambda item: [item.get('team') or '']
+        self.assertEqual(find_slot(records, {}, 9 * HOUR, HOUR, buffer_seconds=900, key=team_of), 9 * HOUR)
+
+
+if __name__ == '__main__':
+    unittest.main()
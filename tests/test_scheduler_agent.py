@@ -1,7 +1,10 @@
 import unittest
+import shutil
+import tempfile
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta
 from agents.scheduler_agent import SchedulerAgent
+from agents.state_store import StateStore
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 
 class TestSchedulerAgent(unittest.TestCase):
@@ -50,12 +53,111 @@ class TestSchedulerAgent(unittest.TestCase):
         ]
         self.mock_chroma_client.get_all.return_value = mock_schedules
 
-        meeting_details = {'duration': 60}
+        meeting_details = {'duration': 60, 'window_start': '2024-12-01T10:00:00Z', 'horizon_days': 1}
         available_slot = self.agent._find_available_slot(meeting_details)
 
         expected_slot = '2024-12-01T11:15:00Z'  # 15 minutes after the first meeting
         self.assertEqual(available_slot, expected_slot, "Available slot calculation failed.")
 
+    def test_find_available_slot_expands_recurring_events(self):
+        
+        mock_schedules = [
+            {'title': 'Standup', 'start_time': '2024-12-02T09:00:00Z', 'end_time': '2024-12-02T10:00:00Z',
+             'recurrence': 'RRULE:FREQ=DAILY'},
+            {'title': 'Review', 'start_time': '2024-12-09T11:00:00Z', 'end_time': '2024-12-09T12:00:00Z'}
+        ]
+        self.mock_chroma_client.get_all.return_value = mock_schedules
+
+        meeting_details = {'duration': 60, 'window_start': '2024-12-09T09:00:00Z', 'horizon_days': 1}
+        available_slot = self.agent._find_available_slot(meeting_details)
+
+        # After the standup there is no hour with 15 minutes clear before the review
+        self.assertEqual(available_slot, '2024-12-09T12:15:00Z')
+
+    def test_recurring_until_is_compared_in_utc(self):
+
+        events = {
+            tz: {'title': 'Weekly', 'start_time': start, 'end_time': end, 'time_zone': tz,
+                 'recurrence': 'RRULE:FREQ=WEEKLY;UNTIL=20250120T010000Z'}
+            for tz, start, end in (('Asia/Tokyo', '2025-01-06T10:00:00', '2025-01-06T11:00:00'),
+                                   ('UTC', '2025-01-06T01:00:00Z', '2025-01-06T02:00:00Z'))
+        }
+        window_start, window_end = self.agent._query_window('2025-01-01T00:00:00Z', 60)
+        counts = {tz: len(list(self.agent._event_records([event], window_start, window_end)))
+                  for tz, event in events.items()}
+
+        # 10:00 in Tokyo is 01:00Z, so UNTIL includes the third occurrence in both
+        self.assertEqual(counts, {'Asia/Tokyo': 3, 'UTC': 3})
+
+    def test_find_available_slot_ignores_events_before_window(self):
+
+        self.mock_chroma_client.get_all.return_value = [
+            {'title': 'Old 1', 'start_time': '2024-01-01T09:00:00Z', 'end_time': '2024-01-01T10:00:00Z'},
+            {'title': 'Old 2', 'start_time': '2024-01-01T12:00:00Z', 'end_time': '2024-01-01T13:00:00Z'},
+            {'title': 'Current', 'start_time': '2024-06-03T10:00:00Z', 'end_time': '2024-06-03T11:00:00Z'},
+        ]
+
+        meeting_details = {'duration': 60, 'window_start': '2024-06-03T00:00:00Z', 'horizon_days': 1}
+        available_slot = self.agent._find_available_slot(meeting_details)
+
+        self.assertGreaterEqual(available_slot, '2024-06-03T00:00:00Z')
+
+    def test_find_available_slot_considers_team_events(self):
+
+        self.mock_chroma_client.get_all.return_value = [
+            {'title': 'Eng offsite', 'team': 'eng', 'start_time': '2024-06-03T09:00:00Z',
+             'end_time': '2024-06-03T17:00:00Z'},
+        ]
+
+        meeting_details = {'duration': 60, 'window_start': '2024-06-03T09:00:00Z', 'horizon_days': 1}
+        self.assertEqual(self.agent._find_available_slot(meeting_details), '2024-06-03T17:15:00Z')
+
+    def test_find_available_slot_with_empty_window(self):
+
+        self.mock_chroma_client.get_all.return_value = [
+            {'title': 'Old', 'start_time': '2024-01-01T09:00:00Z', 'end_time': '2024-01-01T10:00:00Z'},
+        ]
+
+        meeting_details = {'duration': 60, 'window_start': '2024-06-03T09:00:00Z', 'horizon_days': 1}
+        self.assertEqual(self.agent._find_available_slot(meeting_details), '2024-06-03T09:00:00Z')
+
+    def test_find_available_slot_matches_state_store(self):
+        events = [
+            {'title': 'Old 1', 'start_time': '2024-01-01T09:00:00Z', 'end_time': '2024-01-01T10:00:00Z'},
+            {'title': 'Old 2', 'start_time': '2024-01-01T12:00:00Z', 'end_time': '2024-01-01T13:00:00Z'},
+            {'title': 'A', 'start_time': '2024-06-03T09:00:00Z', 'end_time': '2024-06-03T10:00:00Z'},
+            {'title': 'B', 'start_time': '2024-06-03T13:00:00Z', 'end_time': '2024-06-03T14:00:00Z'},
+        ]
+        self.mock_chroma_client.get_all.return_value = events
+        meeting_details = {'duration': 60, 'window_start': '2024-06-03T09:00:00Z', 'horizon_days': 1}
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.agent.state = StateStore(temp_dir, snapshot_interval=None)
+            with_state = self.agent._find_available_slot(meeting_details)
+            self.agent.state.close()
+            self.agent.state = None
+            without_state = self.agent._find_available_slot(meeting_details)
+        finally:
+            shutil.rmtree(temp_dir)
+
+        self.assertEqual(with_state, without_state)
+        self.assertEqual(without_state, '2024-06-03T10:15:00Z')
+
+    def test_adjust_schedule_leaves_events_outside_window(self):
+
+        mock_events = [
+            {'title': 'Old 1', 'start_time': '2020-03-02T10:00:00Z', 'end_time': '2020-03-02T11:00:00Z'},
+            {'title': 'Old 2', 'start_time': '2020-03-02T10:30:00Z', 'end_time': '2020-03-02T11:30:00Z'},
+            {'title': 'Later', 'start_time': '2024-06-03T10:00:00Z', 'end_time': '2024-06-03T11:00:00Z'},
+        ]
+        self.mock_chroma_client.get_all.return_value = mock_events
+
+        adjusted = self.agent.adjust_schedule(window_start='2024-06-03T00:00:00Z')
+
+        self.assertEqual(adjusted, [])
+        self.mock_chroma_client.update.assert_not_called()
+        self.assertEqual(mock_events[1]['start_time'], '2020-03-02T10:30:00Z')
+
     def test_generate_agenda(self):
   
         from langchain.schema import AIMessage, SystemMessage, HumanMessage
@@ -94,6 +196,23 @@ class TestSchedulerAgent(unittest.TestCase):
                 f"Notification sent: Meeting 'Project Discussion' scheduled on 2024-12-01T15:00:00Z.\nAgenda:\n{agenda}"
             )
 
+    def test_send_notifications_with_dispatcher(self):
+      
+        dispatcher = MagicMock()
+        self.agent.dispatcher = dispatcher
+        meeting_details = {
+            'title': 'Project Discussion',
+            'start_time': '2024-12-01T15:00:00Z',
+            'participants_emails': ['a@example.com', 'b@example.com']
+        }
+
+        self.agent.send_notifications(meeting_details, "Agenda:\n1. Updates")
+
+        
+        sent = dispatcher.dispatch.call_args[0][0]
+        self.assertEqual([n.recipient for n in sent], ['a@example.com', 'b@example.com'])
+        self.assertEqual(sent[0].metadata['kind'], 'meeting')
+
     def test_adjust_schedule(self):
       
         mock_events = [
@@ -102,11 +221,27 @@ class TestSchedulerAgent(unittest.TestCase):
         ]
         self.mock_chroma_client.get_all.return_value = mock_events
 
-        self.agent.adjust_schedule()
+        self.agent.adjust_schedule(window_start='2024-12-01T00:00:00Z')
 
         
         self.mock_chroma_client.update.assert_called()
 
+    def test_adjust_schedule_writes_only_moved_events(self):
+      
+        mock_events = [
+            {'title': 'Meeting 1', 'start_time': '2024-12-01T10:00:00Z', 'end_time': '2024-12-01T11:00:00Z'},
+            {'title': 'Meeting 2', 'start_time': '2024-12-01T10:30:00Z', 'end_time': '2024-12-01T11:30:00Z'},
+            {'title': 'Meeting 3', 'start_time': '2024-12-01T14:00:00Z', 'end_time': '2024-12-01T15:00:00Z'}
+        ]
+        self.mock_chroma_client.get_all.return_value = mock_events
+
+        adjusted = self.agent.adjust_schedule(window_start='2024-12-01T00:00:00Z')
+
+        self.mock_chroma_client.update.assert_called_once_with('Meeting 2', mock_events[1])
+        self.assertEqual(adjusted, [mock_events[1]])
+        self.assertEqual(mock_events[1]['start_time'], '2024-12-01T11:15:00Z')
+        self.assertEqual(mock_events[1]['end_time'], '2024-12-01T12:15:00Z')
+
     def test_add_event_to_google_calendar(self):
       
         event_details = {
@@ -131,5 +266,28 @@ class TestSchedulerAgent(unittest.TestCase):
             }
         )
 
+    def test_add_event_to_google_calendar_with_outbox(self):
+      
+        mock_outbox = MagicMock()
+        mock_outbox.enqueue.return_value = 'abc123'
+        agent = SchedulerAgent(
+            chroma_client=self.mock_chroma_client,
+            langmem_client=self.mock_langmem_client,
+            llm=self.mock_llm,
+            calendar_service=self.mock_calendar_service,
+            outbox=mock_outbox
+        )
+        event_details = {
+            'title': 'Team Sync',
+            'start_time': '2024-12-01T15:00:00Z',
+            'end_time': '2024-12-01T16:00:00Z'
+        }
+
+        result = agent.add_event_to_google_calendar(event_details)
+
+        self.assertEqual(result, {'status': 'queued', 'id': 'abc123'})
+        mock_outbox.enqueue.assert_called_once()
+        self.mock_calendar_service.events().insert.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import unittest
+import copy
+from unittest import mock
+from unittest.mock import MagicMock
+from benchmarks import datagen
+from agents.event_record import EventRecord, parse_timestamp
+from agents.schedule_engine import find_conflicts, find_slot
+from agents.sharding import ShardPool, calendar_keys, shard_of, shard_pool_from_env
+
+HOUR = 3600
+DAY = parse_timestamp('2024-12-02T00:00:00Z')
+
+
+def event(title, start, end, **fields):
+    return dict(fields, title=title, start_time=f"2024-12-02T{start}:00Z", end_time=f"2024-12-02T{end}:00Z")
+
+
+def records(events):
+    return [EventRecord.from_event(e) for e in events]
+
+
+def apply_moves(records, moves):
+    intervals = [(record.start, record.end) for record in records]
+    for i, interval in moves.items():
+        intervals[i] = interval
+    return intervals
+
+
+class TestSharding(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ShardPool(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_calendar_keys(self):
+        self.assertEqual(calendar_keys({'team': 'ops'}), ['ops'])
+        self.assertEqual(calendar_keys({'teams': ['ops', 'dev', 'ops']}), ['dev', 'ops'])
+        self.assertEqual(calendar_keys({}), [''])
+        self.assertEqual(shard_of('ops', 8), shard_of('ops', 8))
+
+    def test_teams_do_not_conflict_with_each_other(self):
+        schedule = records([
+            event('Ops standup', '09:00', '10:00', team='ops'),
+            event('Dev standup', '09:00', '10:00', team='dev'),
+            event('Ops review', '09:30', '10:30', team='ops'),
+        ])
+        conflicts, moves = self.pool.reschedule(schedule, buffer_seconds=0)
+
+        self.assertEqual(conflicts, [(0, 2)])
+        self.assertEqual(list(moves), [2])
+
+    def test_shared_meeting_is_placed_in_every_team(self):
+        schedule = records([
+            event('Ops on-call', '10:00', '11:00', team='ops', fixed=True),
+            event('Dev planning', '11:00', '12:00', team='dev', priority=3),
+            event('Joint review', '10:30', '11:00', teams=['ops', 'dev']),
+            event('Dev sync', '12:00', '12:30', team='dev'),
+        ])
+        conflicts, moves = self.pool.reschedule(schedule, buffer_seconds=0)
+
+        # The joint review only has to clear the on-call slot; dev's own meetings then move around it
+        self.assertEqual(moves[2], (DAY + 11 * HOUR, DAY + 11 * HOUR + 30 * 60))
+        self.assertIn(1, moves)
+        self.assertNotIn(0, moves)
+        self.assertIn((0, 2), conflicts)
+        intervals = apply_moves(schedule, moves)
+        for team in ('ops', 'dev'):
+            members = [i for i, record in enumerate(schedule) if team in calendar_keys(record.source)]
+            self.assertEqual(find_conflicts([intervals[i][0] for i in members], [intervals[i][1] for i in members]), [])
+
+    def test_result_does_not_depend_on_workers(self):
+        schedule = records(datagen.generate_org_calendar(12, 150, shared_rate=0.2))
+        single = ShardPool(workers=1, shards=1)
+        try:
+            expected = single.reschedule(schedule)
+        finally:
+            single.close()
+
+        self.assertEqual(self.pool.reschedule(schedule), expected)
+        conflicts, moves = expected
+        self.assertTrue(moves)
+        intervals = apply_moves(schedule, moves)
+        for team in {team for record in schedule for team in calendar_keys(record.source)}:
+            members = [i for i, record in enumerate(schedule) if team in calendar_keys(record.source)]
+            self.assertEqual(find_conflicts([intervals[i][0] for i in members], [intervals[i][1] for i in members]), [])
+
+    def test_find_slots_across_teams(self):
+        schedule = records([
+            event('Ops standup', '00:00', '01:00', team='ops'),
+            event('Dev planning', '01:00', '03:00', team='dev'),
+            event('Ops review', '03:00', '04:00', team='ops'),
+        ])
+        meetings = [
+            ({'teams': ['ops', 'dev']}, DAY, HOUR),
+            ({'team': 'dev'}, DAY, HOUR),
+            ({'team': 'sales'}, DAY + HOUR, HOUR),
+        ]
+        slots = self.pool.find_slots(schedule, meetings, buffer_seconds=0)
+        self.assertEqual(slots, [DAY + 4 * HOUR, DAY, DAY + HOUR])
+
+    def test_find_slots_matches_unsharded_search(self):
+        schedule = records(datagen.generate_org_calendar(6, 80, shared_rate=0.2))
+        teams = sorted({team for record in schedule for team in calendar_keys(record.source)})
+        meetings = [({'teams': teams[i:i + size]}, datagen.BASE_TIME + i * 24 * HOUR + 10 * HOUR, duration)
+                    for i in range(len(teams)) for size in (1, 2) for duration in (30 * 60, 2 * HOUR)]
+        meetings.append(({'team': 'nobody'}, datagen.BASE_TIME + 7 * 60, HOUR))
+        working_hours = (9 * HOUR, 17 * HOUR)
+
+        for options in (dict(buffer_seconds=900), dict(buffer_seconds=0, working_hours=working_hours)):
+            expected = [
+                find_slot(schedule, meeting, not_before, duration, key=calendar_keys, **options)
+                for meeting, not_before, duration in meetings
+            ]
+            self.assertEqual(self.pool.find_slots(schedule, meetings, **options), expected)
+        # A team without events is free, within working hours
+        self.assertEqual(expected[-1] % (24 * HOUR), 9 * HOUR)
+
+    def test_scheduler_agent_slots_match_pool(self):
+        from agents.scheduler_agent import SchedulerAgent
+        events = datagen.generate_calendar(200)
+        slots = []
+        for shard_pool in (None, self.pool):
+            chroma = MagicMock()
+            chroma.get_all.return_value = copy.deepcopy(events)
+            agent = SchedulerAgent(chroma_client=chroma, langmem_client=MagicMock(), llm=MagicMock(),
+                                   calendar_service=MagicMock(), shard_pool=shard_pool)
+            slots.append([
+                agent.identify_optimal_slots({'duration': duration, 'window_start': event['start_time'],
+                                              'horizon_days': 30})
+                for event in events[::20] for duration in (30, 120)
+            ])
+        # Without teams every event is on one calendar, so both searches see the same events
+        self.assertEqual(slots[0], slots[1])
+
+    def test_scheduler_agent_uses_pool(self):
+        from agents.scheduler_agent import SchedulerAgent
+        events = datagen.generate_calendar(300)
+        agents = []
+        for shard_pool in (None, self.pool):
+            chroma = MagicMock()
+            chroma.get_all.return_value = copy.deepcopy(events)
+            agents.append(SchedulerAgent(chroma_client=chroma, langmem_client=MagicMock(), llm=MagicMock(),
+                                         calendar_service=MagicMock(), shard_pool=shard_pool))
+
+        # Without teams every event is on one calendar, as without the pool
+        plain, sharded = (
+            agent.adjust_schedule(window_start='2024-12-02T00:00:00Z', horizon_days=60) for agent in agents
+        )
+        self.assertTrue(plain)
+        self.assertEqual(sharded, plain)
+
+    def test_shard_pool_from_env(self):
+        with mock.patch.dict('os.environ', {}, clear=True):
+            self.assertIsNone(shard_pool_from_env())
+        with mock.patch.dict('os.environ', {'SCHEDULER_WORKERS': '3'}, clear=True):
+            self.assertEqual(shard_pool_from_env().workers, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,283 @@
+import unittest
+import math
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+from unittest.mock import MagicMock
+from agents.event_record import parse_timestamp
+from agents.state_store import HEADER, StateStore
+
+EVENTS = [
+    {'title': 'Standup', 'start_time': '2024-12-02T09:00:00Z', 'end_time': '2024-12-02T09:15:00Z'},
+    {'title': 'Offsite', 'start_time': '2024-11-30T08:00:00Z', 'end_time': '2024-12-02T18:00:00Z'},
+    {'title': 'Review', 'start_time': '2024-12-09T14:00:00Z', 'end_time': '2024-12-09T15:00:00Z'},
+    {'title': 'Weekly', 'start_time': '2024-01-01T10:00:00Z', 'end_time': '2024-01-01T11:00:00Z',
+     'recurrence': 'FREQ=WEEKLY'},
+]
+TASKS = [
+    {'title': 'Later', 'deadline': '2024-12-20', 'goal': 'G'},
+    {'title': 'Sooner', 'deadline': '2024-12-05', 'goal': 'G'},
+    {'title': 'Soonest', 'deadline': '2024-12-01', 'goal': 'G'},
+]
+DAY = 86400
+
+
+class TestStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = self.open()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def open(self, **options):
+        options.setdefault('snapshot_interval', None)
+        return StateStore(self.temp_dir, **options)
+
+    def reopen(self, **options):
+        self.store.close()
+        self.store = self.open(**options)
+        return self.store
+
+    def titles(self, items):
+        return sorted(item['title'] for item in items)
+
+    def test_empty_store(self):
+        self.assertFalse(self.store.has('events'))
+        self.assertEqual(self.store.events(), [])
+        self.assertEqual(self.store.tasks(), [])
+        self.assertEqual(len(self.store.goal_columns()['title']), 0)
+
+    def test_sections_go_stale_after_reseed_interval(self):
+        self.assertTrue(self.store.stale('events'))
+        self.store.replace_events(EVENTS)
+        self.store.put_events([dict(EVENTS[0], title='Extra')])
+        self.assertFalse(self.reopen(reseed_interval=60).stale('events'))
+        self.assertTrue(self.store.stale('tasks'))
+        with mock.patch('agents.state_store.time.time', return_value=time.time() + 61):
+            self.assertTrue(self.store.stale('events'))
+        self.assertFalse(self.reopen(reseed_interval=None).stale('events'))
+
+    def test_window_events(self):
+        self.store.replace_events(EVENTS)
+        start = parse_timestamp('2024-12-02T00:00:00Z')
+
+        events = self.reopen().window_events(start, start + DAY)
+
+        self.assertTrue(self.store.has('events'))
+        # The offsite started before the window but runs into it; recurring series always come back
+        self.assertEqual(self.titles(events), ['Offsite', 'Standup', 'Weekly'])
+
+    def test_log_is_replayed_on_top_of_snapshot(self):
+        self.store.replace_events(EVENTS)
+        self.store.replace_tasks(TASKS)
+        moved = dict(EVENTS[0], start_time='2024-12-09T09:00:00Z', end_time='2024-12-09T09:15:00Z')
+        self.store.put_events([moved])
+        self.store.delete_event('Review')
+        self.store.put_task({'title': 'Now', 'deadline': '2024-11-01', 'goal': 'G'})
+        self.store.delete_task('Sooner')
+
+        store = self.reopen()
+        start = parse_timestamp('2024-12-09T00:00:00Z')
+        self.assertEqual(self.titles(store.window_events(start, start + DAY)), ['Standup', 'Weekly'])
+        self.assertEqual([task['title'] for task in store.tasks()], ['Now', 'Soonest', 'Later'])
+        self.assertEqual(store.sequence, 4)
+
+    def test_tasks_limit(self):
+        self.store.replace_tasks(TASKS)
+        self.store.put_task({'title': 'Middle', 'deadline': '2024-12-03', 'goal': 'G'})
+
+        self.assertEqual([task['title'] for task in self.store.tasks(limit=2)], ['Soonest', 'Middle'])
+
+    def test_goal_counters(self):
+        self.store.replace_goals({
+            'title': ['Launch', 'Hire'], 'created': [0.0, 10.0], 'target_milestones': [3, 2],
+            'target_date': [DAY, math.nan], 'milestone_count': [2, 0], 'last_milestone': [200.0, math.nan],
+        })
+        self.store.add_milestone('Hire', 300.0)
+        self.store.add_milestone('Learn', 400.0)  # before the goal exists
+        self.store.put_goal('Launch', 50.0, 4)
+
+        store = self.reopen()
+        columns = store.goal_columns()
+        by_title = {title: i for i, title in enumerate(columns['title'])}
+        self.assertEqual(sorted(by_title), ['Hire', 'Launch'])
+        self.assertEqual(columns['milestone_count'][by_title['Hire']], 1)
+        self.assertEqual(columns['last_milestone'][by_title['Hire']], 300.0)
+        self.assertEqual(columns['created'][by_title['Launch']], 50.0)
+        self.assertEqual(columns['target_milestones'][by_title['Launch']], 4)
+        self.assertTrue(math.isnan(columns['target_date'][by_title['Launch']]))
+        self.assertEqual(columns['milestone_count'][by_title['Launch']], 2)
+
+        store.put_goal('Learn', 60.0)
+        store.snapshot()
+        learn = self.reopen().goal_columns(['Learn', 'Missing'])
+        self.assertEqual(list(learn['title']), ['Learn'])
+        self.assertEqual(learn['milestone_count'][0], 1)
+
+    def test_periodic_snapshot_truncates_log(self):
+        store = self.reopen(snapshot_every=3)
+        store.replace_tasks([])
+        for i in range(4):
+            store.put_task({'title': f"Task {i}", 'deadline': '2024-12-01', 'goal': 'G'})
+
+        with open(store.snapshot_path, 'rb') as f:
+            self.assertEqual(HEADER.unpack(f.read(HEADER.size))[3], 3)
+        store = self.reopen()
+        self.assertEqual(len(store.tasks()), 4)
+        self.assertEqual(store.sequence, 4)
+
+    def test_torn_log_tail_is_dropped(self):
+        self.store.replace_tasks(TASKS)
+        self.store.put_task({'title': 'Kept', 'deadline': '2024-12-02', 'goal': 'G'})
+        self.store.put_task({'title': 'Torn', 'deadline': '2024-12-02', 'goal': 'G'})
+        self.store.close()
+        with open(self.store.log_path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.store.log_path) - 5)
+
+        store = self.open()
+        self.assertIn('Kept', self.titles(store.tasks()))
+        self.assertNotIn('Torn', self.titles(store.tasks()))
+        store.put_task({'title': 'After', 'deadline': '2024-12-02', 'goal': 'G'})
+        self.store = store
+        self.assertIn('After', self.titles(self.reopen().tasks()))
+
+    def test_log_records_in_snapshot_are_not_replayed_twice(self):
+        self.store.replace_goals({'title': ['Launch'], 'created': [0.0], 'target_milestones': [3],
+                                  'target_date': [math.nan], 'milestone_count': [0], 'last_milestone': [math.nan]})
+        self.store.add_milestone('Launch', 100.0)
+        with open(self.store.log_path, 'rb') as f:
+            log = f.read()
+        self.store.snapshot()
+        # As if the process died after the new snapshot landed but before the log was truncated
+        with open(self.store.log_path, 'wb') as f:
+            f.write(log)
+
+        self.assertEqual(self.reopen().goal_columns()['milestone_count'][0], 1)
+
+    def test_incompatible_snapshot_is_discarded(self):
+        self.store.replace_tasks(TASKS)
+        self.store.close()
+        with open(self.store.snapshot_path, 'r+b') as f:
+            f.seek(8)
+            f.write((99).to_bytes(4, 'little'))
+
+        self.store = self.open()
+        self.assertFalse(self.store.has('tasks'))
+        self.assertEqual(self.store.tasks(), [])
+
+    def test_invalid_change_is_rejected_before_logging(self):
+        with self.assertRaises(ValueError):
+            self.store.put_task({'title': 'Bad', 'deadline': 'soon', 'goal': 'G'})
+        self.assertEqual(self.store.sequence, 0)
+        self.assertEqual(os.path.getsize(self.store.log_path), 0)
+
+    def test_snapshot_header(self):
+        self.store.replace_events(EVENTS)
+        with open(self.store.snapshot_path, 'rb') as f:
+            magic, version, sections, sequence, _ = HEADER.unpack(f.read(HEADER.size))
+        self.assertEqual((magic, version, sequence), (b'AGSTATE\0', 1, 0))
+
+
+class TestAgentsWithStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = StateStore(self.temp_dir, snapshot_interval=None)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_reminder_agent_scans_chroma_once(self):
+        from agents.reminder_agent import ReminderAgent
+        chroma = MagicMock()
+        chroma.get_all.return_value = list(TASKS)
+        langmem = MagicMock()
+        langmem.prioritize.side_effect = lambda tasks: tasks
+        agent = ReminderAgent(chroma_client=chroma, langmem_client=langmem, tasks_service=MagicMock(),
+                              state=self.store)
+
+        agent.add_task({'title': 'New', 'deadline': '2024-11-15', 'goal': 'G'})
+        agent.adjust_reminder()
+        self.store.close()
+        restarted = ReminderAgent(chroma_client=chroma, langmem_client=langmem, tasks_service=MagicMock(),
+                                  state=StateStore(self.temp_dir, snapshot_interval=None))
+        restarted.adjust_reminder()
+        restarted.state.close()
+
+        chroma.get_all.assert_called_once()
+        self.assertEqual([task['title'] for task in langmem.prioritize.call_args[0][0]],
+                         ['New', 'Soonest', 'Sooner', 'Later'])
+
+    def test_scheduler_agent_records_moves(self):
+        from agents.scheduler_agent import SchedulerAgent
+        chroma = MagicMock()
+        chroma.get_all.return_value = [
+            {'title': 'Meeting 1', 'start_time': '2024-12-02T10:00:00Z', 'end_time': '2024-12-02T11:00:00Z'},
+            {'title': 'Meeting 2', 'start_time': '2024-12-02T10:30:00Z', 'end_time': '2024-12-02T11:30:00Z'},
+        ]
+        agent = SchedulerAgent(chroma_client=chroma, langmem_client=MagicMock(), llm=MagicMock(),
+                               calendar_service=MagicMock(), state=self.store)
+
+        moved = agent.adjust_schedule(window_start='2024-12-02T00:00:00Z', horizon_days=1)
+        again = agent.adjust_schedule(window_start='2024-12-02T00:00:00Z', horizon_days=1)
+
+        self.assertEqual(len(moved), 1)
+        self.assertEqual(again, [])
+        chroma.get_all.assert_called_once()
+
+    def test_scheduler_agent_reseeds_stale_events(self):
+        from agents.scheduler_agent import SchedulerAgent
+        chroma = MagicMock()
+        chroma.get_all.return_value = [
+            {'title': 'Meeting 1', 'start_time': '2024-12-02T10:00:00Z', 'end_time': '2024-12-02T11:00:00Z'},
+        ]
+        agent = SchedulerAgent(chroma_client=chroma, langmem_client=MagicMock(), llm=MagicMock(),
+                               calendar_service=MagicMock(), state=self.store)
+        meeting = {'duration': 30, 'window_start': '2024-12-02T10:00:00Z', 'horizon_days': 1}
+
+        self.assertEqual(agent.identify_optimal_slots(meeting), '2024-12-02T11:15:00Z')
+        # Calendar-only writes stay out of the store, as they are out of Chroma
+        agent.add_event_to_google_calendar(
+            {'title': 'Added', 'start_time': '2024-12-02T11:15:00Z', 'end_time': '2024-12-02T12:00:00Z'}
+        )
+        self.assertEqual(agent.identify_optimal_slots(meeting), '2024-12-02T11:15:00Z')
+
+        # Another process adds an event to Chroma; it shows up once the section is stale
+        chroma.get_all.return_value = chroma.get_all.return_value + [
+            {'title': 'Meeting 2', 'start_time': '2024-12-02T11:00:00Z', 'end_time': '2024-12-02T14:00:00Z'},
+        ]
+        self.assertEqual(agent.identify_optimal_slots(meeting), '2024-12-02T11:15:00Z')
+        self.store.reseed_interval = 0
+        self.assertEqual(agent.identify_optimal_slots(meeting), '2024-12-02T14:15:00Z')
+        self.assertEqual(chroma.get_all.call_count, 2)
+
+    def test_goal_summary_matches_ledgers(self):
+        from agents.goal_tracker_agent import GoalTrackerAgent
+        previous = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            plain = GoalTrackerAgent(client=MagicMock())
+            plain.input_goal({'title': 'Launch', 'description': 'Ship', 'target_milestones': 3})
+            plain.log_milestone('Launch', 'Research')
+            with_state = GoalTrackerAgent(client=MagicMock(), state=self.store)
+            with_state.log_milestone('Launch', 'Design')
+            with_state.input_goal({'title': 'Hire', 'description': '', 'target_milestones': 2})
+
+            expected = plain.goal_summary(now=1e10)
+            actual = with_state.goal_summary(now=1e10)
+        finally:
+            os.chdir(previous)
+
+        order = [list(actual['title']).index(title) for title in expected['title']]
+        for key in ('milestones', 'progress', 'at_risk'):
+            self.assertEqual(list(actual[key][order]), list(expected[key]))
+
+
+if __name__ == '__main__':
+    unittest.main()
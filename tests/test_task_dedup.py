@@ -0,0 +1,91 @@
+import unittest
+import numpy as np
+from agents.task_dedup import ANNIndex, HashingEmbedder, TaskDeduplicator
+
+
+class TestTaskDeduplicator(unittest.TestCase):
+
+    def setUp(self):
+        self.dedup = TaskDeduplicator()
+        self.dedup.add({
+            'title': 'Prepare marketing plan',
+            'description': 'Develop a comprehensive marketing plan for the new product.',
+        })
+
+    def test_reworded_task_is_a_duplicate(self):
+        duplicate = self.dedup.find_duplicate({
+            'title': 'Draft marketing plan',
+            'description': 'Write the marketing plan for the new product',
+        })
+        self.assertIsNotNone(duplicate)
+        self.assertEqual(duplicate[0], 'Prepare marketing plan')
+        self.assertGreaterEqual(duplicate[1], self.dedup.threshold)
+
+    def test_same_title_is_a_duplicate(self):
+        task = {'title': 'Book venue'}
+        self.dedup.add(task)
+        duplicate = self.dedup.find_duplicate({'title': 'Prepare marketing plan', 'description': 'Budget for Q3 ads'})
+        self.assertEqual(duplicate[0], 'Prepare marketing plan')
+        # An indexed task is not a duplicate of itself
+        self.assertIsNone(self.dedup.find_duplicate(task))
+
+    def test_different_tasks_are_not_duplicates(self):
+        self.assertIsNone(self.dedup.find_duplicate({'title': 'Prepare hiring plan'}))
+        self.assertIsNone(self.dedup.find_duplicate({'title': 'Book flights to Berlin'}))
+
+    def test_different_numbers_are_not_duplicates(self):
+        self.dedup.add({'title': 'Q1 revenue report'})
+        self.assertIsNone(self.dedup.find_duplicate({'title': 'Q2 revenue report'}))
+
+    def test_embeddings_are_batched_and_cached(self):
+        calls = []
+        embedder = HashingEmbedder()
+
+        def embed(texts):
+            calls.append(len(texts))
+            return embedder(texts)
+
+        dedup = TaskDeduplicator(embed=embed, batch_size=2)
+        tasks = [{'title': f'Task {name}'} for name in 'abcde']
+        dedup.add_many(tasks)
+        dedup.add_many(tasks)
+        self.assertEqual(calls, [2, 2, 1])
+
+    def test_cluster(self):
+        tasks = [
+            {'title': 'Prepare marketing plan'},
+            {'title': 'Draft marketing plan'},
+            {'title': 'Finalize marketing plan'},
+            {'title': 'Book flights to Berlin'},
+            {'title': 'Book flight to Berlin'},
+            {'title': 'Renew passport'},
+        ]
+        self.assertEqual(self.dedup.cluster(tasks), [
+            ['Book flights to Berlin', 'Book flight to Berlin'],
+            ['Prepare marketing plan', 'Draft marketing plan', 'Finalize marketing plan'],
+        ])
+
+
+class TestANNIndex(unittest.TestCase):
+
+    def test_lsh_finds_near_neighbours(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((5000, 64)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = ANNIndex(64, exact_below=0)
+        index.add_many(range(len(vectors)), vectors)
+
+        found = 0
+        for i in range(0, 5000, 50):
+            noisy = vectors[i] + 0.02 * rng.standard_normal(64).astype(np.float32)
+            noisy /= np.linalg.norm(noisy)
+            results = index.query(noisy, k=1, min_score=0.9)
+            found += bool(results) and results[0][0] == i
+        self.assertGreaterEqual(found, 95)
+
+    def test_query_empty_index(self):
+        self.assertEqual(ANNIndex(8).query(np.ones(8, dtype=np.float32)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()